@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+import os
+import fcntl
+import bisect
+import threading
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from serialization import dumps
+from session_index import read_log_file
+from storage import INDEX_PATH, read_json
+
+def action_item_record(project_id: str, action_item: Dict) -> Dict:
+    """
+    Build the index record of a project action item
+    """
+    return {**action_item, 'project_id': project_id}
+
+class ActionItemIndex:
+    """
+    Append-only index of the action items of every project
+
+    Project files stay the source of truth; every action item write also
+    appends its record to <index>/action_items.jsonl (last write wins,
+    `deleted` records are tombstones). Readers tail the log like the
+    session index does, so listing action items across projects never
+    opens a project file. Records are kept by project and by status for
+    filtered queries and ordered by creation time.
+    """
+    def __init__(self, index_path: str = INDEX_PATH):
+        """
+        Initialize ActionItemIndex
+
+        Args:
+            index_path: Root directory of the on-disk indexes
+        """
+        os.makedirs(index_path, exist_ok=True)
+        self.log_path = os.path.join(index_path, 'action_items.jsonl')
+        self._lock = threading.Lock()
+        self._records: Dict[str, Dict] = {}
+        self._order: List[Tuple[str, str]] = []  # (created_at, id), ascending
+        self._by_project: Dict[str, Set[str]] = {}
+        self._by_status: Dict[str, Set[str]] = {}
+        self._offset = 0
+        self._inode = None
+
+    def _append(self, records: List[Dict]):
+        payload = b''.join(dumps(record) + b'\n' for record in records)
+        while True:
+            with open(self.log_path, 'ab') as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    if not self._is_current(f):
+                        # Replaced by a rebuild since we opened it
+                        continue
+                    f.write(payload)
+                    return
+                finally:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _is_current(self, f) -> bool:
+        try:
+            return os.fstat(f.fileno()).st_ino == os.stat(self.log_path).st_ino
+        except FileNotFoundError:
+            return False
+
+    def _apply(self, record: Dict):
+        item_id = record['id']
+        previous = self._records.pop(item_id, None)
+        if previous is not None:
+            key = (previous.get('created_at') or '', item_id)
+            position = bisect.bisect_left(self._order, key)
+            if position < len(self._order) and self._order[position] == key:
+                del self._order[position]
+            for lookup, field in ((self._by_project, 'project_id'), (self._by_status, 'status')):
+                ids = lookup.get(previous.get(field))
+                if ids is not None:
+                    ids.discard(item_id)
+                    if not ids:
+                        del lookup[previous[field]]
+
+        if record.get('deleted'):
+            return
+
+        self._records[item_id] = record
+        bisect.insort(self._order, (record.get('created_at') or '', item_id))
+        self._by_project.setdefault(record.get('project_id'), set()).add(item_id)
+        self._by_status.setdefault(record.get('status'), set()).add(item_id)
+
+    def refresh(self) -> int:
+        """
+        Apply records appended to the log since the last refresh
+
+        Returns:
+            Number of records applied
+        """
+        with self._lock:
+            records, offset, inode = read_log_file(self.log_path, self._offset, self._inode)
+            if inode != self._inode:
+                # First load, or the log was rebuilt: reload it
+                self._records, self._order = {}, []
+                self._by_project, self._by_status = {}, {}
+                self._inode = inode
+
+            self._offset = offset
+            for record in records:
+                self._apply(record)
+
+            return len(records)
+
+    def put_many(self, project_id: str, action_items: List[Dict]):
+        """
+        Index new or changed action items of a project
+
+        Args:
+            project_id: Project unique identifier
+            action_items: Action items as stored in the project file
+        """
+        if action_items:
+            self._append([action_item_record(project_id, item) for item in action_items])
+
+    def set_project(self, project_id: str, action_items: List[Dict]) -> int:
+        """
+        Bring a project's indexed action items in line with its complete list
+
+        Only differences are appended: new and changed items, and
+        tombstones for items no longer in the list.
+
+        Args:
+            project_id: Project unique identifier
+            action_items: Complete list of the project's action items
+
+        Returns:
+            Number of records appended
+        """
+        self.refresh()
+        with self._lock:
+            indexed = {item_id: self._records[item_id] for item_id in self._by_project.get(project_id, ())}
+
+        records = []
+        for item in action_items:
+            if not item.get('id'):
+                continue
+            record = action_item_record(project_id, item)
+            if indexed.pop(item['id'], None) != record:
+                records.append(record)
+        records.extend({'id': item_id, 'deleted': True} for item_id in indexed)
+
+        if records:
+            self._append(records)
+        return len(records)
+
+    def remove_project(self, project_id: str) -> int:
+        """
+        Drop every action item of a project
+
+        Args:
+            project_id: Project unique identifier
+
+        Returns:
+            Number of action items removed
+        """
+        return self.set_project(project_id, [])
+
+    def get(self, item_id: str) -> Optional[Dict]:
+        """
+        Look up an action item's index record
+
+        Args:
+            item_id: Action item unique identifier
+
+        Returns:
+            Index record (with its `project_id`) or None
+        """
+        self.refresh()
+        return self._records.get(item_id)
+
+    def query(
+        self,
+        statuses: Optional[Iterable[str]] = None,
+        priorities: Optional[Iterable[str]] = None,
+        project_ids: Optional[Iterable[str]] = None,
+        since: Optional[str] = None,
+        offset: int = 0,
+        limit: int = 50
+    ) -> Tuple[int, List[Dict]]:
+        """
+        Find action items across projects, newest first
+
+        Args:
+            statuses: Optional statuses to match (any of)
+            priorities: Optional priorities to match (any of)
+            project_ids: Optional projects to match (any of)
+            since: Optional ISO timestamp; items created earlier are omitted
+            offset: Number of matches to skip
+            limit: Maximum number of matches to return
+
+        Returns:
+            Tuple of (total matches, page of index records)
+        """
+        self.refresh()
+        statuses = set(statuses) if statuses else None
+        priorities = set(priorities) if priorities else None
+        project_ids = set(project_ids) if project_ids else None
+
+        with self._lock:
+            if project_ids is not None or statuses is not None:
+                # Start from the smaller of the project and status sets
+                candidates = []
+                if project_ids is not None:
+                    candidates.append(set().union(*(self._by_project.get(p, ()) for p in project_ids)))
+                if statuses is not None:
+                    candidates.append(set().union(*(self._by_status.get(s, ()) for s in statuses)))
+                ids = min(candidates, key=len)
+                keys = sorted(((self._records[i].get('created_at') or '', i) for i in ids), reverse=True)
+            else:
+                start = bisect.bisect_left(self._order, (since, '')) if since else 0
+                keys = reversed(self._order[start:])
+
+            matches = []
+            for created_at, item_id in keys:
+                if since and created_at < since:
+                    break
+                record = self._records[item_id]
+                if statuses is not None and record.get('status') not in statuses:
+                    continue
+                if priorities is not None and record.get('priority') not in priorities:
+                    continue
+                if project_ids is not None and record.get('project_id') not in project_ids:
+                    continue
+                matches.append(record)
+
+        return len(matches), matches[offset:offset + limit]
+
+    def __len__(self) -> int:
+        self.refresh()
+        return len(self._records)
+
+    def _log_size(self) -> int:
+        with open(self.log_path, 'ab') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                return f.tell()
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def rebuild(self, projects_path: str) -> int:
+        """
+        Rebuild the index from scratch from the `action_items` of every project file
+
+        Args:
+            projects_path: Directory containing project JSON files
+
+        Returns:
+            Number of action items indexed
+        """
+        # Items written while scanning are kept (appended past this point)
+        carry_from = self._log_size()
+        records = []
+        for filename in sorted(os.listdir(projects_path)):
+            if not filename.endswith('.json'):
+                continue
+            project_data = read_json(os.path.join(projects_path, filename), {})
+            if not project_data.get('id'):
+                continue
+            records.extend(
+                action_item_record(project_data['id'], item)
+                for item in project_data.get('action_items', []) if item.get('id')
+            )
+
+        tmp_path = f"{self.log_path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            for record in records:
+                f.write(dumps(record) + b'\n')
+
+            with open(self.log_path, 'ab+') as current:
+                fcntl.flock(current, fcntl.LOCK_EX)
+                try:
+                    current.seek(carry_from)
+                    f.write(current.read())
+                    f.flush()
+                    os.replace(tmp_path, self.log_path)
+                finally:
+                    fcntl.flock(current, fcntl.LOCK_UN)
+
+        return len(records)
+
+def main():
+    """
+    Rebuild the action item index from existing project files
+    """
+    from storage import PROJECTS_PATH
+
+    total = ActionItemIndex().rebuild(PROJECTS_PATH)
+    print(f"Action item index rebuilt: {total} action items")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+import math
+import functools
+import threading
+from array import array
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+from session_index import SessionIndex, read_log_file
+
+_np = False  # not imported yet
+
+def load_numpy():
+    """
+    NumPy, imported on first use (None if it is not installed)
+    """
+    global _np
+    if _np is False:
+        try:
+            import numpy as np
+        except ImportError:
+            np = None
+        _np = np
+    return _np
+
+class _Dictionary:
+    """
+    Dictionary encoding of a string column (value <-> integer code)
+    """
+    def __init__(self):
+        self.values: List[str] = []
+        self.codes: Dict[str, int] = {}
+
+    def encode(self, value: str) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+def _snapshot(method):
+    """
+    Run a query against an up-to-date snapshot, holding the snapshot lock
+
+    NumPy views share the column buffers, which must not be resized while a
+    query is using them.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            self.refresh()
+            return method(self, *args, **kwargs)
+    return wrapper
+
+def _ordinal(timestamp: Optional[str]) -> int:
+    try:
+        return date.fromisoformat(timestamp[:10]).toordinal()
+    except (TypeError, ValueError):
+        return 0
+
+def _filter_day(value: str, name: str) -> int:
+    # Query bounds must be valid dates: a silently dropped filter would
+    # return unfiltered results
+    try:
+        return date.fromisoformat(value[:10]).toordinal()
+    except ValueError:
+        raise ValueError(f"Invalid {name} date: {value!r} (expected YYYY-MM-DD)")
+
+class SessionAnalytics:
+    """
+    Columnar in-memory snapshot of session metadata
+
+    Session index records are decoded into typed `array` columns (strings
+    are dictionary encoded; participants and topics are exploded into
+    (row, code) pairs). Group-bys then run as vectorized NumPy operations
+    over zero-copy views of those columns, with a pure Python fallback when
+    NumPy is not installed.
+
+    The snapshot follows the index log by byte offset, so `refresh()` only
+    decodes records appended since the previous refresh. Updated or deleted
+    sessions mark their old row invalid.
+    """
+    def __init__(self, session_index: SessionIndex):
+        """
+        Initialize SessionAnalytics
+
+        Args:
+            session_index: Session metadata index to snapshot
+        """
+        self.session_index = session_index
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self._offset = 0
+        self._inode = None
+        self._rows: Dict[str, int] = {}
+        self.day = array('q')
+        self.messages = array('q')
+        self.duration = array('d')
+        self.project = array('q')
+        self.valid = array('b')
+        self.participant_row = array('q')
+        self.participant_code = array('q')
+        self.topic_row = array('q')
+        self.topic_code = array('q')
+        self.projects = _Dictionary()
+        self.participants = _Dictionary()
+        self.topics = _Dictionary()
+
+    def _append_row(self, record: Dict):
+        previous = self._rows.pop(record['id'], None)
+        if previous is not None:
+            self.valid[previous] = 0
+
+        if record.get('deleted'):
+            return
+
+        row = len(self.valid)
+        self._rows[record['id']] = row
+        self.day.append(_ordinal(record.get('timestamp')))
+        self.messages.append(int(record.get('total_messages') or 0))
+        duration = record.get('duration_seconds')
+        self.duration.append(math.nan if duration is None else float(duration))
+        self.project.append(self.projects.encode(record.get('project_id') or record.get('project') or ''))
+        self.valid.append(1)
+
+        for participant in record.get('participants') or []:
+            self.participant_row.append(row)
+            self.participant_code.append(self.participants.encode(participant))
+        for topic in record.get('topics') or []:
+            self.topic_row.append(row)
+            self.topic_code.append(self.topics.encode(topic))
+
+    def refresh(self) -> int:
+        """
+        Decode index records appended since the last refresh
+
+        Returns:
+            Number of records applied
+        """
+        log_path = self.session_index.log_path
+        with self._lock:
+            records, offset, inode = read_log_file(log_path, self._offset, self._inode)
+            if inode != self._inode:
+                self._reset()
+                self._inode = inode
+
+            self._offset = offset
+            for record in records:
+                self._append_row(record)
+
+            return len(records)
+
+    def warm(self) -> int:
+        """
+        Load NumPy and the snapshot ahead of the first query
+
+        Returns:
+            Number of records applied
+        """
+        load_numpy()
+        return self.refresh()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    # Vectorized helpers
+
+    def _mask(self, since: Optional[str], until: Optional[str], project: Optional[str]):
+        """
+        Row selection mask (NumPy bool array, or list of bools)
+
+        Raises ValueError for a `since`/`until` that is not an ISO date.
+        """
+        since_day = _filter_day(since, 'since') if since else None
+        until_day = _filter_day(until, 'until') if until else None
+        project_code = self.projects.codes.get(project, -1) if project else None
+
+        np = load_numpy()
+        if np is not None:
+            mask = np.frombuffer(self.valid, dtype=np.int8).astype(bool)
+            day = np.frombuffer(self.day, dtype=np.int64)
+            if since_day:
+                mask &= day >= since_day
+            if until_day:
+                mask &= day <= until_day
+            if project_code is not None:
+                mask &= np.frombuffer(self.project, dtype=np.int64) == project_code
+            return mask
+
+        return [
+            bool(valid)
+            and (not since_day or day >= since_day)
+            and (not until_day or day <= until_day)
+            and (project_code is None or project_code == code)
+            for valid, day, code in zip(self.valid, self.day, self.project)
+        ]
+
+    def _exploded_counts(self, rows: array, codes: array, mask, size: int) -> List[int]:
+        """
+        Count codes of an exploded (row, code) column over selected rows
+        """
+        np = load_numpy()
+        if np is not None:
+            rows_np = np.frombuffer(rows, dtype=np.int64)
+            codes_np = np.frombuffer(codes, dtype=np.int64)
+            return np.bincount(codes_np[mask[rows_np]], minlength=size).tolist()
+
+        counts = [0] * size
+        for row, code in zip(rows, codes):
+            if mask[row]:
+                counts[code] += 1
+        return counts
+
+    @staticmethod
+    def _top(values: List[str], counts: List[int], limit: int) -> List[Dict]:
+        ranked = sorted(
+            ((count, value) for value, count in zip(values, counts) if count),
+            key=lambda item: (-item[0], item[1])
+        )
+        return [{'name': value, 'count': count} for count, value in ranked[:limit]]
+
+    # Analytics
+
+    @_snapshot
+    def messages_per_day(
+        self,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        project: Optional[str] = None
+    ) -> List[Dict]:
+        """
+        Sessions and messages captured per day
+
+        Args:
+            since: Optional first day (ISO date; ValueError if invalid)
+            until: Optional last day (ISO date; ValueError if invalid)
+            project: Optional project id (or name for unlinked sessions)
+
+        Returns:
+            List of {'day', 'sessions', 'messages'}, oldest first
+        """
+        mask = self._mask(since, until, project)
+
+        np = load_numpy()
+        if np is not None:
+            days = np.frombuffer(self.day, dtype=np.int64)[mask]
+            if not days.size:
+                return []
+            messages = np.frombuffer(self.messages, dtype=np.int64)[mask]
+            unique_days, inverse = np.unique(days, return_inverse=True)
+            sessions = np.bincount(inverse)
+            totals = np.bincount(inverse, weights=messages)
+            per_day = zip(unique_days.tolist(), sessions.tolist(), totals.tolist())
+        else:
+            buckets: Dict[int, List[int]] = {}
+            for selected, day, messages in zip(mask, self.day, self.messages):
+                if selected:
+                    bucket = buckets.setdefault(day, [0, 0])
+                    bucket[0] += 1
+                    bucket[1] += messages
+            per_day = ((day, s, m) for day, (s, m) in sorted(buckets.items()))
+
+        return [
+            {'day': date.fromordinal(day).isoformat() if day else None, 'sessions': int(s), 'messages': int(m)}
+            for day, s, m in per_day
+        ]
+
+    @_snapshot
+    def top_participants(self, limit: int = 10, **filters) -> List[Dict]:
+        """
+        Participants ranked by number of sessions
+
+        Args:
+            limit: Maximum number of participants
+            filters: since/until/project filters
+
+        Returns:
+            List of {'name', 'count'}
+        """
+        mask = self._mask(filters.get('since'), filters.get('until'), filters.get('project'))
+        counts = self._exploded_counts(
+            self.participant_row, self.participant_code, mask, len(self.participants.values)
+        )
+        return self._top(self.participants.values, counts, limit)
+
+    @_snapshot
+    def topic_frequency(self, limit: int = 20, **filters) -> List[Dict]:
+        """
+        Topics (from AI insights) ranked by number of sessions
+
+        Args:
+            limit: Maximum number of topics
+            filters: since/until/project filters
+
+        Returns:
+            List of {'name', 'count'}
+        """
+        mask = self._mask(filters.get('since'), filters.get('until'), filters.get('project'))
+        counts = self._exploded_counts(self.topic_row, self.topic_code, mask, len(self.topics.values))
+        return self._top(self.topics.values, counts, limit)
+
+    @_snapshot
+    def session_length(self, **filters) -> Dict:
+        """
+        Average session length in messages and in seconds
+
+        Args:
+            filters: since/until/project filters
+
+        Returns:
+            Dictionary of session length statistics
+        """
+        mask = self._mask(filters.get('since'), filters.get('until'), filters.get('project'))
+
+        np = load_numpy()
+        if np is not None:
+            messages = np.frombuffer(self.messages, dtype=np.int64)[mask]
+            durations = np.frombuffer(self.duration, dtype=np.float64)[mask]
+            durations = durations[~np.isnan(durations)]
+            total = int(messages.size)
+            avg_messages = float(messages.mean()) if total else 0.0
+            avg_duration = float(durations.mean()) if durations.size else None
+        else:
+            messages = [m for selected, m in zip(mask, self.messages) if selected]
+            durations = [d for selected, d in zip(mask, self.duration) if selected and not math.isnan(d)]
+            total = len(messages)
+            avg_messages = sum(messages) / total if total else 0.0
+            avg_duration = sum(durations) / len(durations) if durations else None
+
+        return {
+            'total_sessions': total,
+            'average_messages': avg_messages,
+            'average_duration_seconds': avg_duration
+        }
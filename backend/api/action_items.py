@@ -0,0 +1,117 @@
+from fastapi import APIRouter, HTTPException, Query
+from pydantic import BaseModel
+from typing import Dict, List, Optional
+
+from metrics import STORAGE_READ_SECONDS
+from serialization import load_file
+from shaping import parse_fields
+from state import action_item_index, cold_store, project_manager, session_index
+
+router = APIRouter(prefix="/action-items", tags=["action-items"])
+
+class StatusUpdateRequest(BaseModel):
+    ids: List[str]
+    status: str
+
+class PromoteRequest(BaseModel):
+    session_id: str
+    project_id: Optional[str] = None
+    descriptions: Optional[List[str]] = None
+    priority: str = 'medium'
+
+@router.get("", response_model=Dict)
+async def list_action_items(
+    status: Optional[str] = None,
+    priority: Optional[str] = None,
+    project: Optional[str] = None,
+    since: Optional[str] = None,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=500)
+):
+    """
+    Retrieve action items across projects (paginated, newest first)
+
+    `status`, `priority` and `project` take comma-separated values;
+    `since` omits items created before an ISO date or timestamp. Answered
+    from the action item index, without reading project files.
+    """
+    try:
+        total, items = action_item_index.query(
+            statuses=parse_fields(status),
+            priorities=parse_fields(priority),
+            project_ids=parse_fields(project),
+            since=since,
+            offset=offset,
+            limit=limit
+        )
+
+        return {
+            'total': total,
+            'offset': offset,
+            'limit': limit,
+            'action_items': items
+        }
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error retrieving action items: {str(e)}")
+
+@router.get("/{item_id}", response_model=Dict)
+async def get_action_item(item_id: str):
+    """
+    Retrieve a single action item with its project id
+    """
+    record = action_item_index.get(item_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Action item not found")
+    return record
+
+@router.post("/status", response_model=Dict)
+async def update_action_item_status(request: StatusUpdateRequest):
+    """
+    Set the status of several action items at once, across projects
+
+    Unknown ids are reported in `not_found` rather than failing the batch.
+    """
+    try:
+        return project_manager.update_action_items(request.ids, request.status)
+
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error updating action items: {str(e)}")
+
+@router.post("/promote", response_model=Dict)
+async def promote_action_items(request: PromoteRequest):
+    """
+    Promote AI-extracted action items of a session into project action items
+
+    Defaults to every suggestion of the session and to the session's
+    project; suggestions promoted before are skipped.
+    """
+    try:
+        record = session_index.get(request.session_id)
+        if record is None:
+            raise HTTPException(status_code=404, detail="Session not found")
+
+        with STORAGE_READ_SECONDS.time(router='action_items', operation='load'):
+            session_data = load_file(cold_store.resolve(record))
+
+        created = project_manager.promote_session_action_items(
+            session_data,
+            project_id=request.project_id,
+            descriptions=request.descriptions,
+            priority=request.priority
+        )
+
+        return {
+            'session_id': request.session_id,
+            'project_id': request.project_id or session_data.get('project_id'),
+            'promoted': created
+        }
+
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error promoting action items: {str(e)}")
@@ -0,0 +1,76 @@
+from fastapi import APIRouter, HTTPException, Query
+from typing import List, Dict, Optional
+
+from state import session_analytics
+
+router = APIRouter(prefix="/analytics", tags=["analytics"])
+
+@router.get("/messages-per-day", response_model=List[Dict])
+async def messages_per_day(
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    project: Optional[str] = None
+):
+    """
+    Sessions and messages captured per day
+    """
+    try:
+        return session_analytics.messages_per_day(since=since, until=until, project=project)
+    
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error computing analytics: {str(e)}")
+
+@router.get("/top-participants", response_model=List[Dict])
+async def top_participants(
+    limit: int = Query(10, ge=1, le=1000),
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    project: Optional[str] = None
+):
+    """
+    Participants ranked by number of sessions
+    """
+    try:
+        return session_analytics.top_participants(limit, since=since, until=until, project=project)
+    
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error computing analytics: {str(e)}")
+
+@router.get("/topics", response_model=List[Dict])
+async def topic_frequency(
+    limit: int = Query(20, ge=1, le=1000),
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    project: Optional[str] = None
+):
+    """
+    Topic frequency across AI insights
+    """
+    try:
+        return session_analytics.topic_frequency(limit, since=since, until=until, project=project)
+    
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error computing analytics: {str(e)}")
+
+@router.get("/session-length", response_model=Dict)
+async def session_length(
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    project: Optional[str] = None
+):
+    """
+    Average session length in messages and seconds
+    """
+    try:
+        return session_analytics.session_length(since=since, until=until, project=project)
+    
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error computing analytics: {str(e)}")
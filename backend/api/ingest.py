@@ -0,0 +1,134 @@
+from fastapi import APIRouter, Header, HTTPException, Request, WebSocket, WebSocketDisconnect
+from pydantic import BaseModel, ValidationError
+from typing import Dict, Optional
+
+from ingest import SessionNotOpen
+from serialization import loads
+from state import open_sessions
+
+router = APIRouter(prefix="/ingest", tags=["ingest"])
+
+class OpenSessionRequest(BaseModel):
+    session_key: Optional[str] = None
+    source: Optional[str] = None
+    project: Optional[str] = None
+    project_id: Optional[str] = None
+    insight_level: str = 'standard'
+    idempotency_key: Optional[str] = None
+
+@router.post("/sessions", response_model=Dict)
+async def open_session(
+    request: OpenSessionRequest,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
+):
+    """
+    Open a session for incremental ingestion
+
+    Retrying with the same idempotency key (`Idempotency-Key` header or body
+    field) returns the session opened by the first attempt; `open` is false
+    if that session has already been closed and stored.
+    """
+    options = request.model_dump()
+    options['idempotency_key'] = idempotency_key or options['idempotency_key']
+    session_id = await open_sessions.open(**options)
+    return {'session_id': session_id, 'open': session_id in open_sessions}
+
+@router.post("/sessions/{session_id}/messages", response_model=Dict)
+async def append_messages(session_id: str, request: Request):
+    """
+    Append messages to an open session
+
+    The body is line-delimited JSON (one message object per line); the
+    response is sent once the messages are durable.
+    """
+    body = await request.body()
+    try:
+        messages = [loads(line) for line in body.splitlines() if line.strip()]
+        total = await open_sessions.append(session_id, messages)
+    except SessionNotOpen:
+        raise HTTPException(status_code=404, detail="Open session not found")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid message: {str(e)}")
+
+    return {'session_id': session_id, 'accepted': len(messages), 'total_messages': total}
+
+@router.get("/sessions/{session_id}", response_model=Dict)
+async def get_open_session(session_id: str):
+    """
+    Retrieve the status of an open session
+    """
+    status = open_sessions.status(session_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Open session not found")
+    return status
+
+@router.post("/sessions/{session_id}/close", response_model=Dict)
+async def close_session(session_id: str):
+    """
+    Close an open session, enriching and archiving it
+    """
+    try:
+        return await open_sessions.close(session_id)
+    except SessionNotOpen:
+        raise HTTPException(status_code=404, detail="Open session not found")
+
+@router.websocket("/ws")
+async def ingest_websocket(websocket: WebSocket):
+    """
+    Stream a session over a WebSocket
+
+    The first frame opens the session (OpenSessionRequest fields) or resumes
+    one (`{"session_id": ...}`). Each following frame is a message object or
+    a list of them and is acknowledged with the running total once durable.
+    `{"type": "end"}` closes the session and returns the stored summary; a
+    dropped connection leaves the session open until its idle timeout.
+    Invalid frames get an `{"error": ...}` frame; an invalid first frame
+    also closes the socket with code 4400.
+    """
+    await websocket.accept()
+
+    try:
+        try:
+            first = loads(await websocket.receive_text())
+            session_id = first.get('session_id')
+            if session_id:
+                if session_id not in open_sessions:
+                    await websocket.close(code=4404, reason="Open session not found")
+                    return
+            else:
+                session_id = await open_sessions.open(**OpenSessionRequest(**first).model_dump())
+        except (ValueError, AttributeError, TypeError, ValidationError) as e:
+            await websocket.send_json({'error': f"Invalid open frame: {str(e)}"})
+            await websocket.close(code=4400, reason="Invalid open frame")
+            return
+        await websocket.send_json({'session_id': session_id})
+
+        while True:
+            try:
+                frame = loads(await websocket.receive_text())
+            except ValueError as e:
+                await websocket.send_json({'error': f"Invalid frame: {str(e)}"})
+                continue
+
+            if isinstance(frame, dict) and frame.get('type') == 'end':
+                session_data = await open_sessions.close(session_id)
+                await websocket.send_json({
+                    'closed': session_id,
+                    'total_messages': session_data['total_messages'],
+                    'participants': session_data['participants']
+                })
+                await websocket.close()
+                return
+
+            messages = frame if isinstance(frame, list) else [frame]
+            try:
+                total = await open_sessions.append(session_id, messages)
+            except (ValueError, TypeError, AttributeError) as e:
+                await websocket.send_json({'error': f"Invalid message: {str(e)}"})
+                continue
+            await websocket.send_json({'ack': len(messages), 'total_messages': total})
+
+    except WebSocketDisconnect:
+        pass
+    except SessionNotOpen:
+        await websocket.close(code=4404, reason="Session was closed")
@@ -1,40 +1,66 @@
 import os
-import json
-from fastapi import APIRouter, HTTPException
-from typing import List, Dict
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from typing import List, Dict, Optional
+
+from http_cache import PROJECT_CACHE_CONTROL, is_not_modified, not_modified_response, stat_validators
+from metrics import DIRECTORY_SCAN_SECONDS, STORAGE_READ_SECONDS
+from project_index import PROJECT_SUMMARY_FIELDS
+from project_stats import BUCKETS
+from serialization import load_file
+from shaping import parse_fields, project_fields
+from state import link_index, project_index, project_stats
+from storage import PROJECTS_PATH
 
 router = APIRouter(prefix="/projects", tags=["projects"])
 
-PROJECTS_PATH = '/root/clawd/projects/sessiontrack/project_data'
+# Fields of the default listing
+PROJECT_LIST_FIELDS = ('id', 'name', 'description', 'status', 'total_sessions', 'total_action_items')
+
+# Expansions resolved from the link and stats indexes rather than the project file
+PROJECT_EXPANSIONS = {'stats', 'linked_sessions'}
+
+def _expand(project_id: str, includes: List[str]) -> Dict:
+    """
+    Resolve requested expansions for a project
+    """
+    expanded = {}
+    if 'stats' in includes:
+        expanded['stats'] = project_stats.get_stats(project_id)
+    if 'linked_sessions' in includes:
+        _, expanded['linked_sessions'] = link_index.sessions_for_project(project_id)
+    return expanded
 
 @router.get("/", response_model=List[Dict])
-async def list_projects():
+async def list_projects(fields: Optional[str] = None, include: Optional[str] = None):
     """
     Retrieve list of projects
+    
+    `fields` selects the summary fields returned; `include` expands
+    `stats` or `linked_sessions` from the indexes. Answered from the project
+    index unless `fields` asks for fields outside PROJECT_SUMMARY_FIELDS.
     """
     try:
-        # Ensure projects directory exists
-        os.makedirs(PROJECTS_PATH, exist_ok=True)
+        wanted = parse_fields(fields)
+        includes = parse_fields(include) or []
         
-        # Get all JSON files in the projects directory
-        project_files = [f for f in os.listdir(PROJECTS_PATH) if f.endswith('.json')]
+        # Summaries come from the project index; project files are opened only
+        # for requested fields the index does not hold
+        with DIRECTORY_SCAN_SECONDS.time(directory='projects'):
+            summaries = project_index.summaries()
         
-        # Load project metadata
         projects = []
-        for filename in project_files:
-            filepath = os.path.join(PROJECTS_PATH, filename)
-            with open(filepath, 'r') as f:
-                project_data = json.load(f)
-                
-                # Prepare project summary
-                projects.append({
-                    'id': project_data.get('id'),
-                    'name': project_data.get('name'),
-                    'description': project_data.get('description', ''),
-                    'status': project_data.get('status', 'active'),
-                    'total_sessions': len(project_data.get('sessions', [])),
-                    'total_action_items': len(project_data.get('action_items', []))
-                })
+        for summary in summaries:
+            project_id = summary['id']
+            if wanted is None:
+                summary = {field: summary[field] for field in PROJECT_LIST_FIELDS}
+            elif not PROJECT_SUMMARY_FIELDS.issuperset(wanted):
+                with STORAGE_READ_SECONDS.time(router='projects', operation='load'):
+                    project_data = project_index.load(project_id) or {}
+                summary = project_fields({**project_data, **summary}, wanted)
+            else:
+                summary = project_fields(summary, wanted)
+            summary.update(_expand(project_id, includes))
+            projects.append(summary)
         
         return projects
     
@@ -42,9 +68,18 @@ async def list_projects():
         raise HTTPException(status_code=500, detail=f"Error retrieving projects: {str(e)}")
 
 @router.get("/{project_id}", response_model=Dict)
-async def get_project(project_id: str):
+async def get_project(
+    project_id: str,
+    request: Request,
+    response: Response,
+    fields: Optional[str] = None,
+    include: Optional[str] = None
+):
     """
     Retrieve full details of a specific project
+    
+    `fields` limits the returned fields (e.g. to skip the `sessions` and
+    `action_items` arrays); `include` expands `stats` or `linked_sessions`.
     """
     try:
         filepath = os.path.join(PROJECTS_PATH, f"{project_id}.json")
@@ -52,8 +87,76 @@ async def get_project(project_id: str):
         if not os.path.exists(filepath):
             raise HTTPException(status_code=404, detail="Project not found")
         
-        with open(filepath, 'r') as f:
-            return json.load(f)
+        # Conditional GET: answered from a stat call, without reading the file.
+        # Expansions come from other indexes, so those responses are not validated.
+        includes = parse_fields(include) or []
+        validators = {}
+        if not includes:
+            file_stat = os.stat(filepath)
+            validators = stat_validators(file_stat, variant=str(request.url.query))
+            if is_not_modified(request, validators, file_stat.st_mtime):
+                return not_modified_response(validators, PROJECT_CACHE_CONTROL)
+        
+        with STORAGE_READ_SECONDS.time(router='projects', operation='load'):
+            project_data = load_file(filepath)
+        
+        if fields is not None:
+            project_data = project_fields(project_data, parse_fields(fields))
+        project_data.update(_expand(project_id, includes))
+        
+        response.headers.update(validators)
+        response.headers['Cache-Control'] = PROJECT_CACHE_CONTROL
+        return project_data
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error retrieving project: {str(e)}")
+
+@router.get("/{project_id}/sessions", response_model=Dict)
+async def get_project_sessions(
+    project_id: str,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=500)
+):
+    """
+    Retrieve the sessions linked to a project (paginated, newest first)
+    """
+    try:
+        if not os.path.exists(os.path.join(PROJECTS_PATH, f"{project_id}.json")):
+            raise HTTPException(status_code=404, detail="Project not found")
+        
+        total, links = link_index.sessions_for_project(project_id, offset, limit)
+        
+        return {
+            'project_id': project_id,
+            'total': total,
+            'offset': offset,
+            'limit': limit,
+            'sessions': links
+        }
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error retrieving project sessions: {str(e)}")
+
+@router.get("/{project_id}/stats", response_model=Dict)
+async def get_project_stats(
+    project_id: str,
+    bucket: str = Query('day', pattern=f"^({'|'.join(BUCKETS)})$"),
+    since: Optional[str] = None
+):
+    """
+    Retrieve incrementally maintained statistics for a project
+    """
+    try:
+        if not os.path.exists(os.path.join(PROJECTS_PATH, f"{project_id}.json")):
+            raise HTTPException(status_code=404, detail="Project not found")
+        
+        return project_stats.get_stats(project_id, bucket=bucket, since=since)
     
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error retrieving project: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error retrieving project stats: {str(e)}")
@@ -1,60 +1,167 @@
 import os
-import json
-from fastapi import APIRouter, HTTPException
-from typing import List, Dict
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse
+from typing import List, Dict, Optional
+
+from http_cache import (
+    LISTING_CACHE_CONTROL, SESSION_CACHE_CONTROL,
+    accepts_encoding, is_not_modified, not_modified_response, stat_validators
+)
+from metrics import DIRECTORY_SCAN_SECONDS, STORAGE_READ_SECONDS
+from shaping import parse_fields, project_fields
+from serialization import load_file
+from session_index import INDEX_FIELDS
+from state import cold_store, link_index, session_index
+from storage import SESSIONS_ARCHIVE, gzip_variant
 
 router = APIRouter(prefix="/sessions", tags=["sessions"])
 
-SESSIONS_ARCHIVE = '/root/clawd/sessions_archive'
+# Fields returned by the session listing when no `fields` are requested
+DEFAULT_LIST_FIELDS = ['id', 'timestamp', 'project', 'participants', 'total_messages', 'ai_insights']
+
+# Expansions that are resolved from other indexes rather than the session file
+SESSION_EXPANSIONS = {'projects'}
+
+def _session_path(session_id: str) -> Optional[str]:
+    """
+    Resolve a session id to its file path (index lookup, archive scan as fallback)
+    
+    Cold sessions are rehydrated from their segment on first access.
+    """
+    record = session_index.get(session_id)
+    if record:
+        with STORAGE_READ_SECONDS.time(router='sessions', operation='resolve'):
+            return cold_store.resolve(record)
+    
+    with DIRECTORY_SCAN_SECONDS.time(directory='sessions'):
+        for filename in os.listdir(SESSIONS_ARCHIVE):
+            if session_id in filename and filename.endswith('.json'):
+                return os.path.join(SESSIONS_ARCHIVE, filename)
+    
+    return None
 
 @router.get("/", response_model=List[Dict])
-async def list_sessions():
+async def list_sessions(
+    request: Request,
+    response: Response,
+    fields: Optional[str] = None,
+    include: Optional[str] = None,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=500)
+):
     """
     Retrieve list of captured sessions
+    
+    `fields` selects the returned fields; fields held in the session index
+    are served without opening session files. `include` expands extra data
+    (`projects`, or session file fields such as `messages`).
     """
     try:
-        # Get all JSON files in the sessions archive
-        session_files = [f for f in os.listdir(SESSIONS_ARCHIVE) if f.endswith('.json')]
+        # Every capture appends to the index log, so its stat is the validator
+        # (the log only goes missing while a first start builds the index)
+        validators = {}
+        if os.path.exists(session_index.log_path):
+            index_stat = os.stat(session_index.log_path)
+            validators = stat_validators(index_stat, variant=str(request.url.query))
+            if is_not_modified(request, validators, index_stat.st_mtime):
+                return not_modified_response(validators, LISTING_CACHE_CONTROL)
         
-        # Sort files by timestamp (newest first)
-        session_files.sort(reverse=True)
+        wanted = (parse_fields(fields) or DEFAULT_LIST_FIELDS) + (parse_fields(include) or [])
+        file_fields = [f for f in wanted if f not in INDEX_FIELDS and f not in SESSION_EXPANSIONS]
         
-        # Load session metadata
+        # Load session metadata from the index (newest first)
         sessions = []
-        for filename in session_files[:50]:  # Limit to last 50 sessions
-            filepath = os.path.join(SESSIONS_ARCHIVE, filename)
-            with open(filepath, 'r') as f:
-                session_data = json.load(f)
-                
-                # Prepare session summary
-                sessions.append({
-                    'id': session_data.get('id'),
-                    'timestamp': session_data.get('timestamp'),
-                    'project': session_data.get('project'),
-                    'participants': session_data.get('participants', []),
-                    'total_messages': session_data.get('total_messages', 0),
-                    'ai_insights': session_data.get('ai_insights', {})
-                })
+        for record in session_index.recent(offset, limit):
+            row = project_fields(record, [f for f in wanted if f in INDEX_FIELDS])
+            
+            if file_fields:
+                with STORAGE_READ_SECONDS.time(router='sessions', operation='load'):
+                    session_data = load_file(cold_store.resolve(record))
+                row.update(project_fields(session_data, file_fields))
+            
+            if 'projects' in wanted:
+                row['projects'] = link_index.projects_for_session(record['id'])
+            
+            sessions.append({name: row[name] for name in wanted})
         
+        response.headers.update(validators)
+        response.headers['Cache-Control'] = LISTING_CACHE_CONTROL
         return sessions
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving sessions: {str(e)}")
 
 @router.get("/{session_id}", response_model=Dict)
-async def get_session(session_id: str):
+async def get_session(
+    session_id: str,
+    request: Request,
+    fields: Optional[str] = None,
+    include: Optional[str] = None
+):
     """
     Retrieve full details of a specific session
+    
+    Without `fields`/`include` the stored file is streamed unchanged;
+    projections fall back to parsing it.
     """
     try:
         # Find the session file
-        for filename in os.listdir(SESSIONS_ARCHIVE):
-            if session_id in filename and filename.endswith('.json'):
-                filepath = os.path.join(SESSIONS_ARCHIVE, filename)
-                with open(filepath, 'r') as f:
-                    return json.load(f)
+        filepath = await run_in_threadpool(_session_path, session_id)
+        if filepath is None:
+            raise HTTPException(status_code=404, detail="Session not found")
+        
+        if fields is not None or include is not None:
+            with STORAGE_READ_SECONDS.time(router='sessions', operation='load'):
+                session_data = load_file(filepath)
+            
+            includes = parse_fields(include) or []
+            session = project_fields(session_data, parse_fields(fields)) if fields is not None else session_data
+            if 'projects' in includes:
+                session['projects'] = link_index.projects_for_session(session_id)
+            for name in includes:
+                if name not in SESSION_EXPANSIONS:
+                    session[name] = session_data.get(name)
+            
+            return session
+        
+        # Serve the stored bytes as-is (pre-compressed when the client accepts gzip)
+        use_gzip = accepts_encoding(request.headers.get('accept-encoding', ''), 'gzip')
         
+        # Conditional GET: answered from a stat call, without reading the file
+        file_stat = os.stat(filepath)
+        validators = stat_validators(file_stat, variant='gzip' if use_gzip else '')
+        if is_not_modified(request, validators, file_stat.st_mtime):
+            return not_modified_response(validators, SESSION_CACHE_CONTROL)
+        
+        headers = {**validators, 'Cache-Control': SESSION_CACHE_CONTROL, 'Vary': 'Accept-Encoding'}
+        if use_gzip:
+            with STORAGE_READ_SECONDS.time(router='sessions', operation='gzip'):
+                filepath = await run_in_threadpool(gzip_variant, filepath)
+            headers['Content-Encoding'] = 'gzip'
+        
+        return FileResponse(filepath, media_type='application/json', headers=headers)
+    
+    except HTTPException:
+        raise
+    except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Session not found")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error retrieving session: {str(e)}")
+
+@router.get("/{session_id}/projects", response_model=List[Dict])
+async def get_session_projects(session_id: str):
+    """
+    Retrieve the projects a session is linked to
+    """
+    try:
+        # Unindexed sessions fall back to the archive scan, as in get_session
+        if session_index.get(session_id) is None and await run_in_threadpool(_session_path, session_id) is None:
+            raise HTTPException(status_code=404, detail="Session not found")
+        
+        return link_index.projects_for_session(session_id)
     
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error retrieving session: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error retrieving session projects: {str(e)}")
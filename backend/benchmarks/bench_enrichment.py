@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Benchmark AI insight generation through the model provider interface
+
+Generates insights for synthetic conversations with the offline local
+provider and with the fake latency-bound model (wrapped as a Gemini-style
+provider), one call at a time and as concurrent batches
+(`generate_insights_many`). Reports insights/sec, p50/p99 latency,
+the tokens each provider reported against the 1.3x word estimate of the
+uncompressed prompts, and the tokens prompt compression removed.
+
+Usage:
+    python benchmarks/bench_enrichment.py [--sessions 500] [--messages 5:50] [--concurrency 8] [--ai-latency 0.02]
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+from datetime import datetime, timezone
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_suite import _summary, git_commit
+from synthetic import FakeModel, make_messages, parse_range
+
+async def measure_provider(provider, conversations: List[str], args) -> Dict:
+    from model_providers import estimate_tokens
+    from session_capture import AIInsightGenerator, TokenManager
+
+    provider.max_concurrency = args.concurrency
+    generator = AIInsightGenerator(TokenManager(float('inf')), provider=provider)
+
+    samples = []
+    start = time.perf_counter()
+    for conversation in conversations:
+        call_start = time.perf_counter()
+        await generator.generate_insights(conversation, args.insight_level)
+        samples.append(time.perf_counter() - call_start)
+    sequential = _summary(samples, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    insights = await generator.generate_insights_many(conversations, args.insight_level)
+    wall = time.perf_counter() - start
+
+    usages = [item['usage'] for item in insights if 'usage' in item]
+    reported = sum(usage['input_tokens'] for usage in usages)
+    estimated = sum(estimate_tokens(generator.build_prompt(c, args.insight_level)) for c in conversations)
+    compression = [item['prompt_compression'] for item in insights if 'prompt_compression' in item]
+    return {
+        'sequential': sequential,
+        'batched': {'ops': len(insights), 'ops_per_sec': len(insights) / wall if wall else None},
+        'failed': len(insights) - len(usages),
+        'input_tokens': reported,
+        'output_tokens': sum(usage['output_tokens'] for usage in usages),
+        'input_tokens_estimate': estimated,
+        'usage_estimated': any(usage['estimated'] for usage in usages),
+        'prompt_tokens_saved': sum(stats['tokens_saved'] for stats in compression),
+        'messages_dropped': sum(stats['messages_dropped'] for stats in compression),
+        'cost': sum(usage['cost'] for usage in usages)
+    }
+
+def run(args) -> Dict:
+    from model_providers import GeminiProvider, LocalProvider
+
+    rng = random.Random(args.seed)
+    conversations = [
+        '\n'.join(f"{m['author']}: {m['content']}" for m in make_messages(rng, rng.randint(*parse_range(args.messages)), datetime.now(timezone.utc)))
+        for _ in range(args.sessions)
+    ]
+
+    return {
+        'commit': git_commit(),
+        'config': {
+            'sessions': args.sessions,
+            'messages': args.messages,
+            'concurrency': args.concurrency,
+            'ai_latency': args.ai_latency,
+            'insight_level': args.insight_level
+        },
+        'providers': {
+            'local': asyncio.run(measure_provider(LocalProvider(), conversations, args)),
+            'fake_model': asyncio.run(measure_provider(GeminiProvider(model=FakeModel(args.ai_latency)), conversations, args))
+        }
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='SessionTrack insight generation benchmark')
+    parser.add_argument('--sessions', type=int, default=500, help='Conversations to enrich')
+    parser.add_argument('--messages', default='5:50', help='Messages per conversation (N or MIN:MAX)')
+    parser.add_argument('--concurrency', type=int, default=8, help='Provider max_concurrency for batches')
+    parser.add_argument('--ai-latency', type=float, default=0.02, help='Fake AI model latency in seconds')
+    parser.add_argument('--insight-level', default='standard', help='Insight level')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed')
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    args = parser.parse_args()
+
+    output = json.dumps(run(args), indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    print(output)
+
+if __name__ == '__main__':
+    main()
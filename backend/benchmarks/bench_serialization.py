@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Benchmark JSON encode/decode of large sessions across serialization backends
+
+Usage:
+    python benchmarks/bench_serialization.py [--messages 5000] [--repeat 20] [--output results.json]
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import argparse
+import statistics
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import serialization
+
+def make_session(message_count: int) -> dict:
+    """
+    Build a synthetic session with the archive's structure
+    """
+    messages = [
+        {
+            'author': f"user{i % 7}",
+            'content': f"Message {i} about the SessionTrack project, with some detail " * 4,
+            'timestamp': datetime.now(timezone.utc).isoformat()
+        }
+        for i in range(message_count)
+    ]
+    return {
+        'id': str(uuid.uuid4()),
+        'session_key': 'bench:serialization',
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'project': 'SessionTrack',
+        'total_messages': message_count,
+        'participants': sorted({msg['author'] for msg in messages}),
+        'messages': messages,
+        'ai_insights': {'summary': 'Benchmark session ' * 50, 'topics': ['ai'], 'action_items': []}
+    }
+
+def _time(func, repeat: int) -> dict:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return {
+        'median_ms': statistics.median(samples) * 1000,
+        'min_ms': min(samples) * 1000
+    }
+
+def run(message_count: int, repeat: int) -> dict:
+    """
+    Compare stdlib json against the selected serialization backend
+    """
+    session = make_session(message_count)
+    stored = json.dumps(session, indent=2).encode()
+
+    return {
+        'backend': serialization.BACKEND,
+        'messages': message_count,
+        'document_bytes': len(stored),
+        'results': {
+            'stdlib_encode_indent': _time(lambda: json.dumps(session, indent=2), repeat),
+            'stdlib_decode': _time(lambda: json.loads(stored), repeat),
+            'backend_encode_indent': _time(lambda: serialization.dumps(session, indent=True), repeat),
+            'backend_encode_compact': _time(lambda: serialization.dumps(session), repeat),
+            'backend_decode': _time(lambda: serialization.loads(stored), repeat)
+        }
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='SessionTrack serialization benchmark')
+    parser.add_argument('--messages', type=int, default=5000, help='Messages per session')
+    parser.add_argument('--repeat', type=int, default=20, help='Repetitions per measurement')
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    args = parser.parse_args()
+
+    results = run(args.messages, args.repeat)
+    output = json.dumps(results, indent=2)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    print(output)
+
+if __name__ == '__main__':
+    main()
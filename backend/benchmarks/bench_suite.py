@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Benchmark capture, listing, lookup and project mutation on a synthetic archive
+
+Every run builds a fresh archive in a temporary directory (or reuses
+--archive), then measures API startup (import, serving, ready) in a fresh
+process and each operation, and reports ops/sec, p50/p99 latency, peak
+RSS and bytes on disk as JSON. Pass --compare with an
+earlier result file to print the change per benchmark.
+
+Usage:
+    python benchmarks/bench_suite.py [--sessions 1000] [--messages 5:50] [--ops 200]
+        [--ai-latency 0.02] [--output results.json] [--compare baseline.json]
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import resource
+import platform
+import tempfile
+import subprocess
+from datetime import datetime, timezone
+from typing import Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthetic import FakeModel, disk_usage, generate_archive, make_messages, parse_range
+
+def _percentile(samples: List[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+def _summary(samples: List[float], wall: float) -> Dict:
+    return {
+        'ops': len(samples),
+        'ops_per_sec': len(samples) / wall if wall else None,
+        'p50_ms': _percentile(samples, 0.50) * 1000,
+        'p99_ms': _percentile(samples, 0.99) * 1000
+    }
+
+def measure(func: Callable[[int], object], ops: int) -> Dict:
+    """
+    Time `ops` sequential calls of func(i)
+    """
+    samples = []
+    start = time.perf_counter()
+    for i in range(ops):
+        op_start = time.perf_counter()
+        func(i)
+        samples.append(time.perf_counter() - op_start)
+    return _summary(samples, time.perf_counter() - start)
+
+async def measure_async(func: Callable[[int], object], ops: int, concurrency: int = 1) -> Dict:
+    """
+    Time `ops` calls of the coroutine function func(i), `concurrency` at a time
+    """
+    samples = []
+    limit = asyncio.Semaphore(concurrency)
+
+    async def timed(i: int):
+        async with limit:
+            op_start = time.perf_counter()
+            await func(i)
+            samples.append(time.perf_counter() - op_start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(timed(i) for i in range(ops)))
+    return _summary(samples, time.perf_counter() - start)
+
+# Runs in a fresh interpreter: time to import the app, to accept requests
+# (lifespan started) and until /ready reports warm indexes
+STARTUP_SCRIPT = """
+import json, time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(main.app) as client:
+    serving = time.perf_counter()
+    while client.get('/ready').status_code != 200:
+        time.sleep(0.005)
+    ready = time.perf_counter()
+print(json.dumps({
+    'import_seconds': imported - start,
+    'serving_seconds': serving - start,
+    'ready_seconds': ready - start
+}))
+"""
+
+def measure_startup() -> Dict:
+    """
+    Cold start of the API against the configured archive
+    """
+    result = subprocess.run(
+        [sys.executable, '-c', STARTUP_SCRIPT],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def peak_rss_bytes() -> int:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if platform.system() == 'Darwin' else rss * 1024
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+def run(args) -> Dict:
+    """
+    Build the archive and run every benchmark
+    """
+    # Storage paths are read at import time: configure them before importing the app
+    root = args.archive or tempfile.mkdtemp(prefix='sessiontrack-bench-')
+    os.environ['SESSIONS_PATH'] = os.path.join(root, 'sessions')
+    os.environ['PROJECTS_PATH'] = os.path.join(root, 'projects')
+    os.environ.setdefault('RETENTION_INTERVAL', '3600')
+
+    messages = parse_range(args.messages)
+    start = time.perf_counter()
+    if args.archive and os.path.isdir(os.environ['SESSIONS_PATH']):
+        from session_index import SessionIndex
+        from storage import PROJECTS_PATH
+        generated = {
+            'session_ids': [record['id'] for record in SessionIndex()],
+            'project_ids': [name[:-5] for name in os.listdir(PROJECTS_PATH) if name.endswith('.json')]
+        }
+    else:
+        generated = generate_archive(args.sessions, messages, args.projects, seed=args.seed)
+    generate_seconds = time.perf_counter() - start
+    startup = measure_startup()
+
+    from fastapi.testclient import TestClient
+
+    import main
+    import state
+
+    rng = random.Random(args.seed)
+    session_ids, project_ids = generated['session_ids'], generated['project_ids']
+    capture = state.session_capture
+    capture.ai_insight_generator.ai_model = FakeModel(args.ai_latency)
+    capture.token_manager.monthly_budget = float('inf')
+    results = {}
+
+    async def capture_one(i: int):
+        await capture.capture_session(
+            make_messages(rng, rng.randint(*messages), datetime.now(timezone.utc)),
+            session_key=f"bench:capture:{i}",
+            project_id=rng.choice(project_ids) if project_ids else None
+        )
+
+    results['capture_session'] = asyncio.run(measure_async(capture_one, args.ops))
+    results['capture_session_concurrent'] = asyncio.run(measure_async(capture_one, args.ops, args.concurrency))
+
+    with TestClient(main.app) as client:
+        results['list_sessions'] = measure(
+            lambda i: client.get('/sessions/', params={'offset': rng.randint(0, 500), 'limit': 50}).raise_for_status(),
+            args.ops
+        )
+        results['get_session'] = measure(
+            lambda i: client.get(f"/sessions/{rng.choice(session_ids)}").raise_for_status(),
+            args.ops
+        )
+
+    project_manager = state.project_manager
+    results['list_projects'] = measure(lambda i: project_manager.list_projects(), max(args.ops // 10, 1))
+    results['add_action_item'] = measure(
+        lambda i: project_manager.add_action_item(rng.choice(project_ids), f"Benchmark action {i}", 'medium'),
+        args.ops
+    )
+
+    return {
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'config': {
+            'sessions': len(session_ids),
+            'messages': args.messages,
+            'projects': len(project_ids),
+            'ops': args.ops,
+            'concurrency': args.concurrency,
+            'ai_latency': args.ai_latency,
+            'seed': args.seed
+        },
+        'archive_generation_seconds': generate_seconds,
+        'startup': startup,
+        'bytes_on_disk': disk_usage(root),
+        'peak_rss_bytes': peak_rss_bytes(),
+        'results': results
+    }
+
+def compare(current: Dict, baseline: Dict) -> List[str]:
+    """
+    Describe the change of every benchmark against a baseline result
+    """
+    lines = [f"Comparing {current['commit']} against {baseline.get('commit', 'baseline')}"]
+    for name, result in current['results'].items():
+        before = baseline.get('results', {}).get(name)
+        if not before:
+            lines.append(f"  {name}: no baseline")
+            continue
+        ratio = result['ops_per_sec'] / before['ops_per_sec'] if before.get('ops_per_sec') else float('nan')
+        lines.append(
+            f"  {name}: {result['ops_per_sec']:.1f} ops/s ({ratio:.2f}x), "
+            f"p50 {before['p50_ms']:.2f} -> {result['p50_ms']:.2f} ms, "
+            f"p99 {before['p99_ms']:.2f} -> {result['p99_ms']:.2f} ms"
+        )
+    for key, seconds in current.get('startup', {}).items():
+        before = baseline.get('startup', {}).get(key)
+        if before is not None:
+            lines.append(f"  startup {key}: {before:.3f} -> {seconds:.3f}")
+    for key in ('peak_rss_bytes', 'bytes_on_disk'):
+        if key in baseline:
+            lines.append(f"  {key}: {baseline[key]} -> {current[key]}")
+    return lines
+
+def main():
+    parser = argparse.ArgumentParser(description='SessionTrack benchmark suite')
+    parser.add_argument('--sessions', type=int, default=1000, help='Sessions in the synthetic archive (10^3-10^6)')
+    parser.add_argument('--messages', default='5:50', help='Messages per session (N or MIN:MAX)')
+    parser.add_argument('--projects', type=int, default=20, help='Projects in the synthetic archive')
+    parser.add_argument('--ops', type=int, default=200, help='Operations per benchmark')
+    parser.add_argument('--concurrency', type=int, default=32, help='Concurrent captures in capture_session_concurrent')
+    parser.add_argument('--ai-latency', type=float, default=0.02, help='Fake AI model latency in seconds')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed')
+    parser.add_argument('--archive', help='Reuse (or create) the archive in this directory')
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    parser.add_argument('--compare', help='Baseline results JSON to compare against')
+    args = parser.parse_args()
+
+    results = run(args)
+    output = json.dumps(results, indent=2)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    print(output)
+
+    if args.compare:
+        with open(args.compare) as f:
+            print('\n'.join(compare(results, json.load(f))), file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
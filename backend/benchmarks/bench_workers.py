@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Check consistency and throughput of the API running with several workers
+
+Builds a synthetic archive, then starts uvicorn with 1 and with --workers
+processes against it and drives streaming ingestion (open, append, close)
+plus reads over connections that are not reused, so requests spread over
+the workers. After each run it checks that every worker sees every
+session, that message counts survive appends landing on different
+workers, that concurrent opens with one idempotency key yield one
+session, that project links and stats agree and that event ids are
+unique. Shared project writes and the token ledger are checked from
+several processes directly. Prints the results as JSON; exits non-zero
+if a check fails.
+
+Usage:
+    python benchmarks/bench_workers.py [--workers 4] [--sessions 1000] [--ops 200] [--concurrency 16]
+"""
+import os
+import sys
+import json
+import time
+import socket
+import random
+import asyncio
+import argparse
+import tempfile
+import subprocess
+import multiprocessing
+from datetime import datetime, timezone
+from typing import Dict, List
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_suite import _summary, git_commit
+from synthetic import generate_archive, make_messages
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def start_server(workers: int, env: Dict) -> (subprocess.Popen, str):
+    """
+    Start uvicorn with `workers` processes and wait until every one is ready
+    """
+    port = _free_port()
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'main:app', '--port', str(port), '--workers', str(workers), '--log-level', 'warning'],
+        cwd=BACKEND, env=env
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 120
+    consecutive = 0
+    while consecutive < 10 * workers:
+        if time.time() > deadline or process.poll() is not None:
+            process.kill()
+            raise RuntimeError(f"API with {workers} workers did not become ready")
+        try:
+            ready = httpx.get(f"{base_url}/ready", timeout=5).status_code == 200
+        except httpx.HTTPError:
+            ready = False
+        consecutive = consecutive + 1 if ready else 0
+        if not ready:
+            time.sleep(0.1)
+    return process, base_url
+
+def stop_server(process: subprocess.Popen):
+    process.terminate()
+    try:
+        process.wait(30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+async def drive(base_url: str, project_ids: List[str], session_ids: List[str], args) -> Dict:
+    """
+    Ingest sessions and read archived ones concurrently, then check consistency
+    """
+    # Seeded per run: identical content would be deduplicated against the previous run
+    rng = random.Random(f"{args.seed}:{base_url}")
+    # No keep-alive: every request opens a connection, landing on any worker
+    client = httpx.AsyncClient(base_url=base_url, timeout=60, limits=httpx.Limits(max_keepalive_connections=0))
+    limit = asyncio.Semaphore(args.concurrency)
+    ingested: Dict[str, Dict] = {}
+    ingest_samples, read_samples = [], []
+
+    async def ingest_one(i: int):
+        async with limit:
+            start = time.perf_counter()
+            project_id = rng.choice(project_ids)
+            opened = (await client.post('/ingest/sessions', json={
+                'session_key': f"bench:workers:{i}", 'project_id': project_id, 'insight_level': 'minimal'
+            })).raise_for_status().json()
+            session_id = opened['session_id']
+            sent = 0
+            for _ in range(3):
+                messages = make_messages(rng, rng.randint(1, 5), datetime.now(timezone.utc))
+                body = '\n'.join(json.dumps(message) for message in messages)
+                (await client.post(f"/ingest/sessions/{session_id}/messages", content=body)).raise_for_status()
+                sent += len(messages)
+            closed = (await client.post(f"/ingest/sessions/{session_id}/close")).raise_for_status().json()
+            ingested[closed['id']] = {'sent': sent, 'stored': closed['total_messages'], 'project_id': project_id}
+            ingest_samples.append(time.perf_counter() - start)
+
+    async def read_one(i: int):
+        async with limit:
+            start = time.perf_counter()
+            (await client.get(f"/sessions/{rng.choice(session_ids)}")).raise_for_status()
+            read_samples.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(ingest_one(i) for i in range(args.ops)), *(read_one(i) for i in range(args.ops)))
+    wall = time.perf_counter() - start
+
+    # Consistency: every worker sees every ingested session, message counts match
+    missing = 0
+    for session_id in ingested:
+        for _ in range(3):
+            if (await client.get(f"/sessions/{session_id}")).status_code != 200:
+                missing += 1
+                break
+    miscounted = sum(1 for entry in ingested.values() if entry['sent'] != entry['stored'])
+
+    # Concurrent opens with one idempotency key open one session
+    key = f"bench-workers-{time.time_ns()}"
+    opened = await asyncio.gather(*(
+        client.post('/ingest/sessions', json={'session_key': 'bench:idempotent'}, headers={'Idempotency-Key': key})
+        for _ in range(args.concurrency)
+    ))
+    idempotent_ids = {response.raise_for_status().json()['session_id'] for response in opened}
+    (await client.post(f"/ingest/sessions/{idempotent_ids.pop()}/close")).raise_for_status()
+
+    # Project links and incrementally maintained stats agree
+    mismatched_projects = []
+    for project_id in project_ids:
+        links = (await client.get(f"/projects/{project_id}/sessions", params={'limit': 1})).raise_for_status().json()
+        stats = (await client.get(f"/projects/{project_id}/stats")).raise_for_status().json()
+        if links['total'] != stats['total_sessions']:
+            mismatched_projects.append(project_id)
+
+    await client.aclose()
+    return {
+        'wall_seconds': wall,
+        'ingest': _summary(ingest_samples, wall),
+        'read': _summary(read_samples, wall),
+        'checks': {
+            'sessions_missing': missing,
+            'message_counts_wrong': miscounted,
+            'idempotent_open_extra_sessions': len(idempotent_ids),
+            'projects_links_stats_mismatch': len(mismatched_projects)
+        }
+    }
+
+def check_event_ids(index_path: str) -> Dict:
+    """
+    Event ids in the shared log must be unique and increasing
+    """
+    ids = []
+    for path in (os.path.join(index_path, 'events.jsonl.1'), os.path.join(index_path, 'events.jsonl')):
+        if os.path.exists(path):
+            with open(path) as f:
+                ids.extend(json.loads(line)['id'] for line in f if line.strip())
+    return {'events': len(ids), 'event_ids_out_of_order': sum(1 for a, b in zip(ids, ids[1:]) if b != a + 1)}
+
+def _shared_writes(project_id: str, items: int, seed: int):
+    from project_manager import ProjectManager
+    from token_ledger import TokenLedger
+
+    manager, ledger = ProjectManager(), TokenLedger()
+    for i in range(items):
+        manager.add_action_item(project_id, f"Worker {seed} item {i}", 'low')
+        ledger.record(0.001, 10, 5)
+
+def check_shared_writes(project_id: str, processes: int, items: int) -> Dict:
+    """
+    Add action items and ledger entries from several processes at once
+    """
+    from project_manager import ProjectManager
+    from token_ledger import TokenLedger
+
+    manager, ledger = ProjectManager(), TokenLedger()
+    before_items = len(manager.get_project(project_id)['action_items'])
+    before_stats = manager.stats.get_stats(project_id)['total_action_items']
+    before_calls = ledger.usage()['calls']
+
+    context = multiprocessing.get_context('fork')
+    workers = [context.Process(target=_shared_writes, args=(project_id, items, i)) for i in range(processes)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    expected = processes * items
+    action_items = len(manager.get_project(project_id)['action_items']) - before_items
+    stats_items = manager.stats.get_stats(project_id)['total_action_items'] - before_stats
+    return {
+        'action_items_lost': expected - action_items,
+        'action_item_stats_lost': expected - stats_items,
+        'ledger_calls_lost': expected - (ledger.usage()['calls'] - before_calls)
+    }
+
+def run(args) -> Dict:
+    root = tempfile.mkdtemp(prefix='sessiontrack-workers-')
+    env = dict(
+        os.environ,
+        SESSIONS_PATH=os.path.join(root, 'sessions'),
+        PROJECTS_PATH=os.path.join(root, 'projects'),
+        RETENTION_INTERVAL='3600',
+        INGEST_IDLE_TIMEOUT='3600'
+    )
+    os.environ.update(env)
+    generated = generate_archive(args.sessions, (5, 20), args.projects, seed=args.seed)
+
+    runs = {}
+    for workers in sorted({1, args.workers}):
+        process, base_url = start_server(workers, env)
+        try:
+            runs[str(workers)] = asyncio.run(drive(base_url, generated['project_ids'], generated['session_ids'], args))
+        finally:
+            stop_server(process)
+
+    from storage import INDEX_PATH
+    shared = check_shared_writes(generated['project_ids'][0], args.workers, args.shared_items)
+    events = check_event_ids(INDEX_PATH)
+
+    single, multi = runs['1'], runs[str(args.workers)]
+    return {
+        'commit': git_commit(),
+        'config': {
+            'workers': args.workers,
+            'sessions': args.sessions,
+            'projects': args.projects,
+            'ops': args.ops,
+            'concurrency': args.concurrency
+        },
+        'runs': runs,
+        'ingest_speedup': multi['ingest']['ops_per_sec'] / single['ingest']['ops_per_sec'],
+        'checks': {**multi['checks'], **shared, **events}
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='SessionTrack multi-worker consistency and throughput check')
+    parser.add_argument('--workers', type=int, default=4, help='Worker processes to compare against one')
+    parser.add_argument('--sessions', type=int, default=1000, help='Sessions in the synthetic archive')
+    parser.add_argument('--projects', type=int, default=10, help='Projects in the synthetic archive')
+    parser.add_argument('--ops', type=int, default=200, help='Sessions ingested (and archived sessions read) per run')
+    parser.add_argument('--concurrency', type=int, default=16, help='Concurrent requests')
+    parser.add_argument('--shared-items', type=int, default=50, help='Action items and ledger entries per process')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed')
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    args = parser.parse_args()
+
+    results = run(args)
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    print(output)
+
+    failed = {name: value for name, value in results['checks'].items() if name != 'events' and value}
+    if failed:
+        print(f"Consistency checks failed: {failed}", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
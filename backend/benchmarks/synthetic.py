@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Synthetic archives and a fake AI model for benchmarks
+
+Usage:
+    python benchmarks/synthetic.py DIR [--sessions 100000] [--messages 5:50] [--projects 50]
+"""
+import os
+import sys
+import uuid
+import random
+import asyncio
+import argparse
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+AUTHORS = ['Boone', 'TARS', 'Ada', 'Grace', 'Linus', 'Margaret', 'Ken']
+WORDS = (
+    'project session capture insight automation strategy development technology '
+    'deadline review deploy index archive budget token summary should need to next step'
+).split()
+
+class FakeResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+class FakeModel:
+    """
+    Stand-in for a generative model with a fixed response latency
+    """
+    def __init__(self, latency: float = 0.05, response_words: int = 120):
+        """
+        Initialize FakeModel
+
+        Args:
+            latency: Seconds each call takes
+            response_words: Length of the generated text
+        """
+        self.latency = latency
+        self.response_words = response_words
+        self.calls = 0
+
+    async def generate_content_async(self, prompt: str, **options) -> FakeResponse:
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        rng = random.Random(len(prompt))
+        lines = [' '.join(rng.choices(WORDS, k=12)) for _ in range(max(self.response_words // 12, 1))]
+        return FakeResponse('\n'.join(lines))
+
+def parse_range(value: str) -> Tuple[int, int]:
+    """
+    Parse "N" or "MIN:MAX" into an inclusive range
+    """
+    low, _, high = value.partition(':')
+    return int(low), int(high or low)
+
+def make_messages(rng: random.Random, count: int, start: datetime) -> List[Dict]:
+    """
+    Build a synthetic conversation
+    """
+    return [
+        {
+            'author': rng.choice(AUTHORS),
+            'content': ' '.join(rng.choices(WORDS, k=rng.randint(5, 40))),
+            'timestamp': (start + timedelta(seconds=30 * i)).isoformat()
+        }
+        for i in range(count)
+    ]
+
+def generate_archive(
+    sessions: int,
+    messages: Tuple[int, int] = (5, 50),
+    projects: int = 20,
+    action_items: int = 10,
+    days: int = 365,
+    seed: int = 42
+) -> Dict:
+    """
+    Populate the configured archive (SESSIONS_PATH/PROJECTS_PATH) with synthetic data
+
+    Session files, the session index, projects, action items and links are
+    written through the same storage layer as the application, so the
+    result is indistinguishable from a real archive.
+
+    Args:
+        sessions: Number of sessions
+        messages: Inclusive range of messages per session
+        projects: Number of projects
+        action_items: Action items per project
+        days: Sessions are spread over this many past days
+        seed: Random seed (same seed, same archive)
+
+    Returns:
+        Summary ({'session_ids', 'project_ids'})
+    """
+    from models import ActionItem, Project
+    from project_manager import ProjectManager
+    from serialization import dump_file
+    from session_index import SessionIndex
+    from storage import SESSIONS_ARCHIVE, session_filename
+
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    os.makedirs(SESSIONS_ARCHIVE, exist_ok=True)
+    session_index = SessionIndex()
+    project_manager = ProjectManager()
+
+    project_ids = []
+    for i in range(projects):
+        project = Project(
+            name=f"Project {i}",
+            description=f"Synthetic project {i}",
+            tags=rng.sample(WORDS, 3),
+            action_items=[
+                ActionItem(description=' '.join(rng.choices(WORDS, k=8)), priority=rng.choice(['low', 'medium', 'high']))
+                for _ in range(action_items)
+            ]
+        )
+        dump_file(os.path.join(project_manager.base_path, f"{project.id}.json"), project.to_dict())
+        project_ids.append(project.id)
+
+    session_ids, batch, links = [], [], {}
+    for i in range(sessions):
+        timestamp = now - timedelta(seconds=rng.randint(0, days * 86400))
+        session_messages = make_messages(rng, rng.randint(*messages), timestamp)
+        project_id = rng.choice(project_ids) if project_ids and rng.random() < 0.5 else None
+        session_data = {
+            'id': str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+            'session_key': f"bench:{i}",
+            'timestamp': timestamp.isoformat(),
+            'source': rng.choice(['webchat', 'cli', 'gateway']),
+            'project': None,
+            'project_id': project_id,
+            'total_messages': len(session_messages),
+            'participants': list(dict.fromkeys(msg['author'] for msg in session_messages)),
+            'messages': session_messages,
+            'ai_insights': {
+                'summary': 'Synthetic session',
+                'topics': rng.sample(['ai', 'automation', 'strategy', 'development', 'technology'], 2),
+                'action_items': []
+            }
+        }
+        filename = session_filename(session_data['timestamp'], session_data['id'])
+        dump_file(os.path.join(SESSIONS_ARCHIVE, filename), session_data)
+        batch.append((session_data, filename))
+        session_ids.append(session_data['id'])
+        if project_id:
+            links.setdefault(project_id, []).append((os.path.join(SESSIONS_ARCHIVE, filename), session_data))
+
+        if len(batch) >= 5000:
+            session_index.add_many(batch)
+            batch = []
+
+    session_index.add_many(batch)
+    for project_id, project_sessions in links.items():
+        project_manager.add_sessions_to_project(project_id, project_sessions)
+
+    return {'session_ids': session_ids, 'project_ids': project_ids}
+
+def disk_usage(path: str) -> int:
+    """
+    Total size in bytes of the files below a directory
+    """
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a synthetic SessionTrack archive')
+    parser.add_argument('directory', help='Target directory (sessions/ and projects/ are created in it)')
+    parser.add_argument('--sessions', type=int, default=1000, help='Number of sessions')
+    parser.add_argument('--messages', default='5:50', help='Messages per session (N or MIN:MAX)')
+    parser.add_argument('--projects', type=int, default=20, help='Number of projects')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed')
+    args = parser.parse_args()
+
+    os.environ['SESSIONS_PATH'] = os.path.join(args.directory, 'sessions')
+    os.environ['PROJECTS_PATH'] = os.path.join(args.directory, 'projects')
+
+    summary = generate_archive(args.sessions, parse_range(args.messages), args.projects, seed=args.seed)
+    print(f"Generated {len(summary['session_ids'])} sessions and {len(summary['project_ids'])} projects "
+          f"({disk_usage(args.directory)} bytes) in {args.directory}")
+
+if __name__ == '__main__':
+    main()
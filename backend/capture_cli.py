@@ -1,82 +1,62 @@
 #!/usr/bin/env python3
 import os
 import json
-import uuid
 from datetime import datetime, UTC
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Union
 import asyncio
 import argparse
 import sys
 
-# Verbose logging
-print(f"Python Version: {sys.version}", file=sys.stderr)
-print(f"Environment Variables:", file=sys.stderr)
-for key, value in os.environ.items():
-    print(f"{key}: {value[:10]}..." if len(value) > 10 else f"{key}: {value}", file=sys.stderr)
-
-# Use environment variable for Gemini key
-GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
-print(f"Gemini API Key present: {bool(GEMINI_API_KEY)}", file=sys.stderr)
-
-try:
-    import google.generativeai as genai
-    print("Gemini library successfully imported", file=sys.stderr)
-except ImportError as e:
-    print(f"Gemini library import error: {e}", file=sys.stderr)
-    genai = None
+from model_providers import GEMINI_API_KEY, MODEL_PROVIDER, PROVIDERS, create_provider
+from models import Message, Session
+from prompt_compression import PROMPT_COMPRESSION, PromptCompressor
 
 class SessionCapture:
     def __init__(self, 
-                 base_path: str = '/root/clawd/sessions_archive'):
+                 base_path: str = '/root/clawd/sessions_archive',
+                 provider_name: str = MODEL_PROVIDER):
         self.base_path = base_path
         os.makedirs(base_path, exist_ok=True)
-        
-        # Initialize Gemini AI
-        if genai and GEMINI_API_KEY:
-            try:
-                genai.configure(api_key=GEMINI_API_KEY)
-                self.gemini_model = genai.GenerativeModel('gemini-pro')
-                print("Gemini model initialized successfully", file=sys.stderr)
-            except Exception as e:
-                print(f"Gemini model initialization error: {e}", file=sys.stderr)
-                self.gemini_model = None
-        else:
-            print("Gemini AI not configured. AI features will be disabled.", file=sys.stderr)
-            self.gemini_model = None
+        self.provider_name = provider_name
+        self._provider = None
+        self._provider_loaded = False
+
+    @property
+    def provider(self):
+        """
+        Model provider, initialized on first use (see model_providers.py)
+        """
+        if not self._provider_loaded:
+            self._provider_loaded = True
+            self._provider = create_provider(self.provider_name)
+            if self._provider is None:
+                print("No model provider configured. AI features will be disabled.", file=sys.stderr)
+        return self._provider
 
     async def capture_session(self, 
                         session_key: str, 
                         source: str, 
-                        messages: List[Dict],
+                        messages: List[Union[Dict, Message]],
                         project: Optional[str] = None) -> str:
         """
         Capture a complete session with metadata and AI-enhanced processing
         """
-        session_id = str(uuid.uuid4())
-        timestamp = datetime.now(UTC).isoformat()
-        
-        # Extract participants
-        participants = list(set(
-            msg.get('author', 'unknown') for msg in messages
-        ))
+        # Validate messages at the boundary; participants are tracked by the model
+        session = Session(
+            session_key=session_key,
+            source=source,
+            project=project,
+            messages=[msg if isinstance(msg, Message) else Message.from_dict(msg) for msg in messages]
+        )
         
         # Prepare session data
-        session_data = {
-            'id': session_id,
-            'session_key': session_key,
-            'timestamp': timestamp,
-            'source': source,
-            'project': project,
-            'total_messages': len(messages),
-            'participants': participants,
-            'messages': messages
-        }
+        session_data = session.to_dict()
         
         # AI-Powered Enhancements
         await self._enhance_session_metadata(session_data)
         
         # Save session file
-        filename = f"{timestamp}_{session_id}.json"
+        filename = f"{session.timestamp}_{session.id}.json"
         filepath = os.path.join(self.base_path, filename)
         
         with open(filepath, 'w') as f:
@@ -86,18 +66,23 @@ class SessionCapture:
 
     async def _enhance_session_metadata(self, session_data: Dict):
         """
-        Use Gemini AI to enhance session metadata
+        Use the model provider to enhance session metadata
         """
-        if not self.gemini_model:
-            print("No Gemini model available for enhancement", file=sys.stderr)
+        if not self.provider:
+            print("No model provider available for enhancement", file=sys.stderr)
             return
         
         try:
-            # Extract conversation text
-            conversation_text = "\n".join([
-                f"{msg.get('author', 'Unknown')}: {msg.get('content', '')}" 
-                for msg in session_data['messages']
-            ])
+            # Extract conversation text, compressed (see prompt_compression.py)
+            compression = None
+            if PROMPT_COMPRESSION:
+                compression = PromptCompressor().compress(session_data['messages'])
+                conversation_text = compression.text
+            else:
+                conversation_text = "\n".join([
+                    f"{msg.get('author', 'Unknown')}: {msg.get('content', '')}" 
+                    for msg in session_data['messages']
+                ])
             
             # Generate summary
             summary_prompt = f"""
@@ -111,13 +96,29 @@ class SessionCapture:
             {conversation_text}
             """
             
-            print("Generating AI summary...", file=sys.stderr)
-            summary_response = await self.gemini_model.generate_content_async(summary_prompt)
+            # Stream the summary to the terminal as it is generated
+            print(f"Generating AI summary ({self.provider.name})...", file=sys.stderr)
+            parts, usage = [], None
+            async for chunk in self.provider.stream(summary_prompt):
+                parts.append(chunk.text)
+                print(chunk.text, end='', file=sys.stderr, flush=True)
+                usage = chunk.usage or usage
+            summary = ''.join(parts)
+            print(file=sys.stderr)
             
             # Add AI-generated insights
-            session_data['ai_summary'] = summary_response.text
-            session_data['ai_topics'] = self._extract_topics(summary_response.text)
-            session_data['ai_action_items'] = self._extract_action_items(summary_response.text)
+            session_data['ai_summary'] = summary
+            session_data['ai_topics'] = self._extract_topics(summary)
+            session_data['ai_action_items'] = self._extract_action_items(summary)
+            if usage:
+                session_data['ai_usage'] = {
+                    'provider': self.provider.name,
+                    'input_tokens': usage.input_tokens,
+                    'output_tokens': usage.output_tokens,
+                    'estimated': usage.estimated
+                }
+            if compression:
+                session_data['ai_prompt_compression'] = compression.to_dict()
             
             print("AI enhancement completed successfully", file=sys.stderr)
         
@@ -157,9 +158,16 @@ async def main():
     parser = argparse.ArgumentParser(description='SessionTrack Capture CLI')
     parser.add_argument('--source', default='cli', help='Session source')
     parser.add_argument('--project', help='Project name')
+    parser.add_argument('--provider', choices=PROVIDERS, default=MODEL_PROVIDER, help='Model provider for AI insights')
+    parser.add_argument('-v', '--verbose', action='store_true', help='Print environment diagnostics')
     
     args = parser.parse_args()
     
+    if args.verbose:
+        print(f"Python Version: {sys.version}", file=sys.stderr)
+        print(f"Gemini API Key present: {bool(GEMINI_API_KEY)}", file=sys.stderr)
+        print(f"Model provider: {args.provider}", file=sys.stderr)
+    
     # Interactive session capture
     print("SessionTrack CLI - Conversation Capture")
     print("Enter your messages. Type 'END' on a new line to finish.")
@@ -176,14 +184,14 @@ async def main():
         if message_content.strip().upper() == 'END':
             break
         
-        messages.append({
-            'author': current_author,
-            'content': message_content,
-            'timestamp': datetime.now(UTC).isoformat()
-        })
+        messages.append(Message(
+            author=current_author,
+            content=message_content,
+            timestamp=datetime.now(UTC).isoformat()
+        ))
     
     # Capture session
-    capture = SessionCapture()
+    capture = SessionCapture(provider_name=args.provider)
     session_file = await capture.capture_session(
         session_key='manual:cli',
         source=args.source,
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+import os
+import asyncio
+from collections import defaultdict
+from contextlib import ExitStack
+from typing import Dict, List, Optional, Tuple
+
+from metrics import CAPTURE_BATCH_SIZE, CAPTURE_LINK_ERRORS, CAPTURE_WRITE_SECONDS
+from serialization import dumps
+
+# Latency/throughput trade-off: how long a batch may wait for more captures,
+# and how many captures it may hold before it is written immediately
+CAPTURE_BATCH_DELAY = float(os.getenv('CAPTURE_BATCH_DELAY', '0.005'))
+CAPTURE_MAX_BATCH = int(os.getenv('CAPTURE_MAX_BATCH', '256'))
+CAPTURE_FSYNC = os.getenv('CAPTURE_FSYNC', '1') != '0'
+
+def _fsync_path(path: str):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+class CaptureWriter:
+    """
+    Group-commit writer for captured sessions
+
+    Captures submitted within `delay` seconds of each other are written as
+    one batch: the session files, a single session index append, and one
+    link/project/stats update per project touched by the batch. The batch
+    is synced to disk in one pass (session files, archive directory, index
+    log) and only then are its callers acknowledged; a failed project link
+    is reported to its callers (and counted in CAPTURE_LINK_ERRORS) without
+    failing their stored captures.
+    While a batch is being written, new captures queue up for the next
+    one, so throughput grows with load while an isolated capture waits at
+    most `delay`.
+    """
+    def __init__(
+        self,
+        capture,
+        delay: float = CAPTURE_BATCH_DELAY,
+        max_batch: int = CAPTURE_MAX_BATCH,
+        fsync: bool = CAPTURE_FSYNC
+    ):
+        """
+        Initialize CaptureWriter
+
+        Args:
+            capture: SessionCapture whose archive, index and projects are written
+            delay: Seconds a batch waits for more captures (0: only already queued ones)
+            max_batch: Maximum captures per batch (a full batch is written at once)
+            fsync: Sync each batch to stable storage before acknowledging it
+        """
+        self.capture = capture
+        self.delay = delay
+        self.max_batch = max(max_batch, 1)
+        self.fsync = fsync
+
+        self._pending: List[Tuple[Dict, str, asyncio.Future]] = []
+        self._writer: Optional[asyncio.Task] = None
+        self._full: Optional[asyncio.Event] = None
+
+    async def write(self, session_data: Dict, filename: str) -> Optional[str]:
+        """
+        Queue a captured session and wait until its batch is durable
+
+        Args:
+            session_data: Full session data
+            filename: Session filename within the archive
+
+        Returns:
+            Error linking the session to its project, or None (the session is stored either way)
+        """
+        loop = asyncio.get_running_loop()
+        done = loop.create_future()
+        self._pending.append((session_data, filename, done))
+
+        if self._writer is None or self._writer.done():
+            self._full = asyncio.Event()
+            self._writer = loop.create_task(self._run())
+        elif len(self._pending) >= self.max_batch:
+            self._full.set()
+
+        return await done
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+
+        while self._pending:
+            if self.delay > 0 and len(self._pending) < self.max_batch:
+                # Give concurrent captures a chance to join the batch
+                try:
+                    await asyncio.wait_for(self._full.wait(), self.delay)
+                except asyncio.TimeoutError:
+                    pass
+            self._full.clear()
+
+            batch, self._pending = self._pending[:self.max_batch], self._pending[self.max_batch:]
+            try:
+                link_errors = await loop.run_in_executor(
+                    None, self.write_batch, [(session_data, filename) for session_data, filename, _ in batch]
+                )
+            except Exception as e:
+                for _, _, done in batch:
+                    if not done.done():
+                        done.set_exception(e)
+            else:
+                for session_data, _, done in batch:
+                    if not done.done():
+                        done.set_result(link_errors.get(session_data.get('project_id')))
+
+    def write_batch(self, sessions: List[Tuple[Dict, str]]) -> Dict[str, str]:
+        """
+        Write a batch of captured sessions synchronously
+
+        Args:
+            sessions: (session data, filename) pairs
+
+        Returns:
+            Project link errors by project id (the sessions themselves are stored)
+        """
+        CAPTURE_BATCH_SIZE.observe(len(sessions))
+        with CAPTURE_WRITE_SECONDS.time():
+            return self._write_batch(sessions)
+
+    def _write_batch(self, sessions: List[Tuple[Dict, str]]) -> Dict[str, str]:
+        capture = self.capture
+        written = []
+        indexing = False
+
+        try:
+            with ExitStack() as stack:
+                files = []
+                for session_data, filename in sessions:
+                    filepath = os.path.join(capture.base_path, filename)
+                    f = stack.enter_context(open(filepath, 'wb'))
+                    written.append(filepath)
+                    files.append(f)
+                    f.write(dumps(session_data, indent=True))
+                    f.flush()
+
+                if self.fsync:
+                    for f in files:
+                        os.fsync(f.fileno())
+                    _fsync_path(capture.base_path)
+
+            indexing = True
+            capture.session_index.add_many(sessions, fsync=self.fsync)
+        except BaseException:
+            # Nothing was acknowledged: leave no partial files behind
+            removable = True
+            if indexing:
+                # The append may have reached the log (e.g. only the fsync
+                # failed): tombstone the records before removing their files,
+                # and keep the files if even that fails
+                try:
+                    capture.session_index.put_many([
+                        {'id': session_data['id'], 'deleted': True} for session_data, _ in sessions
+                    ])
+                except Exception:
+                    removable = False
+            if removable:
+                for filepath in written:
+                    try:
+                        os.unlink(filepath)
+                    except FileNotFoundError:
+                        pass
+            raise
+
+        # Link to projects (maintains the project <-> session index); the
+        # sessions are durable by now, so a failure here is reported rather
+        # than failing the captures
+        by_project = defaultdict(list)
+        for session_data, filename in sessions:
+            if session_data.get('project_id'):
+                by_project[session_data['project_id']].append(
+                    (os.path.join(capture.base_path, filename), session_data)
+                )
+
+        link_errors = {}
+        if by_project:
+            project_manager = capture.projects()
+            for project_id, linked in by_project.items():
+                try:
+                    project_manager.add_sessions_to_project(project_id, linked)
+                except Exception as e:
+                    CAPTURE_LINK_ERRORS.inc(len(linked))
+                    link_errors[project_id] = str(e)
+        return link_errors
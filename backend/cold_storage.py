@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+import os
+import time
+import fcntl
+import uuid
+import zlib
+import argparse
+import threading
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from serialization import load_file, loads
+from storage import COLD_ARCHIVE_PATH, SESSIONS_ARCHIVE, atomic_write_json, remove_gzip_variant
+
+COLD_AFTER_DAYS = float(os.getenv('COLD_AFTER_DAYS', '30'))
+COLD_SEGMENT_BYTES = int(os.getenv('COLD_SEGMENT_BYTES', str(64 * 1024 * 1024)))
+COLD_CACHE_SIZE = int(os.getenv('COLD_CACHE_SIZE', '256'))
+COLD_EVICT_GRACE = float(os.getenv('COLD_EVICT_GRACE', '30'))
+
+def _compress(data: bytes, codec: str) -> bytes:
+    if codec == 'zstd':
+        return zstandard.ZstdCompressor(level=10).compress(data)
+    return zlib.compress(data, 9)
+
+def _decompress(data: bytes, codec: str) -> bytes:
+    if codec == 'zstd':
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read zstd cold segments")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return zlib.decompress(data)
+
+def parse_timestamp(timestamp: Optional[str]) -> Optional[datetime]:
+    """
+    Parse an ISO timestamp, treating naive values as UTC (None if invalid)
+    """
+    try:
+        parsed = datetime.fromisoformat(timestamp)
+    except (TypeError, ValueError):
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+def read_cold(cold_path: str, location: Dict) -> bytes:
+    """
+    Read and decompress one session from its cold segment
+
+    Args:
+        cold_path: Directory containing cold segments
+        location: Cold location from the session index record
+
+    Returns:
+        Original session file bytes
+    """
+    with open(os.path.join(cold_path, location['segment']), 'rb') as f:
+        f.seek(location['offset'])
+        return _decompress(f.read(location['length']), location['codec'])
+
+def iter_cold_sessions(cold_path: str = COLD_ARCHIVE_PATH) -> Iterator[Tuple[bytes, str, Dict]]:
+    """
+    Iterate over every session held in cold segments
+
+    Args:
+        cold_path: Directory containing cold segments
+
+    Yields:
+        Tuples of (session file bytes, filename, cold location)
+    """
+    if not os.path.isdir(cold_path):
+        return
+
+    for manifest_name in sorted(os.listdir(cold_path)):
+        if not manifest_name.endswith('.seg.json'):
+            continue
+        manifest = load_file(os.path.join(cold_path, manifest_name))
+        segment = manifest_name[:-len('.json')]
+
+        with open(os.path.join(cold_path, segment), 'rb') as f:
+            for entry in manifest['entries']:
+                f.seek(entry['offset'])
+                data = _decompress(f.read(entry['length']), manifest['codec'])
+                yield data, entry['filename'], {
+                    'segment': segment,
+                    'offset': entry['offset'],
+                    'length': entry['length'],
+                    'codec': manifest['codec']
+                }
+
+class ColdStore:
+    """
+    Compressed cold tier for old sessions
+
+    `tier` moves sessions older than a cutoff out of the hot archive into
+    packed segments under <cold>/: each session is compressed on its own
+    (zstd when installed, zlib otherwise) and appended to a segment, and a
+    `<segment>.json` manifest lists the offset and length of every entry.
+    The session index records each session's cold location, so a single
+    seek and decompress restores it.
+
+    Readers resolve sessions through `resolve`: hot sessions are served from
+    the archive, cold ones are rehydrated into <cold>/rehydrated/ and kept
+    there in an LRU of recently read sessions, so repeated reads are plain
+    file reads again (and keep working with FileResponse and ETags).
+
+    The LRU lives on disk (recency is the file's access time), so API
+    workers share one cache and its size limit. Files read within the last
+    COLD_EVICT_GRACE seconds are never evicted, so a worker cannot delete a
+    file another worker is about to serve.
+
+    `tier` holds the retention engine's batch lock, so sessions are never
+    moved while a retention batch is deciding what to do with them.
+    """
+    def __init__(
+        self,
+        session_index,
+        sessions_path: str = SESSIONS_ARCHIVE,
+        cold_path: str = COLD_ARCHIVE_PATH,
+        cache_size: int = COLD_CACHE_SIZE
+    ):
+        """
+        Initialize ColdStore
+
+        Args:
+            session_index: SessionIndex recording where sessions live
+            sessions_path: Hot session archive directory
+            cold_path: Directory holding cold segments
+            cache_size: Number of rehydrated sessions kept on disk
+        """
+        self.session_index = session_index
+        self.sessions_path = sessions_path
+        self.cold_path = cold_path
+        self.rehydrated_path = os.path.join(cold_path, 'rehydrated')
+        self.cache_size = max(cache_size, 1)
+        # Batch lock of the retention engine (see RetentionEngine.run_batch)
+        self.lock_path = os.path.join(os.path.dirname(session_index.log_path), 'retention_state.json.lock')
+        os.makedirs(self.rehydrated_path, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._evict()
+
+    # Reading
+
+    def resolve(self, record: Dict) -> str:
+        """
+        Path of a readable file for an indexed session, rehydrating it if cold
+
+        Args:
+            record: Session index record
+
+        Returns:
+            Path of the session file
+        """
+        location = record.get('cold')
+        if not location:
+            return os.path.join(self.sessions_path, record['filename'])
+
+        path = os.path.join(self.rehydrated_path, record['filename'])
+        try:
+            # Mark as recently used; the modification time (and ETag) stays
+            os.utime(path, ns=(time.time_ns(), os.stat(path).st_mtime_ns))
+            return path
+        except FileNotFoundError:
+            pass
+
+        data = self.read(location)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        self._evict()
+        return path
+
+    def discard(self, record: Dict):
+        """
+        Drop the rehydrated copy of a deleted cold session
+
+        Args:
+            record: Session index record
+        """
+        path = os.path.join(self.rehydrated_path, record['filename'])
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        remove_gzip_variant(path)
+
+    def load(self, session_id: Optional[str], path: Optional[str] = None) -> Optional[Dict]:
+        """
+        Load a session by id wherever it lives (hot or cold)
+
+        Stored paths (project `sessions` entries, links) keep pointing at the
+        hot archive after a session is tiered, so consumers load by id and
+        only fall back to the path for sessions the index does not know.
+
+        Args:
+            session_id: Session unique identifier
+            path: Stored path of the session file (fallback)
+
+        Returns:
+            Session data, or None if it cannot be found
+        """
+        record = self.session_index.get(session_id) if session_id else None
+        try:
+            if record is not None and record.get('cold'):
+                return loads(self.read(record['cold']))
+            if record is not None:
+                return load_file(os.path.join(self.sessions_path, record['filename']))
+            if path:
+                return load_file(path)
+        except (OSError, ValueError):
+            pass
+        return None
+
+    def read(self, location: Dict) -> bytes:
+        """
+        Read and decompress one session from its cold segment
+
+        Args:
+            location: Cold location from the session index record
+
+        Returns:
+            Original session file bytes
+        """
+        return read_cold(self.cold_path, location)
+
+    def _evict(self):
+        with self._lock:
+            entries = []
+            for entry in os.scandir(self.rehydrated_path):
+                if not entry.name.endswith('.json'):
+                    continue
+                try:
+                    entries.append((entry.stat().st_atime, entry.path))
+                except FileNotFoundError:
+                    continue
+            if len(entries) <= self.cache_size:
+                return
+
+            entries.sort()
+            recent = time.time() - COLD_EVICT_GRACE
+            for atime, path in entries[:len(entries) - self.cache_size]:
+                if atime >= recent:
+                    break
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+                remove_gzip_variant(path)
+
+    # Tiering
+
+    def candidates(self, older_than_days: float = COLD_AFTER_DAYS, now: Optional[datetime] = None) -> List[Dict]:
+        """
+        Hot sessions old enough to be moved to the cold tier
+
+        Args:
+            older_than_days: Minimum session age in days
+            now: Reference time (defaults to now)
+
+        Returns:
+            Index records, oldest first
+        """
+        cutoff = (now or datetime.now(timezone.utc)) - timedelta(days=older_than_days)
+        records = []
+        for record in self.session_index:
+            timestamp = parse_timestamp(record.get('timestamp'))
+            if not record.get('cold') and timestamp is not None and timestamp < cutoff:
+                records.append(record)
+        records.sort(key=lambda record: record.get('timestamp') or '')
+        return records
+
+    def tier(
+        self,
+        older_than_days: float = COLD_AFTER_DAYS,
+        now: Optional[datetime] = None,
+        segment_bytes: int = COLD_SEGMENT_BYTES
+    ) -> int:
+        """
+        Move old sessions from the hot archive into compressed segments
+
+        Segments are synced before the index points at them, and hot files
+        are only removed afterwards, so an interrupted run leaves every
+        session readable. Waits for a running retention batch to finish.
+
+        Args:
+            older_than_days: Minimum session age in days
+            now: Reference time (defaults to now)
+            segment_bytes: Compressed size at which a new segment is started
+
+        Returns:
+            Number of sessions moved
+        """
+        with open(self.lock_path, 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            return self.move(self.candidates(older_than_days, now), segment_bytes)
+
+    def move(self, records: List[Dict], segment_bytes: int = COLD_SEGMENT_BYTES) -> int:
+        """
+        Move specific hot sessions into compressed segments
+
+        Args:
+            records: Index records of hot sessions
+            segment_bytes: Compressed size at which a new segment is started
+
+        Returns:
+            Number of sessions moved
+        """
+        os.makedirs(self.cold_path, exist_ok=True)
+        codec = 'zstd' if zstandard is not None else 'zlib'
+        records = deque(record for record in records if not record.get('cold'))
+        moved = 0
+
+        while records:
+            segment = f"{time.strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}.seg"
+            entries, updates = [], []
+
+            with open(os.path.join(self.cold_path, segment), 'wb') as f:
+                while records and f.tell() < segment_bytes:
+                    record = records.popleft()
+                    try:
+                        with open(os.path.join(self.sessions_path, record['filename']), 'rb') as session_file:
+                            data = _compress(session_file.read(), codec)
+                    except FileNotFoundError:
+                        continue
+
+                    offset = f.tell()
+                    f.write(data)
+                    entries.append({'filename': record['filename'], 'offset': offset, 'length': len(data)})
+                    updates.append({**record, 'cold': {
+                        'segment': segment, 'offset': offset, 'length': len(data), 'codec': codec
+                    }})
+                f.flush()
+                os.fsync(f.fileno())
+
+            if not entries:
+                os.unlink(os.path.join(self.cold_path, segment))
+                continue
+
+            atomic_write_json(
+                os.path.join(self.cold_path, f"{segment}.json"),
+                {'codec': codec, 'entries': entries},
+                indent=None
+            )
+            self.session_index.put_many(updates)
+
+            for record in updates:
+                path = os.path.join(self.sessions_path, record['filename'])
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+                remove_gzip_variant(path)
+            moved += len(updates)
+
+        return moved
+
+    def collect_segments(self, min_age: float = 3600.0) -> int:
+        """
+        Delete segments that no indexed session points at any more
+
+        Segments younger than `min_age` seconds are kept, so a tiering run
+        that has written a segment but not yet updated the index is safe.
+
+        Args:
+            min_age: Minimum segment age in seconds
+
+        Returns:
+            Bytes reclaimed
+        """
+        if not os.path.isdir(self.cold_path):
+            return 0
+
+        live = {record['cold']['segment'] for record in self.session_index if record.get('cold')}
+        cutoff = time.time() - min_age
+        reclaimed = 0
+
+        for name in os.listdir(self.cold_path):
+            if not name.endswith('.seg') or name in live:
+                continue
+            segment_path = os.path.join(self.cold_path, name)
+            if os.stat(segment_path).st_mtime > cutoff:
+                continue
+            for path in (segment_path, f"{segment_path}.json"):
+                try:
+                    reclaimed += os.stat(path).st_size
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+
+        return reclaimed
+
+def main():
+    """
+    Move sessions older than N days to the cold tier
+    """
+    from session_index import SessionIndex
+
+    parser = argparse.ArgumentParser(description='SessionTrack cold storage tiering')
+    parser.add_argument('--days', type=float, default=COLD_AFTER_DAYS, help='Minimum session age in days')
+    args = parser.parse_args()
+
+    moved = ColdStore(SessionIndex()).tier(args.days)
+    print(f"Moved {moved} sessions to cold storage")
+
+if __name__ == "__main__":
+    main()
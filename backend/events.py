@@ -0,0 +1,446 @@
+#!/usr/bin/env python3
+import os
+import time
+import fcntl
+import asyncio
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict, Iterable, List, Optional
+
+from serialization import dumps, load_file, loads
+from storage import INDEX_PATH, atomic_write_json
+
+EVENT_HISTORY = 10000
+
+# Share events between API workers through an append-only log on disk
+EVENTS_SHARED = os.getenv('EVENTS_SHARED', '1') != '0'
+EVENTS_LOG_PATH = os.path.join(INDEX_PATH, 'events.jsonl')
+EVENTS_LOG_MAX_BYTES = int(os.getenv('EVENTS_LOG_MAX_BYTES', str(16 * 1024 * 1024)))
+EVENTS_POLL_INTERVAL = float(os.getenv('EVENTS_POLL_INTERVAL', '0.1'))
+
+class EventBus:
+    """
+    In-process publish/subscribe for capture, enrichment and action item events
+
+    Published events go into a bounded history ring with increasing ids.
+    Subscribers do not get their own queue; each one keeps a cursor into the
+    ring and reads at its own pace, so a slow client costs no memory and
+    cannot hold up publishers. A client that falls further behind than the
+    history (or resumes from an id that has already been dropped) gets a
+    `reset` event telling it to reload its state.
+
+    Ids are seeded from the clock, so ids issued after a restart are always
+    greater than ids issued before it.
+    """
+    def __init__(self, history: int = EVENT_HISTORY):
+        """
+        Initialize EventBus
+
+        Args:
+            history: Number of recent events kept for resuming clients
+        """
+        self._history = deque(maxlen=history)
+        self._next_id = int(time.time() * 1000)
+        # Ids up to the seed predate this process; once an event has been
+        # dropped (history full, or a gap), older cursors need a reset
+        self._floor = self._next_id - 1
+        self._dropped = False
+        self._lock = threading.Lock()
+        self._waiters: List[asyncio.Future] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def last_id(self) -> int:
+        return self._next_id - 1
+
+    def publish(self, event_type: str, data: Dict) -> Dict:
+        """
+        Publish an event (safe to call from any thread)
+
+        Args:
+            event_type: Event type, e.g. 'session.captured'
+            data: JSON-serializable payload
+
+        Returns:
+            Published event
+        """
+        with self._lock:
+            event = {
+                'id': self._next_id,
+                'type': event_type,
+                'timestamp': datetime.now(timezone.utc).isoformat(),
+                'data': data
+            }
+            self._next_id += 1
+            self._append(event)
+
+        self._notify()
+        return event
+
+    def _append(self, event: Dict):
+        if len(self._history) == self._history.maxlen:
+            self._dropped = True
+        self._history.append(event)
+
+    def deliver(self, event: Dict) -> bool:
+        """
+        Add an event published elsewhere (e.g. by another worker) to the history
+
+        Events already seen are ignored. If ids were skipped, the history is
+        cleared so that clients behind the gap get a `reset`. The first
+        event may jump past the id seed (ids come from the shared log).
+
+        Args:
+            event: Event with its id assigned
+
+        Returns:
+            True if the event was new
+        """
+        with self._lock:
+            if event['id'] < self._next_id and self._history:
+                return False
+            if self._history and event['id'] != self._next_id:
+                self._history.clear()
+                self._dropped = True
+            self._append(event)
+            self._next_id = event['id'] + 1
+
+        self._notify()
+        return True
+
+    def _notify(self):
+        if self._loop is not None and not self._loop.is_closed():
+            try:
+                running = asyncio.get_running_loop()
+            except RuntimeError:
+                running = None
+            if running is self._loop:
+                self._wake()
+            else:
+                self._loop.call_soon_threadsafe(self._wake)
+
+    def _wake(self):
+        waiters, self._waiters = self._waiters, []
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+
+    def events_after(self, cursor: int) -> Optional[List[Dict]]:
+        """
+        Events published after a given id
+
+        Args:
+            cursor: Id of the last event the caller has seen
+
+        Returns:
+            List of newer events, or None if some were already dropped
+        """
+        with self._lock:
+            if not self._history:
+                return []
+            first_id = self._history[0]['id']
+            if cursor < first_id - 1 and (self._dropped or cursor < self._floor):
+                return None
+            start = max(cursor - first_id + 1, 0)
+            return [self._history[i] for i in range(start, len(self._history))]
+
+    async def wait(self, cursor: int, timeout: Optional[float] = None):
+        """
+        Wait until an event newer than `cursor` is published (or the timeout)
+        """
+        loop = asyncio.get_running_loop()
+        self._loop = loop
+        waiter = loop.create_future()
+        self._waiters.append(waiter)
+        if self.last_id > cursor:
+            # Published between the caller's read and registering the waiter
+            self._waiters.remove(waiter)
+            return
+        try:
+            await asyncio.wait_for(waiter, timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+    async def subscribe(
+        self,
+        last_event_id: Optional[int] = None,
+        types: Optional[Iterable[str]] = None,
+        heartbeat: float = 15.0
+    ) -> AsyncIterator[Optional[Dict]]:
+        """
+        Iterate over events, optionally resuming after a given id
+
+        Yields None every `heartbeat` seconds without events, so callers can
+        keep idle connections alive and notice disconnects.
+
+        Args:
+            last_event_id: Resume after this id (None: only new events)
+            types: Only deliver these event types (prefix match, e.g. 'session.')
+            heartbeat: Seconds between keep-alive yields
+
+        Yields:
+            Events (dicts) or None for a heartbeat
+        """
+        types = tuple(types) if types else None
+        cursor = self.last_id if last_event_id is None else last_event_id
+
+        while True:
+            events = self.events_after(cursor)
+
+            if events is None:
+                cursor = self.last_id
+                yield {'id': cursor, 'type': 'reset', 'timestamp': datetime.now(timezone.utc).isoformat(), 'data': {}}
+                continue
+
+            if not events:
+                await self.wait(cursor, heartbeat)
+                if self.last_id == cursor:
+                    yield None
+                continue
+
+            for event in events:
+                cursor = event['id']
+                if types is None or event['type'].startswith(types):
+                    yield event
+
+class SharedEventLog:
+    """
+    Event log shared by the API workers of one archive
+
+    Publishing appends the event to a JSONL file under an exclusive lock,
+    which assigns ids contiguously across processes. Each worker tails the
+    file and delivers new events to its own bus, so every SSE client sees
+    every worker's events in the same order. The log rotates to `<log>.1`
+    past `max_bytes`; ids keep increasing across rotations and restarts.
+
+    The last assigned id is kept in `<log>.id`, rewritten under the same lock
+    before the event is appended, so publishing never re-reads the log (a
+    crash in between skips an id, it never reuses one).
+    """
+    def __init__(
+        self,
+        bus: EventBus,
+        log_path: str = EVENTS_LOG_PATH,
+        max_bytes: int = EVENTS_LOG_MAX_BYTES,
+        poll_interval: float = EVENTS_POLL_INTERVAL
+    ):
+        """
+        Initialize SharedEventLog
+
+        Args:
+            bus: Bus receiving the events of every worker
+            log_path: Shared log file
+            max_bytes: Size at which the log is rotated
+            poll_interval: Seconds between checks for new events
+        """
+        self.bus = bus
+        self.log_path = log_path
+        self.id_path = f"{log_path}.id"
+        self.max_bytes = max_bytes
+        self.poll_interval = poll_interval
+        self._file = None
+        self._buffer = b''
+        self._task: Optional[asyncio.Task] = None
+
+    def _is_current(self, f) -> bool:
+        try:
+            return os.fstat(f.fileno()).st_ino == os.stat(self.log_path).st_ino
+        except FileNotFoundError:
+            return False
+
+    @staticmethod
+    def _last_event(path: str, chunk_size: int = 65536) -> Optional[Dict]:
+        # Scan backwards a chunk at a time, so a long last line is read whole
+        try:
+            with open(path, 'rb') as f:
+                position = f.seek(0, os.SEEK_END)
+                tail = b''
+                while position > 0:
+                    step = min(chunk_size, position)
+                    position -= step
+                    f.seek(position)
+                    tail = f.read(step) + tail
+                    lines = tail.split(b'\n')
+                    # The first piece may be a partial line (unless at the start)
+                    complete, tail = (lines, b'') if position == 0 else (lines[1:], lines[0])
+                    for line in reversed(complete):
+                        if not line.strip():
+                            continue
+                        try:
+                            return loads(line)
+                        except ValueError:
+                            continue
+        except FileNotFoundError:
+            return None
+        return None
+
+    def _last_id(self) -> Optional[int]:
+        # Called under the log lock
+        try:
+            return int(load_file(self.id_path)['last_id'])
+        except (FileNotFoundError, ValueError, TypeError, KeyError):
+            pass
+        # No sidecar yet (or a damaged one): recover from the log
+        last = self._last_event(self.log_path) or self._last_event(self.log_path + '.1')
+        return last['id'] if last else None
+
+    def append(self, event_type: str, data: Dict) -> Dict:
+        """
+        Publish an event to every worker (safe to call from any thread)
+
+        Args:
+            event_type: Event type
+            data: JSON-serializable payload
+
+        Returns:
+            Published event
+        """
+        os.makedirs(os.path.dirname(self.log_path), exist_ok=True)
+        while True:
+            with open(self.log_path, 'ab') as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    if not self._is_current(f):
+                        # Rotated since we opened it
+                        continue
+                    last_id = self._last_id()
+                    event = {
+                        'id': last_id + 1 if last_id is not None else int(time.time() * 1000),
+                        'type': event_type,
+                        'timestamp': datetime.now(timezone.utc).isoformat(),
+                        'data': data
+                    }
+                    atomic_write_json(self.id_path, {'last_id': event['id']}, indent=None)
+                    f.write(dumps(event) + b'\n')
+                    f.flush()
+                    if f.tell() >= self.max_bytes:
+                        os.replace(self.log_path, self.log_path + '.1')
+                    break
+                finally:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+        # Local subscribers need not wait for the next poll, unless events of
+        # other workers come first (the tailer delivers those in order)
+        if event['id'] == self.bus.last_id + 1:
+            self.bus.deliver(event)
+        return event
+
+    def _read_new(self) -> List[Dict]:
+        events = []
+        while True:
+            if self._file is None:
+                try:
+                    self._file = open(self.log_path, 'rb')
+                except FileNotFoundError:
+                    return events
+                self._buffer = b''
+
+            # Check for rotation before draining, so nothing appended to the
+            # old file in between is missed
+            rotated = not self._is_current(self._file)
+            data = self._buffer + self._file.read()
+            complete, _, self._buffer = data.rpartition(b'\n')
+            for line in complete.splitlines():
+                try:
+                    events.append(loads(line))
+                except ValueError:
+                    continue
+
+            if not rotated:
+                return events
+            self._file.close()
+            self._file = None
+
+    def poll(self) -> int:
+        """
+        Deliver events appended since the last poll to the bus
+
+        Returns:
+            Number of events delivered
+        """
+        return sum(self.bus.deliver(event) for event in self._read_new())
+
+    async def start(self):
+        """
+        Load recent events and start tailing the log
+        """
+        if self._task is not None:
+            return
+        recent = []
+        for path in (self.log_path + '.1', self.log_path):
+            try:
+                with open(path, 'rb') as f:
+                    lines = f.read().splitlines()
+            except FileNotFoundError:
+                continue
+            for line in lines[-EVENT_HISTORY:]:
+                try:
+                    recent.append(loads(line))
+                except ValueError:
+                    continue
+        for event in recent[-EVENT_HISTORY:]:
+            self.bus.deliver(event)
+        # Only tail what is appended from now on
+        try:
+            self._file = open(self.log_path, 'rb')
+            self._file.seek(0, os.SEEK_END)
+        except FileNotFoundError:
+            self._file = None
+        self._task = asyncio.create_task(self._loop())
+
+    async def _loop(self):
+        while True:
+            try:
+                self.poll()
+            except OSError as e:
+                print(f"Event log poll failed: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    async def stop(self):
+        """
+        Stop tailing the log
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+# Process-wide bus
+bus = EventBus()
+shared_log = SharedEventLog(bus) if EVENTS_SHARED else None
+
+def publish(event_type: str, data: Dict) -> Dict:
+    """
+    Publish an event on the process-wide bus (and to the other workers)
+
+    Args:
+        event_type: Event type
+        data: JSON-serializable payload
+
+    Returns:
+        Published event
+    """
+    if shared_log is not None:
+        return shared_log.append(event_type, data)
+    return bus.publish(event_type, data)
+
+async def start():
+    """
+    Start receiving the events of other workers
+    """
+    if shared_log is not None:
+        await shared_log.start()
+
+async def stop():
+    if shared_log is not None:
+        await shared_log.stop()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+import os
+import zlib
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Dict
+
+from fastapi import Request, Response
+
+# Sessions are immutable once written (re-enrichment rewrites them rarely),
+# projects change often enough that clients should always revalidate.
+SESSION_CACHE_CONTROL = os.getenv('SESSION_CACHE_CONTROL', 'private, max-age=300, must-revalidate')
+PROJECT_CACHE_CONTROL = os.getenv('PROJECT_CACHE_CONTROL', 'private, no-cache')
+LISTING_CACHE_CONTROL = os.getenv('LISTING_CACHE_CONTROL', 'private, no-cache')
+
+def stat_validators(stat: os.stat_result, variant: str = '') -> Dict[str, str]:
+    """
+    Build ETag/Last-Modified validators from a stat result
+
+    The ETag is weak and derived from size and modification time, so it can
+    be computed without reading the file.
+
+    Args:
+        stat: Result of os.stat on the underlying file or directory
+        variant: Extra discriminator (e.g. query parameters) folded into the ETag
+
+    Returns:
+        Dictionary with 'ETag' and 'Last-Modified' headers
+    """
+    tag = f"{stat.st_ino:x}-{stat.st_size:x}-{stat.st_mtime_ns:x}"
+    if variant:
+        tag = f"{tag}-{zlib.crc32(variant.encode()):x}"
+
+    return {
+        'ETag': f'W/"{tag}"',
+        'Last-Modified': formatdate(stat.st_mtime, usegmt=True)
+    }
+
+def accepts_encoding(header: str, coding: str) -> bool:
+    """
+    Whether an Accept-Encoding header allows a content coding
+
+    Honors q-values (`gzip;q=0` refuses gzip) and the `*` wildcard.
+
+    Args:
+        header: Accept-Encoding header value
+        coding: Content coding (e.g. 'gzip')
+
+    Returns:
+        Boolean indicating the coding is acceptable
+    """
+    qualities = {}
+    for item in header.split(','):
+        name, _, params = item.partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        for param in params.split(';'):
+            key, _, value = param.partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[name] = quality
+
+    quality = qualities.get(coding, qualities.get('*', 0.0))
+    return quality > 0
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == '*':
+        return True
+    opaque = etag[2:] if etag.startswith('W/') else etag
+    for candidate in header.split(','):
+        candidate = candidate.strip()
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+def is_not_modified(request: Request, validators: Dict[str, str], mtime: float) -> bool:
+    """
+    Evaluate conditional request headers against the current validators
+
+    If-None-Match takes precedence over If-Modified-Since (RFC 9110).
+
+    Args:
+        request: Incoming request
+        validators: Validators from stat_validators
+        mtime: Modification time of the underlying resource
+
+    Returns:
+        Boolean indicating the client's copy is still current
+    """
+    if_none_match = request.headers.get('if-none-match')
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, validators['ETag'])
+
+    if_modified_since = request.headers.get('if-modified-since')
+    if if_modified_since:
+        try:
+            return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+
+    return False
+
+def not_modified_response(validators: Dict[str, str], cache_control: str) -> Response:
+    """
+    Build an empty 304 response carrying the cache headers
+
+    Args:
+        validators: Validators from stat_validators
+        cache_control: Cache-Control policy
+
+    Returns:
+        304 response
+    """
+    return Response(status_code=304, headers={**validators, 'Cache-Control': cache_control})
@@ -0,0 +1,620 @@
+#!/usr/bin/env python3
+import os
+import time
+import uuid
+import fcntl
+import asyncio
+import hashlib
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from models import Message, Session
+from serialization import dumps, loads
+from session_capture import SessionCapture
+from storage import OPEN_SESSIONS_PATH
+
+INGEST_IDLE_TIMEOUT = float(os.getenv('INGEST_IDLE_TIMEOUT', '300'))
+INGEST_FSYNC_INTERVAL = float(os.getenv('INGEST_FSYNC_INTERVAL', '0.01'))
+INGEST_MAX_OPEN_FILES = int(os.getenv('INGEST_MAX_OPEN_FILES', '512'))
+
+class SessionNotOpen(KeyError):
+    """
+    Raised when appending to or closing a session that is not open
+    """
+
+class _OpenSession:
+    __slots__ = ('session_id', 'path', 'header', 'message_count', 'size', 'last_activity')
+
+    def __init__(self, session_id: str, path: str, header: Dict, message_count: int = 0, size: int = 0):
+        self.session_id = session_id
+        self.path = path
+        self.header = header
+        self.message_count = message_count
+        # Log bytes accounted for in message_count (other workers may append)
+        self.size = size
+        self.last_activity = time.monotonic()
+
+def _fsync_all(fds: List[int]):
+    for fd in fds:
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+def _write_all(fd: int, data: bytes):
+    while data:
+        data = data[os.write(fd, data):]
+
+def _read_log(path: str) -> List[Dict]:
+    records = []
+    with open(path, 'rb') as f:
+        for line in f.read().splitlines():
+            if not line.strip():
+                continue
+            try:
+                records.append(loads(line))
+            except Exception:
+                # Torn final write from a crash: it was never acknowledged
+                break
+    return records
+
+class OpenSessionStore:
+    """
+    In-progress sessions persisted through a write-ahead log
+
+    Every open session has a log file (<open>/<session_id>.jsonl): an
+    `open` header followed by one `message` record per line. Appends are
+    written to the log immediately and acknowledged once fsynced; fsyncs of
+    all sessions written during a short interval are batched into one
+    flush cycle. Only a small header is kept in memory per session and log
+    file handles are pooled (LRU), so thousands of sessions can be open at
+    once.
+
+    Sessions are closed explicitly or after an idle timeout: the log is
+    replayed into a Session, enriched and stored through SessionCapture,
+    then removed. Logs left behind by a crash are recovered on start.
+
+    The logs are also what API workers share: a worker that does not know a
+    session adopts it from its log, appends are serialized with a lock on
+    the log file, and closing first renames the log to `<id>.closing`, so
+    exactly one worker stores the session and later appends fail cleanly.
+    Idempotency keys are claimed with marker files, so retries reaching
+    different workers still open a single session.
+    """
+    def __init__(
+        self,
+        capture: SessionCapture,
+        wal_path: str = OPEN_SESSIONS_PATH,
+        idle_timeout: float = INGEST_IDLE_TIMEOUT,
+        fsync_interval: float = INGEST_FSYNC_INTERVAL,
+        max_open_files: int = INGEST_MAX_OPEN_FILES
+    ):
+        """
+        Initialize OpenSessionStore
+
+        Args:
+            capture: SessionCapture used to enrich and store closed sessions
+            wal_path: Directory holding the write-ahead logs of open sessions
+            idle_timeout: Seconds without messages before a session is closed
+            fsync_interval: Seconds between batched fsyncs
+            max_open_files: Maximum number of log files kept open
+        """
+        self.capture = capture
+        self.wal_path = wal_path
+        self.idle_timeout = idle_timeout
+        self.fsync_interval = fsync_interval
+        self.max_open_files = max_open_files
+        os.makedirs(wal_path, exist_ok=True)
+
+        self._sessions: Dict[str, _OpenSession] = {}
+        self._files: 'OrderedDict[str, int]' = OrderedDict()
+        self._dirty = set()
+        self._flush_waiter: Optional[asyncio.Future] = None
+        self._tasks: List[asyncio.Task] = []
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def __contains__(self, session_id: str) -> bool:
+        return self._get(session_id) is not None
+
+    # Write-ahead log
+
+    def _log_path(self, session_id: str, suffix: str = '.jsonl') -> str:
+        return os.path.join(self.wal_path, f"{session_id}{suffix}")
+
+    def _adopt(self, path: str) -> Optional[_OpenSession]:
+        try:
+            size = os.path.getsize(path)
+            records = _read_log(path)
+        except FileNotFoundError:
+            return None
+        if not records:
+            return None
+
+        header = records[0]
+        session = _OpenSession(header['id'], path, header, message_count=len(records) - 1, size=size)
+        # Age adopted sessions from their last write
+        session.last_activity -= max(time.time() - os.stat(path).st_mtime, 0)
+        return session
+
+    def _get(self, session_id: str) -> Optional[_OpenSession]:
+        session = self._sessions.get(session_id)
+        if session is not None:
+            return session
+
+        # Opened by another worker (or before a restart)?
+        try:
+            uuid.UUID(session_id)
+        except ValueError:
+            return None
+        session = self._adopt(self._log_path(session_id))
+        if session is not None:
+            self._sessions[session_id] = session
+        return session
+
+    def _forget(self, session_id: str):
+        self._sessions.pop(session_id, None)
+        self._close_file(session_id)
+
+    def _sync(self, session: _OpenSession, size: int):
+        # Count messages other workers appended since we last looked
+        if size == session.size:
+            return
+        with open(session.path, 'rb') as f:
+            f.seek(session.size)
+            session.message_count += f.read(size - session.size).count(b'\n')
+        session.size = size
+        session.last_activity = time.monotonic()
+
+    def _file(self, session_id: str, create: bool = False) -> int:
+        fd = self._files.get(session_id)
+        if fd is not None:
+            self._files.move_to_end(session_id)
+            return fd
+
+        while len(self._files) >= self.max_open_files:
+            self._close_file(next(iter(self._files)))
+
+        # Never recreate the log of a session another worker has closed
+        flags = os.O_WRONLY | os.O_APPEND | (os.O_CREAT | os.O_EXCL if create else 0)
+        try:
+            fd = os.open(self._sessions[session_id].path, flags, 0o644)
+        except FileNotFoundError:
+            self._forget(session_id)
+            raise SessionNotOpen(session_id)
+        self._files[session_id] = fd
+        return fd
+
+    def _close_file(self, session_id: str):
+        fd = self._files.pop(session_id, None)
+        if fd is None:
+            return
+        try:
+            if session_id in self._dirty:
+                self._dirty.discard(session_id)
+                os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def _is_current(self, session: _OpenSession, fd: int) -> bool:
+        try:
+            return os.fstat(fd).st_ino == os.stat(session.path).st_ino
+        except FileNotFoundError:
+            return False
+
+    def _write(self, session_id: str, records: List[Dict], create: bool = False):
+        session = self._sessions[session_id]
+        fd = self._file(session_id, create)
+        payload = b''.join(dumps(record) + b'\n' for record in records)
+
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            if not self._is_current(session, fd):
+                # Closed by another worker since we opened the log
+                self._forget(session_id)
+                raise SessionNotOpen(session_id)
+            self._sync(session, os.fstat(fd).st_size)
+            _write_all(fd, payload)
+            session.size += len(payload)
+        finally:
+            # A forgotten session's descriptor is already closed (and unlocked)
+            if self._files.get(session_id) == fd:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+        self._dirty.add(session_id)
+
+    async def _durable(self):
+        """
+        Wait until everything written so far has been fsynced
+        """
+        if not self._tasks:
+            # Flush loop not running (store used outside the API): flush inline
+            await self._flush()
+            return
+
+        if self._flush_waiter is None:
+            self._flush_waiter = asyncio.get_running_loop().create_future()
+        await asyncio.shield(self._flush_waiter)
+
+    async def _flush(self):
+        waiter, self._flush_waiter = self._flush_waiter, None
+        # Duplicate descriptors so evictions during the fsync cannot close them
+        fds = [os.dup(self._files[sid]) for sid in self._dirty if sid in self._files]
+        self._dirty.clear()
+
+        try:
+            if fds:
+                await asyncio.get_running_loop().run_in_executor(None, _fsync_all, fds)
+        except Exception as e:
+            if waiter is not None and not waiter.done():
+                waiter.set_exception(e)
+            return
+
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.fsync_interval)
+            if self._dirty or self._flush_waiter is not None:
+                await self._flush()
+
+    async def _reap_loop(self):
+        interval = max(min(self.idle_timeout / 4, 5.0), 0.05)
+        while True:
+            await asyncio.sleep(interval)
+            deadline = time.monotonic() - self.idle_timeout
+            for session_id, session in list(self._sessions.items()):
+                if session.last_activity < deadline:
+                    # Another worker may have kept the session busy
+                    try:
+                        idle = time.time() - os.stat(session.path).st_mtime
+                    except FileNotFoundError:
+                        self._forget(session_id)
+                        continue
+                    if idle < self.idle_timeout:
+                        session.last_activity = time.monotonic() - idle
+                        continue
+                    try:
+                        await self.close(session_id)
+                    except SessionNotOpen:
+                        pass
+                    except Exception as e:
+                        print(f"Failed to close idle session {session_id}: {e}")
+
+    # Lifecycle
+
+    def recover(self) -> int:
+        """
+        Re-register sessions whose logs survived a restart
+
+        Logs of sessions that were already stored (crash after store, before
+        log removal) are discarded. Sessions left half-closed by a crashed
+        worker (`<id>.closing` without a live closer) are reopened.
+
+        Returns:
+            Number of sessions recovered
+        """
+        for filename in os.listdir(self.wal_path):
+            if filename.endswith('.closing'):
+                self._recover_closing(filename[:-len('.closing')])
+
+        recovered = 0
+        for filename in os.listdir(self.wal_path):
+            if not filename.endswith('.jsonl') or filename[:-len('.jsonl')] in self._sessions:
+                continue
+
+            path = os.path.join(self.wal_path, filename)
+            session = self._adopt(path)
+            if session is None:
+                # Empty: torn at creation, or just being created by another worker
+                try:
+                    if time.time() - os.stat(path).st_mtime > 60:
+                        os.unlink(path)
+                except FileNotFoundError:
+                    pass
+                continue
+
+            if self.capture.session_index.get(session.session_id) is not None:
+                os.unlink(path)
+                continue
+
+            self._sessions[session.session_id] = session
+            recovered += 1
+
+        return recovered
+
+    def _recover_closing(self, session_id: str):
+        lock_path = self._log_path(session_id, '.lock')
+        lock_fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            try:
+                fcntl.flock(lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                # Another worker is closing it right now
+                return
+            closing_path = self._log_path(session_id, '.closing')
+            try:
+                if self.capture.session_index.get(session_id) is not None:
+                    os.unlink(closing_path)
+                else:
+                    os.rename(closing_path, self._log_path(session_id))
+            except FileNotFoundError:
+                pass
+            os.unlink(lock_path)
+        finally:
+            os.close(lock_fd)
+
+    async def start(self):
+        """
+        Recover open sessions and start the fsync and idle-timeout loops
+        """
+        self.recover()
+        self._tasks = [
+            asyncio.create_task(self._flush_loop()),
+            asyncio.create_task(self._reap_loop())
+        ]
+
+    async def stop(self):
+        """
+        Stop background loops and flush logs (sessions stay open across restarts)
+        """
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        await self._flush()
+        for session_id in list(self._files):
+            self._close_file(session_id)
+
+    # Operations
+
+    async def open(
+        self,
+        session_key: Optional[str] = None,
+        source: Optional[str] = None,
+        project: Optional[str] = None,
+        project_id: Optional[str] = None,
+        insight_level: str = 'standard',
+        idempotency_key: Optional[str] = None
+    ) -> str:
+        """
+        Open a new session
+
+        Args:
+            session_key: Unique session identifier
+            source: Origin of the session (webchat, cli, etc.)
+            project: Associated project
+            project_id: Project to link the session to
+            insight_level: Depth of AI insights generated on close
+            idempotency_key: Client key; reopening with it returns the same session
+
+        Returns:
+            Session unique identifier (of the existing session for a repeated key,
+            which may already be closed)
+        """
+        session_id = str(uuid.uuid4())
+        if idempotency_key:
+            for session in self._sessions.values():
+                if session.header.get('idempotency_key') == idempotency_key:
+                    return session.session_id
+            record = self.capture.session_index.find_duplicate(idempotency_key=idempotency_key)
+            if record is not None:
+                return record['id']
+
+        header = {
+            'type': 'open',
+            'id': session_id,
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'session_key': session_key or 'unnamed',
+            'source': source,
+            'project': project,
+            'project_id': project_id,
+            'insight_level': insight_level
+        }
+        if idempotency_key:
+            header['idempotency_key'] = idempotency_key
+
+        path = self._log_path(session_id)
+        self._sessions[session_id] = _OpenSession(session_id, path, header)
+        self._write(session_id, [header], create=True)
+
+        if idempotency_key:
+            # The log exists before the claim, so a claimed key always names a live session
+            claimed = await self._claim_key(idempotency_key, session_id)
+            if claimed != session_id:
+                self._forget(session_id)
+                os.unlink(path)
+                return claimed
+
+        await self._durable()
+
+        return session_id
+
+    def _key_path(self, idempotency_key: str) -> str:
+        return self._log_path(hashlib.sha256(idempotency_key.encode()).hexdigest()[:32], '.key')
+
+    async def _claim_key(self, idempotency_key: str, session_id: str) -> str:
+        """
+        Claim an idempotency key for a new session across workers
+
+        Returns:
+            session_id if the claim succeeded, else the session holding the key
+        """
+        path = self._key_path(idempotency_key)
+        for _ in range(2):
+            try:
+                fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+            except FileExistsError:
+                pass
+            else:
+                try:
+                    _write_all(fd, session_id.encode())
+                finally:
+                    os.close(fd)
+                return session_id
+
+            # Claimed by another request: wait for its session id to be written
+            for _ in range(100):
+                try:
+                    with open(path, 'rb') as f:
+                        holder = f.read().decode()
+                except FileNotFoundError:
+                    holder = None
+                    break
+                if holder:
+                    break
+                await asyncio.sleep(0.001)
+
+            if holder and (
+                self._get(holder) is not None
+                or os.path.exists(self._log_path(holder, '.closing'))
+                or self.capture.session_index.get(holder) is not None
+            ):
+                return holder
+
+            # Stale claim (crash before the session was created): take it over
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+        return session_id
+
+    async def append(self, session_id: str, messages: List[Dict]) -> int:
+        """
+        Append messages to an open session, returning once they are durable
+
+        Args:
+            session_id: Session unique identifier
+            messages: Messages to append ({'author', 'content', 'timestamp'?})
+
+        Returns:
+            Total number of messages in the session
+        """
+        session = self._get(session_id)
+        if session is None:
+            raise SessionNotOpen(session_id)
+
+        # Validate the whole batch before writing any of it
+        records = [{'type': 'message', 'message': Message.from_dict(msg).to_dict()} for msg in messages]
+        if records:
+            self._write(session_id, records)
+            session.message_count += len(records)
+            session.last_activity = time.monotonic()
+            await self._durable()
+
+        return session.message_count
+
+    async def close(self, session_id: str) -> Dict:
+        """
+        Close an open session: enrich and store it, then drop its log
+
+        Args:
+            session_id: Session unique identifier
+
+        Returns:
+            Captured session data
+        """
+        session = self._get(session_id)
+        if session is None:
+            raise SessionNotOpen(session_id)
+
+        # Marks the close as in progress for recovery (see _recover_closing)
+        lock_path = self._log_path(session_id, '.lock')
+        lock_fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(lock_fd)
+            self._forget(session_id)
+            raise SessionNotOpen(session_id)
+
+        try:
+            return await self._close_locked(session)
+        finally:
+            try:
+                os.unlink(lock_path)
+            except FileNotFoundError:
+                pass
+            os.close(lock_fd)
+
+    async def _close_locked(self, session: _OpenSession) -> Dict:
+        session_id = session.session_id
+        self._close_file(session_id)
+        self._sessions.pop(session_id, None)
+
+        # Take the log away from appenders; only one worker wins the rename
+        closing_path = self._log_path(session_id, '.closing')
+        try:
+            fd = os.open(session.path, os.O_RDONLY)
+        except FileNotFoundError:
+            raise SessionNotOpen(session_id)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            if not self._is_current(session, fd):
+                raise SessionNotOpen(session_id)
+            os.rename(session.path, closing_path)
+        finally:
+            os.close(fd)
+
+        records = await asyncio.get_running_loop().run_in_executor(None, _read_log, closing_path)
+
+        header = session.header
+        model = Session(
+            id=session_id,
+            session_key=header.get('session_key') or 'unnamed',
+            timestamp=header['timestamp'],
+            source=header.get('source'),
+            project=header.get('project'),
+            project_id=header.get('project_id'),
+            messages=[Message.from_dict(r['message']) for r in records if r.get('type') == 'message'],
+            extra={'idempotency_key': header['idempotency_key']} if header.get('idempotency_key') else {}
+        )
+
+        try:
+            # The client already holds this session's id: only its idempotency
+            # key may map it to another stored session, never its content
+            session_data = await self.capture.store_session(
+                model, header.get('insight_level', 'standard'), dedup=False
+            )
+        except BaseException:
+            # Leave the session open for a retry (or for recovery)
+            os.rename(closing_path, session.path)
+            raise
+        os.unlink(closing_path)
+        if header.get('idempotency_key'):
+            try:
+                os.unlink(self._key_path(header['idempotency_key']))
+            except FileNotFoundError:
+                pass
+
+        return session_data
+
+    def status(self, session_id: str) -> Optional[Dict]:
+        """
+        Describe an open session
+
+        Args:
+            session_id: Session unique identifier
+
+        Returns:
+            Session status, or None if the session is not open
+        """
+        session = self._get(session_id)
+        if session is None:
+            return None
+        try:
+            self._sync(session, os.path.getsize(session.path))
+        except FileNotFoundError:
+            self._forget(session_id)
+            return None
+
+        return {
+            'id': session_id,
+            'session_key': session.header.get('session_key'),
+            'opened_at': session.header.get('timestamp'),
+            'total_messages': session.message_count,
+            'idle_seconds': time.monotonic() - session.last_activity
+        }
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+import os
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from storage import INDEX_PATH, atomic_write_json, file_lock, read_json, session_id_from_path
+
+class LinkIndex:
+    """
+    Bidirectional project <-> session link index
+
+    Each project and each session gets a small link file, so resolving
+    either direction is a single file read rather than a scan of every
+    project or session in the archive:
+
+        <index>/links/projects/<project_id>.json  -> linked sessions
+        <index>/links/sessions/<session_id>.json  -> linked projects
+
+    Link files are updated under a file lock per link file, so concurrent
+    workers never lose each other's links.
+    """
+    def __init__(self, index_path: str = INDEX_PATH):
+        """
+        Initialize LinkIndex
+
+        Args:
+            index_path: Root directory of the on-disk indexes
+        """
+        self.projects_dir = os.path.join(index_path, 'links', 'projects')
+        self.sessions_dir = os.path.join(index_path, 'links', 'sessions')
+        os.makedirs(self.projects_dir, exist_ok=True)
+        os.makedirs(self.sessions_dir, exist_ok=True)
+
+    def _project_file(self, project_id: str) -> str:
+        return os.path.join(self.projects_dir, f"{project_id}.json")
+
+    def _session_file(self, session_id: str) -> str:
+        return os.path.join(self.sessions_dir, f"{session_id}.json")
+
+    def link(
+        self,
+        project_id: str,
+        session_id: str,
+        session_path: Optional[str] = None,
+        added_at: Optional[str] = None
+    ) -> bool:
+        """
+        Link a session to a project in both directions
+
+        Args:
+            project_id: Project unique identifier
+            session_id: Session unique identifier
+            session_path: Optional path to the session file
+            added_at: Link timestamp (defaults to now)
+
+        Returns:
+            Boolean indicating whether a new link was created
+        """
+        return bool(self.link_many(project_id, [{
+            'session_id': session_id,
+            'path': session_path,
+            'added_at': added_at or datetime.now(timezone.utc).isoformat()
+        }]))
+
+    def link_many(self, project_id: str, links: List[Dict]) -> List[Dict]:
+        """
+        Link several sessions to a project, rewriting the project's link file once
+
+        Args:
+            project_id: Project unique identifier
+            links: Links to create ({'session_id', 'path', 'added_at'})
+
+        Returns:
+            The links that were new (already linked sessions are skipped)
+        """
+        with file_lock(f"links:project:{project_id}"):
+            project_links = read_json(self._project_file(project_id), {'sessions': []})
+            linked = {link['session_id'] for link in project_links['sessions']}
+
+            created = []
+            for link in links:
+                if link['session_id'] in linked:
+                    continue
+                linked.add(link['session_id'])
+                created.append(link)
+
+            if not created:
+                return []
+
+            project_links['sessions'].extend(created)
+            atomic_write_json(self._project_file(project_id), project_links, indent=None)
+
+        for link in created:
+            session_id = link['session_id']
+            with file_lock(f"links:session:{session_id}"):
+                session_links = read_json(self._session_file(session_id), {'projects': []})
+                if not any(l['project_id'] == project_id for l in session_links['projects']):
+                    session_links['projects'].append({
+                        'project_id': project_id,
+                        'added_at': link['added_at']
+                    })
+                    atomic_write_json(self._session_file(session_id), session_links, indent=None)
+
+        return created
+
+    def unlink(self, project_id: str, session_id: str) -> bool:
+        """
+        Remove the link between a project and a session
+
+        Args:
+            project_id: Project unique identifier
+            session_id: Session unique identifier
+
+        Returns:
+            Boolean indicating whether a link was removed
+        """
+        removed = False
+
+        with file_lock(f"links:project:{project_id}"):
+            project_links = read_json(self._project_file(project_id))
+            if project_links:
+                remaining = [l for l in project_links['sessions'] if l['session_id'] != session_id]
+                if len(remaining) != len(project_links['sessions']):
+                    project_links['sessions'] = remaining
+                    atomic_write_json(self._project_file(project_id), project_links, indent=None)
+                    removed = True
+
+        with file_lock(f"links:session:{session_id}"):
+            session_links = read_json(self._session_file(session_id))
+            if session_links:
+                remaining = [l for l in session_links['projects'] if l['project_id'] != project_id]
+                if len(remaining) != len(session_links['projects']):
+                    session_links['projects'] = remaining
+                    atomic_write_json(self._session_file(session_id), session_links, indent=None)
+                    removed = True
+
+        return removed
+
+    def sessions_for_project(
+        self,
+        project_id: str,
+        offset: int = 0,
+        limit: int = 50
+    ) -> Tuple[int, List[Dict]]:
+        """
+        Get the sessions linked to a project, newest link first
+
+        Args:
+            project_id: Project unique identifier
+            offset: Number of links to skip
+            limit: Maximum number of links to return
+
+        Returns:
+            Tuple of (total linked sessions, page of links)
+        """
+        links = read_json(self._project_file(project_id), {'sessions': []})['sessions']
+        links.reverse()
+        return len(links), links[offset:offset + limit]
+
+    def projects_for_session(self, session_id: str) -> List[Dict]:
+        """
+        Get the projects a session is linked to
+
+        Args:
+            session_id: Session unique identifier
+
+        Returns:
+            List of project links
+        """
+        return read_json(self._session_file(session_id), {'projects': []})['projects']
+
+    def remove_session(self, session_id: str) -> int:
+        """
+        Drop every link involving a session
+
+        Args:
+            session_id: Session unique identifier
+
+        Returns:
+            Number of links removed
+        """
+        removed = 0
+        for link in self.projects_for_session(session_id):
+            removed += self.unlink(link['project_id'], session_id)
+
+        if os.path.exists(self._session_file(session_id)):
+            os.unlink(self._session_file(session_id))
+
+        return removed
+
+    def rebuild(self, projects_path: str) -> int:
+        """
+        Backfill the index from the `sessions` arrays of existing project files
+
+        Args:
+            projects_path: Directory containing project JSON files
+
+        Returns:
+            Number of links created
+        """
+        created = 0
+
+        for filename in os.listdir(projects_path):
+            if not filename.endswith('.json'):
+                continue
+
+            project_data = read_json(os.path.join(projects_path, filename), {})
+            project_id = project_data.get('id')
+            if not project_id:
+                continue
+
+            for entry in project_data.get('sessions', []):
+                session_id = entry.get('session_id') or session_id_from_path(entry.get('path', ''))
+                if session_id:
+                    created += self.link(
+                        project_id,
+                        session_id,
+                        session_path=entry.get('path'),
+                        added_at=entry.get('added_at')
+                    )
+
+        return created
+
+def main():
+    """
+    Backfill the link index from existing project files
+    """
+    from storage import PROJECTS_PATH
+
+    created = LinkIndex().rebuild(PROJECTS_PATH)
+    print(f"Link index rebuilt: {created} links created")
+
+if __name__ == "__main__":
+    main()
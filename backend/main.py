@@ -1,8 +1,116 @@
-from fastapi import FastAPI
-from api import sessions, projects
+from contextlib import asynccontextmanager
+from typing import Any, Optional
 
-app = FastAPI(title="SessionTrack API")
+from fastapi import FastAPI, Header, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+
+from api import sessions, projects, analytics, ingest, action_items
+import events
+import metrics
+from events import bus
+from profiling import profiler
+from serialization import dumps
+from state import RETENTION_WARMUP_STEPS, archive_watcher, open_sessions, retention, session_index, warmup
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response rendered with the fastest installed encoder (see serialization.py)
+    """
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Background loops: batched fsync and idle-timeout closing of open sessions,
+    # incremental retention/GC batches, tailing the events of other workers,
+    # syncing files written outside the API; index warmup runs once serving starts
+    await warmup.start()
+    await events.start()
+    await open_sessions.start()
+    # Retention needs the complete index, not the optional warmup steps
+    await retention.start(ready=lambda: warmup.done(*RETENTION_WARMUP_STEPS))
+    await archive_watcher.start()
+    yield
+    await archive_watcher.stop()
+    await retention.stop()
+    await open_sessions.stop()
+    await events.stop()
+    await warmup.stop()
+
+app = FastAPI(title="SessionTrack API", default_response_class=FastJSONResponse, lifespan=lifespan)
 
 # Include routers from individual API modules
 app.include_router(sessions.router)
-app.include_router(projects.router)
\ No newline at end of file
+app.include_router(projects.router)
+app.include_router(analytics.router)
+app.include_router(ingest.router)
+app.include_router(action_items.router)
+
+metrics.Gauge('sessiontrack_indexed_sessions', 'Sessions in the session index', lambda: len(session_index))
+metrics.Gauge('sessiontrack_open_sessions', 'Sessions currently open for streaming ingestion', lambda: len(open_sessions))
+
+if profiler is not None:
+    @app.middleware("http")
+    async def profile_requests(request: Request, call_next):
+        """
+        Keep a profile of slow (or sampled) requests (see profiling.py)
+        """
+        context = {'method': request.method, 'path': request.url.path, 'query': str(request.url.query)}
+        with profiler.record('request', f"{request.method} {request.url.path}", context) as call:
+            response = await call_next(request)
+            # Group by endpoint rather than by concrete path (ids vary)
+            endpoint = request.scope.get('endpoint')
+            if endpoint is not None:
+                call.name = f"{request.method} {endpoint.__name__}"
+            call.context['status'] = response.status_code
+            return response
+
+
+@app.get("/events", tags=["events"])
+async def event_stream(
+    request: Request,
+    types: Optional[str] = None,
+    last_event_id: Optional[int] = None,
+    last_event_id_header: Optional[str] = Header(None, alias="Last-Event-ID")
+):
+    """
+    Server-sent events feed of captures, enrichments and action items
+
+    Browsers resume automatically through the Last-Event-ID header;
+    `types` filters by comma-separated type prefixes (e.g. `session.`).
+    """
+    if last_event_id is None and last_event_id_header and last_event_id_header.isdigit():
+        last_event_id = int(last_event_id_header)
+    type_filter = [t.strip() for t in types.split(',') if t.strip()] if types else None
+
+    async def stream():
+        # Tell the client how long to wait before reconnecting
+        yield b"retry: 3000\n\n"
+        async for event in bus.subscribe(last_event_id, type_filter):
+            if await request.is_disconnected():
+                break
+            if event is None:
+                yield b": keep-alive\n\n"
+                continue
+            yield b"id: %d\nevent: %s\ndata: %s\n\n" % (event['id'], event['type'].encode(), dumps(event['data']))
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.get("/metrics", tags=["metrics"])
+async def metrics_endpoint():
+    """
+    Counters and latency histograms in the Prometheus text format
+    """
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/ready", tags=["health"])
+async def readiness():
+    """
+    Readiness probe: 200 once indexes are warm, 503 while warming up
+    """
+    status = warmup.status()
+    return FastJSONResponse(status, status_code=200 if status['ready'] else 503)
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Lightweight in-process metrics with Prometheus text exposition
+
+Counters, histograms and callback gauges, labelled by a fixed set of
+label names. With METRICS_ENABLED=0, `timed` returns functions unwrapped
+and every observe/inc returns immediately, so instrumentation costs
+nothing measurable. Metrics are per process: with several workers, each
+one exposes its own values (scrape them per worker or aggregate).
+"""
+import os
+import time
+import bisect
+import asyncio
+import functools
+import threading
+from contextlib import contextmanager, nullcontext
+from typing import Callable, Dict, List, Sequence, Tuple
+
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', '1') != '0'
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_registry: List['_Metric'] = []
+
+def _format_labels(labelnames: Sequence[str], key: Tuple, extra: str = '') -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(labelnames, key)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _key(self, labels: Dict) -> Tuple:
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"] + self.samples()
+
+class Counter(_Metric):
+    """
+    Monotonically increasing value
+    """
+    kind = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        if not METRICS_ENABLED:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in values]
+
+class Histogram(_Metric):
+    """
+    Distribution of observed values in cumulative buckets
+    """
+    kind = 'histogram'
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values: Dict[Tuple, List] = {}  # key -> [bucket counts..., sum, count]
+
+    def observe(self, value: float, **labels):
+        if not METRICS_ENABLED:
+            return
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            state[index] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def time(self, **labels):
+        """
+        Context manager observing the duration of its block
+        """
+        if not METRICS_ENABLED:
+            return nullcontext()
+        return self._timer(labels)
+
+    @contextmanager
+    def _timer(self, labels: Dict):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = sorted((key, list(state)) for key, state in self._values.items())
+
+        lines = []
+        for key, state in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), state):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(state[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {state[-1]}")
+        return lines
+
+class Gauge(_Metric):
+    """
+    Current value read from a callback at scrape time
+    """
+    kind = 'gauge'
+
+    def __init__(self, name: str, documentation: str, callback: Callable[[], float]):
+        super().__init__(name, documentation)
+        self.callback = callback
+
+    def samples(self) -> List[str]:
+        try:
+            return [f"{self.name} {_format_value(self.callback())}"]
+        except Exception:
+            return []
+
+def timed(histogram: Histogram, **labels):
+    """
+    Decorator observing the duration of every call (sync or async)
+
+    Args:
+        histogram: Histogram receiving the durations
+        labels: Label values of the observations
+    """
+    def decorator(func):
+        if not METRICS_ENABLED:
+            return func
+
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    histogram.observe(time.perf_counter() - start, **labels)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - start, **labels)
+        return wrapper
+
+    return decorator
+
+def render() -> str:
+    """
+    All metrics in the Prometheus text exposition format
+    """
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+# Application metrics
+
+CAPTURE_SECONDS = Histogram(
+    'sessiontrack_capture_seconds', 'End-to-end time to store a captured session', ('outcome',)
+)
+AI_INSIGHT_SECONDS = Histogram(
+    'sessiontrack_ai_insight_seconds', 'Time spent generating AI insights', ('level',)
+)
+CAPTURE_WRITE_SECONDS = Histogram(
+    'sessiontrack_capture_write_seconds', 'Time to write and sync one batch of captured sessions'
+)
+CAPTURE_BATCH_SIZE = Histogram(
+    'sessiontrack_capture_batch_size', 'Captured sessions per group-commit batch',
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+)
+CAPTURE_LINK_ERRORS = Counter(
+    'sessiontrack_capture_link_errors_total', 'Captured sessions that could not be linked to their project'
+)
+AI_TOKENS = Counter('sessiontrack_ai_tokens_total', 'AI tokens consumed', ('direction',))
+AI_COST = Counter('sessiontrack_ai_cost_dollars_total', 'AI spend in dollars')
+AI_PROMPT_TOKENS_SAVED = Counter(
+    'sessiontrack_ai_prompt_tokens_saved_total', 'Estimated transcript tokens removed by prompt compression'
+)
+STORAGE_READ_SECONDS = Histogram(
+    'sessiontrack_storage_read_seconds', 'Time spent reading stored sessions and projects', ('router', 'operation')
+)
+DIRECTORY_SCAN_SECONDS = Histogram(
+    'sessiontrack_directory_scan_seconds', 'Time spent listing storage directories', ('directory',)
+)
+PROJECT_WRITE_SECONDS = Histogram(
+    'sessiontrack_project_write_seconds', 'Time spent in ProjectManager writes', ('operation',)
+)
@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+Model providers used for AI insights
+
+A provider turns a prompt into text and reports the tokens the call
+actually used. Providers support single calls, bounded concurrent batches
+and streaming:
+
+    gemini  Google Gemini (GEMINI_API_KEY; the SDK is imported on first call)
+    local   Offline extractive summarizer: deterministic, free, no network
+
+MODEL_PROVIDER selects the provider (`auto` uses Gemini when an API key is
+set and no model otherwise; `none` disables AI insights).
+
+Usage:
+    python model_providers.py [--provider local] < conversation.txt
+"""
+import os
+import re
+import sys
+import asyncio
+import argparse
+from collections import Counter
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, List, Optional, Union
+
+# auto (gemini if GEMINI_API_KEY is set) / gemini / local / none
+MODEL_PROVIDER = os.getenv('MODEL_PROVIDER', 'auto')
+GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
+GEMINI_MODEL = os.getenv('GEMINI_MODEL', 'gemini-pro')
+MODEL_CONCURRENCY = int(os.getenv('MODEL_CONCURRENCY', '4'))
+
+PROVIDERS = ('auto', 'gemini', 'local', 'none')
+
+# Marks the transcript within insight prompts (see session_capture.py)
+CONVERSATION_MARKER = 'Conversation:\n'
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token estimate (1.3 per word) for budget checks before a call
+    """
+    return round(len(text.split()) * 1.3)
+
+@dataclass(slots=True)
+class Usage:
+    input_tokens: int
+    output_tokens: int
+    estimated: bool = False  # True if the provider did not report token counts
+
+@dataclass(slots=True)
+class Completion:
+    text: str
+    usage: Usage
+
+@dataclass(slots=True)
+class Chunk:
+    text: str
+    usage: Optional[Usage] = None  # set on the last chunk of a stream
+
+class ModelProvider:
+    """
+    Base class of model providers
+
+    Subclasses implement `generate`; `stream` and `generate_many` fall back
+    to it. `token_costs` overrides TokenManager's per-token prices (None
+    keeps them).
+    """
+    name = 'base'
+    token_costs: Optional[Dict[str, float]] = None
+
+    def __init__(self, max_concurrency: int = MODEL_CONCURRENCY):
+        """
+        Initialize ModelProvider
+
+        Args:
+            max_concurrency: Maximum concurrent calls made by generate_many
+        """
+        self.max_concurrency = max_concurrency
+
+    def estimate_tokens(self, text: str) -> int:
+        """
+        Estimate the tokens of a prompt without calling the model
+        """
+        return estimate_tokens(text)
+
+    async def generate(self, prompt: str, max_output_tokens: Optional[int] = None) -> Completion:
+        """
+        Generate a response
+
+        Args:
+            prompt: Prompt text
+            max_output_tokens: Optional limit on the response length
+
+        Returns:
+            Completion with the response text and token usage
+        """
+        raise NotImplementedError
+
+    async def stream(self, prompt: str, max_output_tokens: Optional[int] = None) -> AsyncIterator[Chunk]:
+        """
+        Generate a response incrementally
+
+        Args:
+            prompt: Prompt text
+            max_output_tokens: Optional limit on the response length
+
+        Yields:
+            Chunks of response text; the last one carries the usage
+        """
+        completion = await self.generate(prompt, max_output_tokens)
+        yield Chunk(completion.text, completion.usage)
+
+    async def generate_many(
+        self,
+        prompts: List[str],
+        max_output_tokens: Optional[int] = None
+    ) -> List[Union[Completion, Exception]]:
+        """
+        Generate responses for several prompts, at most `max_concurrency` at a time
+
+        Args:
+            prompts: Prompt texts
+            max_output_tokens: Optional limit on each response's length
+
+        Returns:
+            One Completion per prompt, in order (or the exception the call raised)
+        """
+        limit = asyncio.Semaphore(self.max_concurrency)
+
+        async def generate(prompt: str) -> Completion:
+            async with limit:
+                return await self.generate(prompt, max_output_tokens)
+
+        return await asyncio.gather(*(generate(prompt) for prompt in prompts), return_exceptions=True)
+
+def load_genai():
+    """
+    Import the Gemini SDK on first use (None if it is not installed)
+    """
+    try:
+        import google.generativeai as genai
+    except ImportError as e:
+        print(f"Gemini library import error: {e}", file=sys.stderr)
+        return None
+    return genai
+
+class GeminiProvider(ModelProvider):
+    """
+    Google Gemini (or any model object with a Gemini-style `generate_content_async`)
+
+    Token counts come from the response's `usage_metadata`; responses
+    without it are estimated.
+    """
+    name = 'gemini'
+
+    def __init__(
+        self,
+        model=None,
+        model_name: str = GEMINI_MODEL,
+        api_key: Optional[str] = GEMINI_API_KEY,
+        max_concurrency: int = MODEL_CONCURRENCY
+    ):
+        """
+        Initialize GeminiProvider
+
+        Args:
+            model: Model object to call (created from the SDK on first use if omitted)
+            model_name: Gemini model name
+            api_key: Gemini API key
+            max_concurrency: Maximum concurrent calls made by generate_many
+        """
+        super().__init__(max_concurrency)
+        self.model_name = model_name
+        self.api_key = api_key
+        self._model = model
+
+    @property
+    def model(self):
+        """
+        Gemini model, initialized on first use (the SDK is slow to import)
+        """
+        if self._model is None:
+            genai = load_genai()
+            if genai is None:
+                raise RuntimeError("Gemini SDK (google-generativeai) is not installed")
+            genai.configure(api_key=self.api_key)
+            self._model = genai.GenerativeModel(self.model_name)
+        return self._model
+
+    def _options(self, max_output_tokens: Optional[int]) -> Dict:
+        return {'generation_config': {'max_output_tokens': max_output_tokens}} if max_output_tokens else {}
+
+    def _usage(self, prompt: str, text: str, response) -> Usage:
+        metadata = getattr(response, 'usage_metadata', None)
+        if metadata is not None and getattr(metadata, 'prompt_token_count', None) is not None:
+            return Usage(metadata.prompt_token_count, getattr(metadata, 'candidates_token_count', 0) or 0)
+        return Usage(estimate_tokens(prompt), estimate_tokens(text), estimated=True)
+
+    async def generate(self, prompt: str, max_output_tokens: Optional[int] = None) -> Completion:
+        response = await self.model.generate_content_async(prompt, **self._options(max_output_tokens))
+        return Completion(response.text, self._usage(prompt, response.text, response))
+
+    async def stream(self, prompt: str, max_output_tokens: Optional[int] = None) -> AsyncIterator[Chunk]:
+        response = await self.model.generate_content_async(prompt, stream=True, **self._options(max_output_tokens))
+        parts = []
+        async for chunk in response:
+            parts.append(chunk.text)
+            yield Chunk(chunk.text)
+        # usage_metadata is complete once the stream is consumed
+        yield Chunk('', self._usage(prompt, ''.join(parts), response))
+
+# Word pieces and punctuation, the unit the local provider counts as tokens
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+SENTENCE_PATTERN = re.compile(r'(?<=[.!?])\s+')
+WORD_PATTERN = re.compile(r"[a-z0-9']+")
+STOPWORDS = frozenset(
+    'a an and are as at be but by do for from has have i if in is it its me my no not of on or so that the '
+    'their them then there these they this to too up us was we were what when which who will with you your'.split()
+)
+
+class LocalProvider(ModelProvider):
+    """
+    Offline extractive summarizer
+
+    Scores each sentence of the transcript by the frequency of its content
+    words and returns the best ones in transcript order, one per line,
+    within the output token limit; sentences naming an action (see
+    ACTION_MARKERS) are kept first, so action item extraction sees them.
+    Deterministic and free: usage is counted with TOKEN_PATTERN and costs
+    nothing against the budget.
+    """
+    name = 'local'
+    token_costs = {'input': 0.0, 'output': 0.0}
+
+    def __init__(self, max_concurrency: int = MODEL_CONCURRENCY, default_output_tokens: int = 200):
+        """
+        Initialize LocalProvider
+
+        Args:
+            max_concurrency: Maximum concurrent calls made by generate_many
+            default_output_tokens: Summary length when no limit is given
+        """
+        super().__init__(max_concurrency)
+        self.default_output_tokens = default_output_tokens
+
+    @staticmethod
+    def count_tokens(text: str) -> int:
+        return len(TOKEN_PATTERN.findall(text))
+
+    def estimate_tokens(self, text: str) -> int:
+        return self.count_tokens(text)
+
+    def summarize(self, text: str, max_output_tokens: Optional[int] = None) -> str:
+        """
+        Pick the highest scoring sentences of a transcript
+
+        Args:
+            text: Transcript ("author: content" lines) or an insight prompt
+            max_output_tokens: Summary length limit
+
+        Returns:
+            Selected sentences, one per line, in transcript order
+        """
+        from session_capture import ACTION_MARKERS
+
+        _, marker, conversation = text.partition(CONVERSATION_MARKER)
+        if not marker:
+            conversation = text
+
+        sentences = []
+        for line in conversation.splitlines():
+            _, sep, content = line.partition(': ')
+            for sentence in SENTENCE_PATTERN.split((content if sep else line).strip()):
+                sentence = ' '.join(sentence.split())
+                if sentence and sentence not in sentences:
+                    sentences.append(sentence)
+        if not sentences:
+            return ''
+
+        words = [[w for w in WORD_PATTERN.findall(s.lower()) if w not in STOPWORDS] for s in sentences]
+        frequencies = Counter(w for sentence_words in words for w in set(sentence_words))
+        top = max(frequencies.values(), default=1)
+
+        def score(i: int) -> tuple:
+            is_action = any(marker in sentences[i].lower() for marker in ACTION_MARKERS)
+            density = sum(frequencies[w] for w in words[i]) / (top * (len(words[i]) + 1))
+            return (not is_action, -density, i)
+
+        budget = max_output_tokens or self.default_output_tokens
+        chosen = []
+        for i in sorted(range(len(sentences)), key=score):
+            tokens = self.count_tokens(sentences[i])
+            if tokens > budget:
+                continue
+            chosen.append(i)
+            budget -= tokens
+
+        return '\n'.join(sentences[i] for i in sorted(chosen))
+
+    async def generate(self, prompt: str, max_output_tokens: Optional[int] = None) -> Completion:
+        text = self.summarize(prompt, max_output_tokens)
+        return Completion(text, Usage(self.count_tokens(prompt), self.count_tokens(text)))
+
+    async def stream(self, prompt: str, max_output_tokens: Optional[int] = None) -> AsyncIterator[Chunk]:
+        completion = await self.generate(prompt, max_output_tokens)
+        for line in completion.text.splitlines(keepends=True):
+            yield Chunk(line)
+        yield Chunk('', completion.usage)
+
+def create_provider(name: str = MODEL_PROVIDER) -> Optional[ModelProvider]:
+    """
+    Build the configured model provider
+
+    Args:
+        name: auto/gemini/local/none
+
+    Returns:
+        Model provider, or None if AI insights are disabled
+    """
+    if name not in PROVIDERS:
+        raise ValueError(f"Unknown model provider {name!r}, expected one of {', '.join(PROVIDERS)}")
+    if name == 'local':
+        return LocalProvider()
+    if name == 'gemini' or (name == 'auto' and GEMINI_API_KEY):
+        return GeminiProvider()
+    return None
+
+def as_provider(model) -> Optional[ModelProvider]:
+    """
+    Wrap a Gemini-style model object as a provider (providers and None pass through)
+    """
+    if model is None or isinstance(model, ModelProvider):
+        return model
+    return GeminiProvider(model=model)
+
+def main():
+    """
+    Stream a provider's summary of a transcript read from stdin
+    """
+    parser = argparse.ArgumentParser(description='SessionTrack model provider check')
+    parser.add_argument('--provider', choices=PROVIDERS, default='local', help='Model provider')
+    parser.add_argument('--max-output-tokens', type=int, help='Summary length limit')
+    args = parser.parse_args()
+
+    provider = create_provider(args.provider)
+    if provider is None:
+        parser.error("No model provider configured")
+
+    async def run():
+        async for chunk in provider.stream(sys.stdin.read(), args.max_output_tokens):
+            print(chunk.text, end='', flush=True)
+            if chunk.usage:
+                print(f"\n[{provider.name}] input tokens: {chunk.usage.input_tokens}, "
+                      f"output tokens: {chunk.usage.output_tokens}{' (estimated)' if chunk.usage.estimated else ''}",
+                      file=sys.stderr)
+
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+Canonical data models for sessions, messages, projects and action items
+
+Models are slotted dataclasses: they validate data at the boundary
+(`from_dict` raises ValueError on malformed input) and are much smaller in
+memory than the equivalent dicts. On disk and over the API the data stays
+plain JSON (`to_dict`), so the archive format is unchanged. Unknown
+fields are preserved in `extra` and written back untouched.
+"""
+import uuid
+import hashlib
+import json
+from dataclasses import dataclass, field, fields
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+PRIORITIES = ('low', 'medium', 'high')
+ACTION_ITEM_STATUSES = ('pending', 'in_progress', 'completed', 'cancelled')
+PROJECT_STATUSES = ('active', 'completed', 'paused')
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+def _require_dict(data: Any, model: str) -> Dict:
+    if not isinstance(data, dict):
+        raise ValueError(f"{model} must be an object, got {type(data).__name__}")
+    return data
+
+def _string(data: Dict, key: str, model: str, default: Optional[str] = None) -> Optional[str]:
+    value = data.get(key, default)
+    if value is not None and not isinstance(value, str):
+        raise ValueError(f"{model}.{key} must be a string")
+    return value
+
+def content_hash(
+    messages: Iterable[Tuple[str, str]],
+    session_key: Optional[str] = None,
+    project_id: Optional[str] = None
+) -> Optional[str]:
+    """
+    Content address of a conversation, used to detect repeated captures
+
+    Authors and contents count, scoped to the session key and project (the
+    same short transcript in another session or project is not a repeat);
+    timestamps, ids and insights do not, and whitespace and author case are
+    normalized, so a retried or re-posted conversation hashes the same.
+
+    Args:
+        messages: (author, content) pairs in conversation order
+        session_key: Session key of the conversation
+        project_id: Project the conversation belongs to
+
+    Returns:
+        Hex SHA-256 digest, or None for a conversation without messages
+    """
+    normalized = [[(author or '').strip().casefold(), ' '.join((content or '').split())] for author, content in messages]
+    if not normalized:
+        return None
+    scope = [session_key or 'unnamed', project_id or '']
+    return hashlib.sha256(json.dumps([scope, normalized], ensure_ascii=False).encode('utf-8')).hexdigest()
+
+def _split_extra(cls, data: Dict) -> Dict:
+    known = {f.name for f in fields(cls)}
+    return {key: value for key, value in data.items() if key not in known}
+
+@dataclass(slots=True)
+class Message:
+    author: str
+    content: str
+    timestamp: Optional[str] = None
+    extra: Optional[Dict[str, Any]] = None  # most messages have none; avoid a dict per message
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Message':
+        """
+        Validate and build a message
+
+        Args:
+            data: Raw message ({'author', 'content', 'timestamp'?})
+
+        Returns:
+            Message instance
+        """
+        data = _require_dict(data, 'Message')
+        content = data.get('content', '')
+        if not isinstance(content, str):
+            raise ValueError("Message.content must be a string")
+
+        return cls(
+            author=_string(data, 'author', 'Message') or 'unknown',
+            content=content,
+            timestamp=_string(data, 'timestamp', 'Message'),
+            extra=_split_extra(cls, data) or None
+        )
+
+    def to_dict(self) -> Dict:
+        data = {'author': self.author, 'content': self.content}
+        if self.timestamp is not None:
+            data['timestamp'] = self.timestamp
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+@dataclass(slots=True)
+class Session:
+    id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    session_key: str = 'unnamed'
+    timestamp: str = field(default_factory=_now)
+    source: Optional[str] = None
+    project: Optional[str] = None
+    project_id: Optional[str] = None
+    messages: List[Message] = field(default_factory=list)
+    participants: List[str] = field(default_factory=list)
+    ai_insights: Optional[Dict] = None
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+    def __post_init__(self):
+        # Participants in order of first appearance, maintained incrementally
+        seen = dict.fromkeys(self.participants)
+        for message in self.messages:
+            seen.setdefault(message.author)
+        self.participants = list(seen)
+
+    @property
+    def total_messages(self) -> int:
+        return len(self.messages)
+
+    def add_message(self, message: Message):
+        """
+        Append a message, updating participants without rescanning
+
+        Args:
+            message: Message to append
+        """
+        self.messages.append(message)
+        if message.author not in self.participants:
+            self.participants.append(message.author)
+
+    def conversation_text(self) -> str:
+        """
+        Render the transcript as "author: content" lines
+        """
+        return "\n".join(f"{msg.author}: {msg.content}" for msg in self.messages)
+
+    def content_hash(self) -> Optional[str]:
+        """
+        Normalized hash of the messages, session key and project (see `content_hash`)
+        """
+        return content_hash(
+            ((msg.author, msg.content) for msg in self.messages), self.session_key, self.project_id
+        )
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Session':
+        """
+        Validate and build a session
+
+        Args:
+            data: Raw session data
+
+        Returns:
+            Session instance
+        """
+        data = _require_dict(data, 'Session')
+        messages = data.get('messages', [])
+        if not isinstance(messages, list):
+            raise ValueError("Session.messages must be a list")
+
+        ai_insights = data.get('ai_insights')
+        if ai_insights is not None and not isinstance(ai_insights, dict):
+            raise ValueError("Session.ai_insights must be an object")
+
+        extra = _split_extra(cls, data)
+        extra.pop('total_messages', None)
+
+        return cls(
+            id=_string(data, 'id', 'Session') or str(uuid.uuid4()),
+            session_key=_string(data, 'session_key', 'Session') or 'unnamed',
+            timestamp=_string(data, 'timestamp', 'Session') or _now(),
+            source=_string(data, 'source', 'Session'),
+            project=_string(data, 'project', 'Session'),
+            project_id=_string(data, 'project_id', 'Session'),
+            messages=[Message.from_dict(msg) for msg in messages],
+            participants=list(data.get('participants') or []),
+            ai_insights=ai_insights,
+            extra=extra
+        )
+
+    def to_dict(self) -> Dict:
+        data = {
+            'id': self.id,
+            'session_key': self.session_key,
+            'timestamp': self.timestamp,
+        }
+        if self.source is not None:
+            data['source'] = self.source
+        data.update({
+            'project': self.project,
+            'project_id': self.project_id,
+            'total_messages': self.total_messages,
+            'participants': list(self.participants),
+            'messages': [msg.to_dict() for msg in self.messages]
+        })
+        if self.ai_insights is not None:
+            data['ai_insights'] = self.ai_insights
+        data.update(self.extra)
+        return data
+
+@dataclass(slots=True)
+class ActionItem:
+    description: str
+    priority: str = 'medium'
+    status: str = 'pending'
+    id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    created_at: str = field(default_factory=_now)
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+    def __post_init__(self):
+        if not self.description:
+            raise ValueError("ActionItem.description must not be empty")
+        if self.priority not in PRIORITIES:
+            raise ValueError(f"Invalid priority {self.priority!r}, expected one of {', '.join(PRIORITIES)}")
+        if self.status not in ACTION_ITEM_STATUSES:
+            raise ValueError(f"Invalid status {self.status!r}, expected one of {', '.join(ACTION_ITEM_STATUSES)}")
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'ActionItem':
+        """
+        Validate and build an action item
+
+        Args:
+            data: Raw action item data
+
+        Returns:
+            ActionItem instance
+        """
+        data = _require_dict(data, 'ActionItem')
+        return cls(
+            description=_string(data, 'description', 'ActionItem') or '',
+            priority=_string(data, 'priority', 'ActionItem', 'medium'),
+            status=_string(data, 'status', 'ActionItem', 'pending'),
+            id=_string(data, 'id', 'ActionItem') or str(uuid.uuid4()),
+            created_at=_string(data, 'created_at', 'ActionItem') or _now(),
+            extra=_split_extra(cls, data)
+        )
+
+    def to_dict(self) -> Dict:
+        data = {
+            'id': self.id,
+            'description': self.description,
+            'priority': self.priority,
+            'status': self.status,
+            'created_at': self.created_at
+        }
+        data.update(self.extra)
+        return data
+
+@dataclass(slots=True)
+class Project:
+    name: str
+    description: str = ''
+    tags: List[str] = field(default_factory=list)
+    id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    created_at: str = field(default_factory=_now)
+    status: str = 'active'
+    sessions: List[Dict] = field(default_factory=list)
+    action_items: List[ActionItem] = field(default_factory=list)
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+    def __post_init__(self):
+        if not self.name:
+            raise ValueError("Project.name must not be empty")
+        if self.status not in PROJECT_STATUSES:
+            raise ValueError(f"Invalid status {self.status!r}, expected one of {', '.join(PROJECT_STATUSES)}")
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Project':
+        """
+        Validate and build a project
+
+        Args:
+            data: Raw project data
+
+        Returns:
+            Project instance
+        """
+        data = _require_dict(data, 'Project')
+        tags = data.get('tags') or []
+        if not isinstance(tags, list):
+            raise ValueError("Project.tags must be a list")
+
+        return cls(
+            name=_string(data, 'name', 'Project') or '',
+            description=_string(data, 'description', 'Project', '') or '',
+            tags=tags,
+            id=_string(data, 'id', 'Project') or str(uuid.uuid4()),
+            created_at=_string(data, 'created_at', 'Project') or _now(),
+            status=_string(data, 'status', 'Project', 'active'),
+            sessions=list(data.get('sessions') or []),
+            action_items=[ActionItem.from_dict(item) for item in data.get('action_items') or []],
+            metadata=data.get('metadata') or {},
+            extra=_split_extra(cls, data)
+        )
+
+    def to_dict(self) -> Dict:
+        data = {
+            'id': self.id,
+            'name': self.name,
+            'description': self.description,
+            'tags': list(self.tags),
+            'created_at': self.created_at,
+            'status': self.status,
+            'sessions': self.sessions,
+            'action_items': [item.to_dict() for item in self.action_items],
+            'metadata': self.metadata
+        }
+        data.update(self.extra)
+        return data
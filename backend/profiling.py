@@ -0,0 +1,395 @@
+#!/usr/bin/env python3
+"""
+Profiles of slow requests and captures
+
+With PROFILE_ENABLED=1, every HTTP request (middleware in main.py) and
+every capture (`profiled` decorator) is recorded, and kept when it is
+slower than PROFILE_THRESHOLD_MS or picked at random (PROFILE_SAMPLE_RATE).
+Profiles go to PROFILES_PATH, which keeps the newest PROFILE_KEEP.
+
+Modes (PROFILE_MODE):
+    sample    stack samples of all busy threads every PROFILE_INTERVAL_MS
+              (low overhead; the event loop and the threadpool are shared,
+              so samples include concurrent requests)
+    cprofile  deterministic cProfile of the event loop thread (higher
+              overhead; one operation at a time, others go unprofiled)
+
+Usage:
+    python profiling.py list [--kind request|capture] [--limit 20]
+    python profiling.py show PROFILE_ID [--top 25]
+    python profiling.py summary
+"""
+import os
+import sys
+import time
+import uuid
+import pstats
+import random
+import argparse
+import cProfile
+import functools
+import threading
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterator, List, Optional
+
+from storage import PROFILES_PATH, atomic_write_json, read_json
+
+PROFILE_ENABLED = os.getenv('PROFILE_ENABLED', '0') != '0'
+PROFILE_MODE = os.getenv('PROFILE_MODE', 'sample')
+PROFILE_THRESHOLD_MS = float(os.getenv('PROFILE_THRESHOLD_MS', '500'))
+PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', '0'))
+PROFILE_INTERVAL_MS = float(os.getenv('PROFILE_INTERVAL_MS', '5'))
+PROFILE_KEEP = int(os.getenv('PROFILE_KEEP', '200'))
+
+PROFILE_MODES = ('sample', 'cprofile')
+
+# Innermost Python frames of threads that are waiting rather than working
+IDLE_FRAMES = {
+    ('selectors.py', 'select'),
+    ('threading.py', 'wait'),
+    ('queue.py', 'get'),
+    ('thread.py', '_worker'),
+    ('socket.py', 'accept')
+}
+
+def _frame_name(frame) -> str:
+    return f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_code.co_name}"
+
+def collapsed_stacks(exclude: int) -> List[str]:
+    """
+    Current stacks of all busy threads, root first ("thread;file:func;...")
+
+    Args:
+        exclude: Thread id to skip (the sampler itself)
+    """
+    names = {thread.ident: thread.name for thread in threading.enumerate()}
+    stacks = []
+    for thread_id, frame in sys._current_frames().items():
+        if thread_id == exclude:
+            continue
+        if (os.path.basename(frame.f_code.co_filename), frame.f_code.co_name) in IDLE_FRAMES:
+            continue
+        frames = []
+        while frame is not None:
+            frames.append(_frame_name(frame))
+            frame = frame.f_back
+        stacks.append(';'.join([names.get(thread_id, str(thread_id))] + frames[::-1]))
+    return stacks
+
+class _Recording:
+    __slots__ = ('samples',)
+
+    def __init__(self):
+        self.samples = Counter()
+
+class StackSampler:
+    """
+    Single background thread sampling stacks for every active recording
+    """
+    def __init__(self, interval: float):
+        """
+        Initialize StackSampler
+
+        Args:
+            interval: Seconds between samples
+        """
+        self.interval = interval
+        self._recordings = set()
+        self._lock = threading.Lock()
+        self._active = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def begin(self) -> _Recording:
+        recording = _Recording()
+        with self._lock:
+            self._recordings.add(recording)
+            self._active.set()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='profile-sampler', daemon=True)
+                self._thread.start()
+        return recording
+
+    def end(self, recording: _Recording) -> Counter:
+        with self._lock:
+            self._recordings.discard(recording)
+        return recording.samples
+
+    def _run(self):
+        me = threading.get_ident()
+        while True:
+            self._active.wait()
+            with self._lock:
+                recordings = list(self._recordings)
+                if not recordings:
+                    self._active.clear()
+                    continue
+            stacks = collapsed_stacks(me)
+            for recording in recordings:
+                recording.samples.update(stacks)
+            time.sleep(self.interval)
+
+@dataclass
+class ProfiledCall:
+    """
+    Operation being profiled (callers may refine the name and context)
+    """
+    kind: str
+    name: str
+    context: Dict = field(default_factory=dict)
+
+class Profiler:
+    """
+    Records operations and keeps the profiles of slow or sampled ones
+    """
+    def __init__(
+        self,
+        path: str = PROFILES_PATH,
+        mode: str = PROFILE_MODE,
+        threshold_ms: float = PROFILE_THRESHOLD_MS,
+        sample_rate: float = PROFILE_SAMPLE_RATE,
+        interval_ms: float = PROFILE_INTERVAL_MS,
+        keep: int = PROFILE_KEEP
+    ):
+        """
+        Initialize Profiler
+
+        Args:
+            path: Directory profiles are written to
+            mode: 'sample' (stack sampling) or 'cprofile'
+            threshold_ms: Operations at least this slow are kept
+            sample_rate: Fraction of operations kept regardless of duration
+            interval_ms: Stack sampling interval
+            keep: Number of profiles kept (oldest are removed)
+        """
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Invalid profile mode {mode!r}, expected one of {', '.join(PROFILE_MODES)}")
+        self.path = path
+        self.mode = mode
+        self.threshold_ms = threshold_ms
+        self.sample_rate = sample_rate
+        self.interval_ms = interval_ms
+        self.keep = keep
+        self.sampler = StackSampler(interval_ms / 1000)
+        self._cprofile_lock = threading.Lock()
+
+    @contextmanager
+    def record(self, kind: str, name: str, context: Optional[Dict] = None) -> Iterator[ProfiledCall]:
+        """
+        Profile the enclosed block
+
+        Args:
+            kind: Operation kind ('request', 'capture')
+            name: Operation name (used to group profiles)
+            context: Details saved with the profile
+
+        Yields:
+            ProfiledCall whose name and context may be updated
+        """
+        call = ProfiledCall(kind, name, dict(context or {}))
+        sampled = self.sample_rate > 0 and random.random() < self.sample_rate
+        profile, recording = None, None
+
+        if self.mode == 'cprofile':
+            # cProfile hooks the whole thread: profile one operation at a time
+            if self._cprofile_lock.acquire(blocking=False):
+                profile = cProfile.Profile()
+                profile.enable()
+        else:
+            recording = self.sampler.begin()
+
+        started_at = time.time()
+        start = time.perf_counter()
+        try:
+            yield call
+        finally:
+            duration_ms = (time.perf_counter() - start) * 1000
+            samples = None
+            if profile is not None:
+                profile.disable()
+                self._cprofile_lock.release()
+            if recording is not None:
+                samples = self.sampler.end(recording)
+
+            trigger = 'threshold' if duration_ms >= self.threshold_ms else 'sample' if sampled else None
+            if trigger and (profile is not None or recording is not None):
+                try:
+                    self.save(call, trigger, duration_ms, started_at, samples, profile)
+                except OSError as e:
+                    print(f"Could not save profile: {e}")
+
+    def save(
+        self,
+        call: ProfiledCall,
+        trigger: str,
+        duration_ms: float,
+        started_at: float,
+        samples: Optional[Counter] = None,
+        profile: Optional[cProfile.Profile] = None
+    ) -> str:
+        """
+        Write a profile and its context, then rotate old profiles
+
+        Returns:
+            Profile identifier
+        """
+        started = datetime.fromtimestamp(started_at, timezone.utc)
+        profile_id = f"{started.strftime('%Y%m%dT%H%M%S%f')}_{call.kind}_{uuid.uuid4().hex[:8]}"
+        record = {
+            'id': profile_id,
+            'kind': call.kind,
+            'name': call.name,
+            'trigger': trigger,
+            'mode': 'cprofile' if profile is not None else 'sample',
+            'started_at': started.isoformat(),
+            'duration_ms': round(duration_ms, 3),
+            'context': call.context
+        }
+
+        os.makedirs(self.path, exist_ok=True)
+        if profile is not None:
+            record['stats_file'] = f"{profile_id}.prof"
+            profile.dump_stats(os.path.join(self.path, record['stats_file']))
+        else:
+            record['interval_ms'] = self.interval_ms
+            record['samples'] = dict(samples or {})
+        atomic_write_json(os.path.join(self.path, f"{profile_id}.json"), record, indent=None)
+
+        self._rotate()
+        return profile_id
+
+    def _rotate(self):
+        names = sorted(name for name in os.listdir(self.path) if name.endswith('.json'))
+        for name in names[:max(len(names) - self.keep, 0)]:
+            for path in (os.path.join(self.path, name), os.path.join(self.path, f"{name[:-5]}.prof")):
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+
+profiler = Profiler() if PROFILE_ENABLED else None
+
+def profiled(kind: str, context: Optional[Callable[..., Dict]] = None):
+    """
+    Decorator profiling a coroutine function (unwrapped when profiling is disabled)
+
+    Args:
+        kind: Operation kind
+        context: Builds the saved context from the call arguments
+    """
+    def decorator(func):
+        if profiler is None:
+            return func
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            details = context(*args, **kwargs) if context else None
+            with profiler.record(kind, func.__qualname__, details):
+                return await func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+# Reading profiles
+
+def load_profiles(path: str = PROFILES_PATH, kind: Optional[str] = None) -> List[Dict]:
+    """
+    Saved profiles, newest first
+
+    Args:
+        path: Profiles directory
+        kind: Only profiles of this kind
+    """
+    if not os.path.isdir(path):
+        return []
+    profiles = []
+    for name in sorted(os.listdir(path), reverse=True):
+        if name.endswith('.json'):
+            record = read_json(os.path.join(path, name))
+            if record and (kind is None or record.get('kind') == kind):
+                profiles.append(record)
+    return profiles
+
+def summarize_samples(samples: Dict[str, int], top: int = 25) -> List[str]:
+    """
+    Hottest frames of a stack-sample profile (self and inclusive time)
+    """
+    total = sum(samples.values())
+    if not total:
+        return ["No samples (operation shorter than the sampling interval)"]
+
+    own, inclusive = Counter(), Counter()
+    for stack, count in samples.items():
+        frames = stack.split(';')[1:]
+        if not frames:
+            continue
+        own[frames[-1]] += count
+        for frame in set(frames):
+            inclusive[frame] += count
+
+    lines = [f"{total} samples", "", "Self:"]
+    lines += [f"  {count / total:6.1%}  {frame}" for frame, count in own.most_common(top)]
+    lines += ["", "Inclusive:"]
+    lines += [f"  {count / total:6.1%}  {frame}" for frame, count in inclusive.most_common(top)]
+    return lines
+
+def main():
+    """
+    List and summarize captured profiles
+    """
+    parser = argparse.ArgumentParser(description='SessionTrack profiles of slow requests and captures')
+    parser.add_argument('--path', default=PROFILES_PATH, help='Profiles directory')
+    subparsers = parser.add_subparsers(dest='command', help='Profile commands')
+
+    list_parser = subparsers.add_parser('list', help='List captured profiles (newest first)')
+    list_parser.add_argument('-k', '--kind', choices=['request', 'capture'], default=None, help='Filter by kind')
+    list_parser.add_argument('-n', '--limit', type=int, default=20, help='Number of profiles shown')
+
+    show_parser = subparsers.add_parser('show', help='Summarize one profile')
+    show_parser.add_argument('profile_id', help='Profile ID')
+    show_parser.add_argument('--top', type=int, default=25, help='Frames or functions shown')
+
+    subparsers.add_parser('summary', help='Profile counts and durations per operation')
+
+    args = parser.parse_args()
+
+    if args.command == 'list':
+        profiles = load_profiles(args.path, args.kind)[:args.limit]
+        if not profiles:
+            print("No profiles found.")
+        for record in profiles:
+            print(f"{record['id']}  {record['duration_ms']:9.1f} ms  {record['trigger']:9}  "
+                  f"{record['name']}  {record.get('context', {})}")
+
+    elif args.command == 'show':
+        record = read_json(os.path.join(args.path, f"{args.profile_id}.json"))
+        if record is None:
+            print(f"Profile {args.profile_id} not found.")
+            return
+        print(f"{record['name']} ({record['kind']}, {record['mode']}): {record['duration_ms']:.1f} ms, "
+              f"started {record['started_at']}, trigger {record['trigger']}")
+        print(f"Context: {record.get('context', {})}\n")
+        if record.get('stats_file'):
+            stats = pstats.Stats(os.path.join(args.path, record['stats_file']))
+            stats.sort_stats('cumulative').print_stats(args.top)
+        else:
+            print('\n'.join(summarize_samples(record.get('samples', {}), args.top)))
+
+    elif args.command == 'summary':
+        durations = defaultdict(list)
+        for record in load_profiles(args.path):
+            durations[(record['kind'], record['name'])].append(record['duration_ms'])
+        if not durations:
+            print("No profiles found.")
+        for (kind, name), values in sorted(durations.items(), key=lambda item: -max(item[1])):
+            print(f"{kind:8} {name}: {len(values)} profiles, "
+                  f"mean {sum(values) / len(values):.1f} ms, max {max(values):.1f} ms")
+
+    else:
+        parser.print_help()
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,124 @@
 #!/usr/bin/env python3
+"""
+SessionTrack project management CLI
+
+`batch` applies many operations in one process, read as JSONL (one
+operation per line) from a file or stdin:
+
+    {"op": "create", "name": "Website", "description": "...", "tags": ["web"]}
+    {"op": "action", "project_id": "<id>", "description": "Fix login", "priority": "high"}
+    {"op": "status", "ids": ["<action item id>", ...], "status": "completed"}
+
+Operations are grouped before they are applied: projects are created
+first, then the action items of each project are added with a single
+project rewrite, then statuses are set (one rewrite per affected
+project). Invalid lines are reported and skipped.
+
+Usage:
+    python project_cli.py [--json] batch [operations.jsonl]
+"""
 import argparse
+import json
 import sys
+import time
+from typing import Dict, Iterable
+
+from models import ACTION_ITEM_STATUSES, ActionItem
 from project_manager import ProjectManager
 
+BATCH_OPERATIONS = ('create', 'action', 'status')
+
+def run_batch(pm: ProjectManager, lines: Iterable[str]) -> Dict:
+    """
+    Apply JSONL operations, grouped per project
+
+    Args:
+        pm: ProjectManager to apply the operations with
+        lines: JSONL lines, one operation each
+
+    Returns:
+        Dictionary with a `summary` (counts, throughput) and one result per operation
+    """
+    start = time.perf_counter()
+    results = []
+    creates, actions, statuses = [], {}, {}
+
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        result = {'line': number}
+        results.append(result)
+        try:
+            operation = json.loads(line)
+            if not isinstance(operation, dict):
+                raise ValueError("Operation must be a JSON object")
+            result['op'] = operation.get('op')
+
+            if operation.get('op') == 'create':
+                if not operation.get('name') or not isinstance(operation['name'], str):
+                    raise ValueError("create requires a name")
+                creates.append((result, operation))
+            elif operation.get('op') == 'action':
+                if not operation.get('project_id') or not isinstance(operation['project_id'], str):
+                    raise ValueError("action requires a project_id")
+                item = ActionItem.from_dict({
+                    field: operation[field] for field in ('description', 'priority', 'status') if field in operation
+                }).to_dict()
+                actions.setdefault(operation['project_id'], []).append((result, item))
+            elif operation.get('op') == 'status':
+                ids = operation.get('ids') or ([operation['id']] if operation.get('id') else [])
+                if not ids or not isinstance(ids, list) or not all(isinstance(item_id, str) for item_id in ids):
+                    raise ValueError("status requires an id or ids (a list of strings)")
+                if operation.get('status') not in ACTION_ITEM_STATUSES:
+                    raise ValueError(f"Invalid status {operation.get('status')!r}, expected one of {', '.join(ACTION_ITEM_STATUSES)}")
+                statuses.setdefault(operation['status'], []).append((result, ids))
+            else:
+                raise ValueError(f"Unknown op {operation.get('op')!r}, expected one of {', '.join(BATCH_OPERATIONS)}")
+        except (ValueError, TypeError) as e:
+            result['error'] = str(e)
+
+    for result, operation in creates:
+        try:
+            result['id'] = pm.create_project(operation['name'], operation.get('description', ''), operation.get('tags'))
+        except (ValueError, TypeError, OSError) as e:
+            result['error'] = str(e)
+
+    # One read-modify-write of each project file for all of its new action items
+    for project_id, entries in actions.items():
+        try:
+            ids = pm.add_action_items(project_id, [item for _, item in entries])
+        except ValueError as e:
+            for result, _ in entries:
+                result['error'] = str(e)
+            continue
+        for (result, _), item_id in zip(entries, ids):
+            result['id'] = item_id
+
+    for status, entries in statuses.items():
+        outcome = pm.update_action_items([item_id for _, ids in entries for item_id in ids], status)
+        not_found = set(outcome['not_found'])
+        for result, ids in entries:
+            result['updated'] = len(ids) - len(not_found.intersection(ids))
+            missing = [item_id for item_id in ids if item_id in not_found]
+            if missing:
+                result['error'] = f"Action items not found: {', '.join(missing)}"
+
+    seconds = time.perf_counter() - start
+    return {
+        'summary': {
+            'operations': len(results),
+            'failed': sum(1 for result in results if 'error' in result),
+            'projects_created': sum(1 for result, _ in creates if 'id' in result),
+            'projects_updated': sum(1 for entries in actions.values() if 'id' in entries[0][0]),
+            'seconds': round(seconds, 3),
+            'ops_per_sec': round(len(results) / seconds, 1) if seconds else None
+        },
+        'results': results
+    }
+
 def main():
     parser = argparse.ArgumentParser(description='SessionTrack Project Management CLI')
+    parser.add_argument('--json', action='store_true', help='Print machine-readable JSON output')
     
     # Subcommands
     subparsers = parser.add_subparsers(dest='command', help='Project management commands')
@@ -33,20 +147,35 @@ def main():
                                default='medium', 
                                help='Priority of action item')
     
+    # Batch Operations
+    batch_parser = subparsers.add_parser('batch', help='Apply JSONL operations from a file or stdin')
+    batch_parser.add_argument('input', nargs='?', type=argparse.FileType('r'), default=sys.stdin,
+                              help='JSONL file of operations (default: stdin)')
+    
     # Parse arguments
     args = parser.parse_args()
     
     # Initialize ProjectManager
     pm = ProjectManager()
     
+    def output(data: Dict, failed: bool = False):
+        print(json.dumps(data, indent=2))
+        if failed:
+            sys.exit(1)
+    
     # Command handling
     if args.command == 'create':
         project_id = pm.create_project(args.name, args.description, args.tags)
-        print(f"Project created successfully. Project ID: {project_id}")
+        if args.json:
+            output({'id': project_id})
+        else:
+            print(f"Project created successfully. Project ID: {project_id}")
     
     elif args.command == 'list':
         projects = pm.list_projects(args.status)
-        if not projects:
+        if args.json:
+            output(projects)
+        elif not projects:
             print("No projects found.")
         else:
             print("Projects:")
@@ -55,7 +184,9 @@ def main():
     
     elif args.command == 'view':
         project = pm.get_project(args.project_id)
-        if project:
+        if args.json:
+            output(project or {'error': f"Project {args.project_id} not found"}, failed=project is None)
+        elif project:
             print(f"Project: {project['name']}")
             print(f"Description: {project.get('description', 'No description')}")
             print(f"Status: {project.get('status', 'Unknown')}")
@@ -70,12 +201,34 @@ def main():
     elif args.command == 'action':
         try:
             action_id = pm.add_action_item(args.project_id, args.description, args.priority)
-            print(f"Action item added successfully. Action ID: {action_id}")
+            if args.json:
+                output({'id': action_id})
+            else:
+                print(f"Action item added successfully. Action ID: {action_id}")
         except ValueError as e:
+            if args.json:
+                output({'error': str(e)}, failed=True)
             print(f"Error: {e}")
     
+    elif args.command == 'batch':
+        report = run_batch(pm, args.input)
+        summary = report['summary']
+        if args.json:
+            output(report, failed=bool(summary['failed']))
+        else:
+            for result in report['results']:
+                if 'error' in result:
+                    print(f"Line {result['line']}: {result['error']}", file=sys.stderr)
+            print(
+                f"Applied {summary['operations'] - summary['failed']} of {summary['operations']} operations "
+                f"in {summary['seconds']:.3f}s ({summary['ops_per_sec']} ops/s), "
+                f"{summary['projects_created']} projects created, {summary['projects_updated']} projects updated"
+            )
+            if summary['failed']:
+                sys.exit(1)
+    
     else:
         parser.print_help()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from serialization import load_file
+from storage import PROJECTS_PATH
+
+# Fields answerable from the index (project files are opened only for others)
+PROJECT_SUMMARY_FIELDS = {
+    'id', 'name', 'description', 'status', 'created_at', 'tags', 'total_sessions', 'total_action_items'
+}
+
+def project_summary(project_data: Dict) -> Dict:
+    """
+    Build the index summary of a project
+    """
+    return {
+        'id': project_data.get('id'),
+        'name': project_data.get('name'),
+        'description': project_data.get('description', ''),
+        'status': project_data.get('status', 'active'),
+        'created_at': project_data.get('created_at'),
+        'tags': project_data.get('tags', []),
+        'total_sessions': len(project_data.get('sessions', [])),
+        'total_action_items': len(project_data.get('action_items', []))
+    }
+
+class ProjectIndex:
+    """
+    In-memory summaries of every project file
+
+    Each summary is cached with its file's inode, size and modification
+    time. Listing stats the project files and only reloads those that
+    changed, so project files that were not written since the last listing
+    are never opened; writes by other workers or tools are picked up by the
+    next listing.
+    """
+    def __init__(self, projects_path: str = PROJECTS_PATH):
+        """
+        Initialize ProjectIndex
+
+        Args:
+            projects_path: Directory containing project JSON files
+        """
+        self.projects_path = projects_path
+        self._lock = threading.Lock()
+        self._summaries: Dict[str, Tuple[Tuple[int, int, int], Dict]] = {}
+
+    def summaries(self) -> List[Dict]:
+        """
+        Summaries of every project, reloading changed project files
+
+        Returns:
+            List of project summaries (see PROJECT_SUMMARY_FIELDS)
+        """
+        os.makedirs(self.projects_path, exist_ok=True)
+        seen = {}
+        for entry in os.scandir(self.projects_path):
+            if not entry.name.endswith('.json'):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            seen[entry.name] = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+        with self._lock:
+            for name in set(self._summaries) - set(seen):
+                del self._summaries[name]
+
+            for name, key in seen.items():
+                cached = self._summaries.get(name)
+                if cached is not None and cached[0] == key:
+                    continue
+                try:
+                    self._summaries[name] = (key, project_summary(load_file(os.path.join(self.projects_path, name))))
+                except FileNotFoundError:
+                    self._summaries.pop(name, None)
+
+            return [dict(summary) for _, summary in self._summaries.values()]
+
+    def load(self, project_id: str) -> Optional[Dict]:
+        """
+        Load a full project file (for fields outside the summary)
+        """
+        try:
+            return load_file(os.path.join(self.projects_path, f"{project_id}.json"))
+        except FileNotFoundError:
+            return None
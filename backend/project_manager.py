@@ -1,18 +1,68 @@
 #!/usr/bin/env python3
 import os
-import json
-import uuid
 from datetime import datetime, timezone
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
+
+import events
+from action_item_index import ActionItemIndex
+from link_index import LinkIndex
+from metrics import PROJECT_WRITE_SECONDS, timed
+from models import ACTION_ITEM_STATUSES, ActionItem, Project
+from project_stats import ProjectStats
+from serialization import dump_file, load_file
+from storage import PROJECTS_PATH, file_lock, read_json, session_id_from_path
 
 class ProjectManager:
-    def __init__(self, base_path: str = '/root/clawd/projects/sessiontrack/project_data'):
+    """
+    Project files with their session links, stats and action items
+
+    Project files are rewritten atomically, and every read-modify-write runs
+    under a per-project file lock, so several API workers can update the
+    same project concurrently.
+    """
+    def __init__(
+        self,
+        base_path: str = PROJECTS_PATH,
+        link_index: Optional[LinkIndex] = None,
+        stats: Optional[ProjectStats] = None,
+        action_items: Optional[ActionItemIndex] = None,
+        cold_store=None
+    ):
         """
         Initialize ProjectManager with a base path for storing project data
+
+        Args:
+            base_path: Directory to store project files
+            link_index: Project <-> session link index (created on demand if omitted)
+            stats: Per-project aggregates (created on demand if omitted)
+            action_items: Cross-project action item index (created on demand if omitted)
+            cold_store: ColdStore used to load linked sessions by id (stored paths go
+                stale once a session is tiered); paths are read directly if omitted
         """
         self.base_path = base_path
         os.makedirs(base_path, exist_ok=True)
+        self.link_index = link_index or LinkIndex()
+        self.stats = stats or ProjectStats()
+        # An empty index is falsy (it has a length): compare with None
+        self.action_items = action_items if action_items is not None else ActionItemIndex()
+        self.cold_store = cold_store
+
+    def load_session(self, entry: Dict) -> Optional[Dict]:
+        """
+        Load a linked session from its project entry or link record
+
+        Args:
+            entry: Project `sessions` entry or link ({'session_id', 'path'})
 
+        Returns:
+            Session data, or None if it cannot be found
+        """
+        session_id = entry.get('session_id') or session_id_from_path(entry.get('path') or '')
+        if self.cold_store is not None:
+            return self.cold_store.load(session_id, entry.get('path'))
+        return read_json(entry['path']) if entry.get('path') else None
+
+    @timed(PROJECT_WRITE_SECONDS, operation='create_project')
     def create_project(self, name: str, description: str = "", tags: List[str] = None) -> str:
         """
         Create a new project with unique identifier
@@ -25,26 +75,15 @@ class ProjectManager:
         Returns:
             Project unique identifier
         """
-        project_id = str(uuid.uuid4())
-        project_data = {
-            'id': project_id,
-            'name': name,
-            'description': description,
-            'tags': tags or [],
-            'created_at': datetime.now(timezone.utc).isoformat(),
-            'status': 'active',
-            'sessions': [],
-            'action_items': [],
-            'metadata': {}
-        }
+        project = Project(name=name, description=description, tags=tags or [])
         
-        project_file = os.path.join(self.base_path, f"{project_id}.json")
+        project_file = os.path.join(self.base_path, f"{project.id}.json")
         
-        with open(project_file, 'w') as f:
-            json.dump(project_data, f, indent=2)
+        dump_file(project_file, project.to_dict(), atomic=True)
         
-        return project_id
+        return project.id
 
+    @timed(PROJECT_WRITE_SECONDS, operation='update_project')
     def update_project(self, project_id: str, updates: Dict) -> bool:
         """
         Update project details
@@ -54,54 +93,154 @@ class ProjectManager:
             updates: Dictionary of fields to update
         
         Returns:
-            Boolean indicating success
+            Boolean indicating success (ValueError if an updated field is invalid)
         """
         project_file = os.path.join(self.base_path, f"{project_id}.json")
         
         if not os.path.exists(project_file):
             return False
         
-        with open(project_file, 'r') as f:
-            project_data = json.load(f)
-        
-        # Update project data
-        project_data.update(updates)
-        project_data['updated_at'] = datetime.now(timezone.utc).isoformat()
-        
-        with open(project_file, 'w') as f:
-            json.dump(project_data, f, indent=2)
+        with file_lock(f"project:{project_id}"):
+            project_data = load_file(project_file)
+            
+            # Validate only the updated fields (before anything is written):
+            # legacy values elsewhere in the file are left as they are
+            validated = Project.from_dict({'name': project_data.get('name') or 'unnamed', **updates}).to_dict()
+            project_data.update({key: validated.get(key, value) for key, value in updates.items()})
+            project_data['updated_at'] = datetime.now(timezone.utc).isoformat()
+            
+            dump_file(project_file, project_data, atomic=True)
+            
+            if 'action_items' in updates:
+                self.action_items.set_project(project_id, project_data['action_items'])
+        
+        if 'action_items' in updates:
+            self.stats.set_action_items(project_id, project_data['action_items'])
         
         return True
 
-    def add_session_to_project(self, project_id: str, session_path: str) -> bool:
+    def add_session_to_project(
+        self,
+        project_id: str,
+        session_path: str,
+        session_data: Optional[Dict] = None
+    ) -> bool:
         """
         Link a session to a project
         
         Args:
             project_id: Project unique identifier
             session_path: Path to the session file
+            session_data: Session content, if already in memory (read from disk otherwise)
         
         Returns:
             Boolean indicating success
         """
+        return self.add_sessions_to_project(project_id, [(session_path, session_data)]) is not None
+
+    @timed(PROJECT_WRITE_SECONDS, operation='add_sessions_to_project')
+    def add_sessions_to_project(
+        self,
+        project_id: str,
+        sessions: List[Tuple[str, Optional[Dict]]]
+    ) -> Optional[int]:
+        """
+        Link several sessions to a project, rewriting the project file once
+        
+        Args:
+            project_id: Project unique identifier
+            sessions: (session path, session data or None) pairs
+        
+        Returns:
+            Number of newly linked sessions, or None if the project does not exist
+        """
         project_file = os.path.join(self.base_path, f"{project_id}.json")
         
         if not os.path.exists(project_file):
-            return False
+            return None
         
-        with open(project_file, 'r') as f:
-            project_data = json.load(f)
+        added_at = datetime.now(timezone.utc).isoformat()
+        entries = [
+            ({'session_id': session_id_from_path(path), 'path': path, 'added_at': added_at}, session_data)
+            for path, session_data in sessions
+        ]
         
-        project_data['sessions'].append({
-            'path': session_path,
-            'added_at': datetime.now(timezone.utc).isoformat()
-        })
+        # Skip sessions that are already linked
+        created = {
+            link['session_id']
+            for link in self.link_index.link_many(project_id, [entry for entry, _ in entries if entry['session_id']])
+        }
+        entries = [(entry, data) for entry, data in entries if not entry['session_id'] or entry['session_id'] in created]
+        if not entries:
+            return 0
+        
+        with file_lock(f"project:{project_id}"):
+            project_data = load_file(project_file)
+            project_data['sessions'].extend(entry for entry, _ in entries)
+            dump_file(project_file, project_data, atomic=True)
+        
+        recorded = []
+        for entry, session_data in entries:
+            if session_data is None:
+                session_data = self.load_session(entry)
+            if session_data:
+                recorded.append(session_data)
+        if recorded:
+            self.stats.record_sessions(project_id, recorded)
+        
+        return len(entries)
+
+    @timed(PROJECT_WRITE_SECONDS, operation='remove_sessions_from_project')
+    def remove_sessions_from_project(
+        self,
+        project_id: str,
+        session_ids: List[str],
+        sessions: Optional[List[Dict]] = None
+    ) -> int:
+        """
+        Unlink sessions from a project (both the project file and the link index)
         
-        with open(project_file, 'w') as f:
-            json.dump(project_data, f, indent=2)
+        Args:
+            project_id: Project unique identifier
+            session_ids: Sessions to unlink
+            sessions: Session data (or index records) of the sessions, subtracted
+                from the project stats for those that were linked
         
-        return True
+        Returns:
+            Number of project session entries removed
+        """
+        # An empty id would match every entry that does not point at a session file
+        session_ids = {session_id for session_id in session_ids if session_id}
+        unlinked = {session_id for session_id in session_ids if self.link_index.unlink(project_id, session_id)}
+        
+        project_file = os.path.join(self.base_path, f"{project_id}.json")
+        
+        removed = 0
+        if os.path.exists(project_file):
+            with file_lock(f"project:{project_id}"):
+                project_data = load_file(project_file)
+                
+                remaining = []
+                for entry in project_data.get('sessions', []):
+                    session_id = entry.get('session_id') or session_id_from_path(entry.get('path', ''))
+                    if session_id in session_ids:
+                        unlinked.add(session_id)
+                    else:
+                        remaining.append(entry)
+                removed = len(project_data.get('sessions', [])) - len(remaining)
+                
+                if removed:
+                    project_data['sessions'] = remaining
+                    dump_file(project_file, project_data, atomic=True)
+        
+        if sessions:
+            self.stats.remove_sessions(project_id, [
+                session_data for session_data in sessions if session_data.get('id') in unlinked
+            ])
+        
+        return removed
 
+    @timed(PROJECT_WRITE_SECONDS, operation='add_action_item')
     def add_action_item(self, project_id: str, description: str, priority: str = 'medium') -> str:
         """
         Add an action item to a project
@@ -114,28 +253,167 @@ class ProjectManager:
         Returns:
             Unique action item identifier
         """
+        return self._add_action_items(project_id, [{'description': description, 'priority': priority}])[0]
+
+    @timed(PROJECT_WRITE_SECONDS, operation='add_action_items')
+    def add_action_items(self, project_id: str, action_items: List[Dict]) -> List[str]:
+        """
+        Add several action items to a project, rewriting the project file once
+        
+        Args:
+            project_id: Project unique identifier
+            action_items: Action item data (`description`, optional `priority`, `status`)
+        
+        Returns:
+            Unique action item identifiers, in input order
+        """
+        return self._add_action_items(project_id, action_items)
+
+    def _add_action_items(self, project_id: str, action_items: List[Dict]) -> List[str]:
         project_file = os.path.join(self.base_path, f"{project_id}.json")
         
         if not os.path.exists(project_file):
             raise ValueError(f"Project {project_id} not found")
         
-        with open(project_file, 'r') as f:
-            project_data = json.load(f)
+        # Validated before anything is written
+        action_items = [ActionItem.from_dict(item).to_dict() for item in action_items]
+        if not action_items:
+            return []
         
-        action_item = {
-            'id': str(uuid.uuid4()),
-            'description': description,
-            'priority': priority,
-            'status': 'pending',
-            'created_at': datetime.now(timezone.utc).isoformat()
-        }
+        with file_lock(f"project:{project_id}"):
+            project_data = load_file(project_file)
+            project_data['action_items'].extend(action_items)
+            dump_file(project_file, project_data, atomic=True)
+            self.action_items.put_many(project_id, action_items)
+        
+        self.stats.record_action_items(project_id, action_items)
+        for action_item in action_items:
+            events.publish('action_item.created', {'project_id': project_id, **action_item})
         
-        project_data['action_items'].append(action_item)
+        return [action_item['id'] for action_item in action_items]
+
+    @timed(PROJECT_WRITE_SECONDS, operation='update_action_items')
+    def update_action_items(self, item_ids: List[str], status: str) -> Dict:
+        """
+        Set the status of several action items, across projects
         
-        with open(project_file, 'w') as f:
-            json.dump(project_data, f, indent=2)
+        Items are located through the action item index; each project file
+        is rewritten once.
+        
+        Args:
+            item_ids: Action item identifiers
+            status: New status (pending/in_progress/completed/cancelled)
+        
+        Returns:
+            Dictionary with the `updated` item ids and the ids `not_found`
+        """
+        if status not in ACTION_ITEM_STATUSES:
+            raise ValueError(f"Invalid status {status!r}, expected one of {', '.join(ACTION_ITEM_STATUSES)}")
+        
+        by_project: Dict[str, set] = {}
+        not_found = []
+        for item_id in dict.fromkeys(item_ids):
+            record = self.action_items.get(item_id)
+            if record is None:
+                not_found.append(item_id)
+            else:
+                by_project.setdefault(record['project_id'], set()).add(item_id)
+        
+        updated = []
+        updated_at = datetime.now(timezone.utc).isoformat()
+        for project_id, ids in by_project.items():
+            project_file = os.path.join(self.base_path, f"{project_id}.json")
+            
+            changed = []
+            with file_lock(f"project:{project_id}"):
+                project_data = load_file(project_file) if os.path.exists(project_file) else {'action_items': []}
+                for item in project_data['action_items']:
+                    if item.get('id') in ids:
+                        ids.discard(item['id'])
+                        if item.get('status') != status:
+                            item['status'] = status
+                            item['updated_at'] = updated_at
+                            changed.append(item)
+                
+                if changed:
+                    dump_file(project_file, project_data, atomic=True)
+                    self.action_items.put_many(project_id, changed)
+            
+            # Indexed, but no longer in the project file
+            not_found.extend(ids)
+            
+            if changed:
+                self.stats.set_action_items(project_id, project_data['action_items'])
+                for item in changed:
+                    updated.append(item['id'])
+                    events.publish('action_item.updated', {'project_id': project_id, **item})
+        
+        return {'updated': updated, 'not_found': not_found}
+
+    @timed(PROJECT_WRITE_SECONDS, operation='promote_action_items')
+    def promote_session_action_items(
+        self,
+        session_data: Dict,
+        project_id: Optional[str] = None,
+        descriptions: Optional[List[str]] = None,
+        priority: str = 'medium'
+    ) -> List[Dict]:
+        """
+        Turn AI-extracted action items of a session into project action items
+        
+        Promoted items remember their `source_session_id`; promoting the same
+        suggestion twice is a no-op.
+        
+        Args:
+            session_data: Session data (suggestions in `ai_insights.action_items`)
+            project_id: Target project (defaults to the session's project)
+            descriptions: Suggestions to promote (all of them if omitted)
+            priority: Priority of the promoted items (low/medium/high)
+        
+        Returns:
+            The newly created action items
+        """
+        project_id = project_id or session_data.get('project_id')
+        if not project_id:
+            raise ValueError("Session is not linked to a project; a project_id is required")
+        
+        project_file = os.path.join(self.base_path, f"{project_id}.json")
+        if not os.path.exists(project_file):
+            raise ValueError(f"Project {project_id} not found")
         
-        return action_item['id']
+        suggestions = (session_data.get('ai_insights') or {}).get('action_items') or \
+            session_data.get('ai_action_items') or []
+        if descriptions is not None:
+            unknown = [description for description in descriptions if description not in suggestions]
+            if unknown:
+                raise ValueError(f"Not an action item of session {session_data.get('id')}: {unknown[0]!r}")
+            suggestions = [suggestion for suggestion in suggestions if suggestion in descriptions]
+        
+        session_id = session_data.get('id')
+        candidates = [
+            ActionItem(description=description, priority=priority, extra={'source_session_id': session_id}).to_dict()
+            for description in dict.fromkeys(suggestions)
+        ]
+        if not candidates:
+            return []
+        
+        with file_lock(f"project:{project_id}"):
+            project_data = load_file(project_file)
+            promoted = {
+                item.get('description') for item in project_data['action_items']
+                if item.get('source_session_id') == session_id
+            }
+            created = [item for item in candidates if item['description'] not in promoted]
+            if created:
+                project_data['action_items'].extend(created)
+                dump_file(project_file, project_data, atomic=True)
+                self.action_items.put_many(project_id, created)
+        
+        self.stats.record_action_items(project_id, created)
+        for action_item in created:
+            events.publish('action_item.created', {'project_id': project_id, **action_item})
+        
+        return created
 
     def get_project(self, project_id: str) -> Optional[Dict]:
         """
@@ -152,8 +430,7 @@ class ProjectManager:
         if not os.path.exists(project_file):
             return None
         
-        with open(project_file, 'r') as f:
-            return json.load(f)
+        return load_file(project_file)
 
     def list_projects(self, status: Optional[str] = None) -> List[Dict]:
         """
@@ -171,8 +448,7 @@ class ProjectManager:
             if filename.endswith('.json'):
                 project_file = os.path.join(self.base_path, filename)
                 
-                with open(project_file, 'r') as f:
-                    project_data = json.load(f)
+                project_data = load_file(project_file)
                 
                 if status is None or project_data.get('status') == status:
                     projects.append({
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+import os
+from datetime import date, datetime, timezone
+from typing import Dict, List, Optional
+
+from storage import INDEX_PATH, atomic_write_json, file_lock, read_json, session_id_from_path
+
+BUCKETS = ('day', 'week', 'month')
+
+def _empty_stats(project_id: str) -> Dict:
+    return {
+        'project_id': project_id,
+        'total_sessions': 0,
+        'total_messages': 0,
+        'participants': {},
+        'action_items': {},
+        'ai_input_tokens': 0,
+        'ai_output_tokens': 0,
+        'ai_cost': 0.0,
+        'daily': {},
+        'updated_at': None
+    }
+
+def _day(timestamp: Optional[str]) -> str:
+    """
+    Reduce an ISO timestamp to its day bucket (YYYY-MM-DD)
+    """
+    if not timestamp:
+        return datetime.now(timezone.utc).date().isoformat()
+    return timestamp[:10]
+
+def _bucket_key(day: str, bucket: str) -> str:
+    """
+    Map a day bucket onto a coarser bucket
+    """
+    if bucket == 'month':
+        return day[:7]
+    if bucket == 'week':
+        year, week, _ = date.fromisoformat(day).isocalendar()
+        return f"{year}-W{week:02d}"
+    return day
+
+class ProjectStats:
+    """
+    Incrementally maintained per-project aggregates
+
+    Every capture, session link and action item write applies a small delta
+    to the project's stats file, so reading stats never re-aggregates the
+    archive. Counters are kept both as totals and as daily buckets; weekly
+    and monthly series are rolled up from the daily buckets on read.
+    Deltas are applied under a per-project file lock, so workers never
+    overwrite each other's updates.
+    """
+    def __init__(self, index_path: str = INDEX_PATH):
+        """
+        Initialize ProjectStats
+
+        Args:
+            index_path: Root directory of the on-disk indexes
+        """
+        self.stats_dir = os.path.join(index_path, 'stats')
+        os.makedirs(self.stats_dir, exist_ok=True)
+
+    def _stats_file(self, project_id: str) -> str:
+        return os.path.join(self.stats_dir, f"{project_id}.json")
+
+    def _load(self, project_id: str) -> Dict:
+        return read_json(self._stats_file(project_id)) or _empty_stats(project_id)
+
+    def _save(self, stats: Dict):
+        stats['updated_at'] = datetime.now(timezone.utc).isoformat()
+        atomic_write_json(self._stats_file(stats['project_id']), stats, indent=None)
+
+    def _daily(self, stats: Dict, timestamp: Optional[str]) -> Dict:
+        return stats['daily'].setdefault(_day(timestamp), {
+            'sessions': 0,
+            'messages': 0,
+            'action_items': 0,
+            'ai_cost': 0.0
+        })
+
+    def record_session(self, project_id: str, session_data: Dict):
+        """
+        Apply a newly linked session to the project aggregates
+
+        Args:
+            project_id: Project unique identifier
+            session_data: Captured session data
+        """
+        self.record_sessions(project_id, [session_data])
+
+    def record_sessions(self, project_id: str, sessions: List[Dict]):
+        """
+        Apply several newly linked sessions with a single stats write
+
+        Args:
+            project_id: Project unique identifier
+            sessions: Captured session data
+        """
+        self._apply_sessions(project_id, sessions, 1)
+
+    def remove_sessions(self, project_id: str, sessions: List[Dict]):
+        """
+        Subtract unlinked (or deleted) sessions from the project aggregates
+
+        Args:
+            project_id: Project unique identifier
+            sessions: Session data (or index records) of the removed sessions
+        """
+        if sessions:
+            self._apply_sessions(project_id, sessions, -1)
+
+    def _apply_sessions(self, project_id: str, sessions: List[Dict], sign: int):
+        with file_lock(f"stats:{project_id}"):
+            stats = self._load(project_id)
+
+            for session_data in sessions:
+                usage = (session_data.get('ai_insights') or {}).get('usage') or {}
+                total_messages = sign * session_data.get('total_messages', len(session_data.get('messages', [])))
+                cost = sign * usage.get('cost', 0.0)
+
+                stats['total_sessions'] = max(stats['total_sessions'] + sign, 0)
+                stats['total_messages'] = max(stats['total_messages'] + total_messages, 0)
+                for participant in session_data.get('participants', []):
+                    count = stats['participants'].get(participant, 0) + sign
+                    if count > 0:
+                        stats['participants'][participant] = count
+                    else:
+                        stats['participants'].pop(participant, None)
+                stats['ai_input_tokens'] = max(stats['ai_input_tokens'] + sign * usage.get('input_tokens', 0), 0)
+                stats['ai_output_tokens'] = max(stats['ai_output_tokens'] + sign * usage.get('output_tokens', 0), 0)
+                stats['ai_cost'] = max(stats['ai_cost'] + cost, 0.0)
+
+                if sign < 0 and not session_data.get('timestamp'):
+                    # Unknown day: only the totals can be corrected
+                    continue
+                daily = self._daily(stats, session_data.get('timestamp'))
+                daily['sessions'] = max(daily['sessions'] + sign, 0)
+                daily['messages'] = max(daily['messages'] + total_messages, 0)
+                daily['ai_cost'] = max(daily['ai_cost'] + cost, 0.0)
+
+            self._save(stats)
+
+    def record_action_item(self, project_id: str, action_item: Dict):
+        """
+        Apply a newly created action item to the project aggregates
+
+        Args:
+            project_id: Project unique identifier
+            action_item: Action item data
+        """
+        self.record_action_items(project_id, [action_item])
+
+    def record_action_items(self, project_id: str, action_items: List[Dict]):
+        """
+        Apply several newly created action items with a single stats write
+
+        Args:
+            project_id: Project unique identifier
+            action_items: Action item data
+        """
+        if not action_items:
+            return
+
+        with file_lock(f"stats:{project_id}"):
+            stats = self._load(project_id)
+            for action_item in action_items:
+                status = action_item.get('status', 'pending')
+                stats['action_items'][status] = stats['action_items'].get(status, 0) + 1
+                self._daily(stats, action_item.get('created_at'))['action_items'] += 1
+            self._save(stats)
+
+    def set_action_items(self, project_id: str, action_items: List[Dict]):
+        """
+        Reset action item counts after the action item list was replaced
+
+        Args:
+            project_id: Project unique identifier
+            action_items: Complete list of the project's action items
+        """
+        counts = {}
+        for item in action_items:
+            status = item.get('status', 'pending')
+            counts[status] = counts.get(status, 0) + 1
+
+        with file_lock(f"stats:{project_id}"):
+            stats = self._load(project_id)
+            stats['action_items'] = counts
+            self._save(stats)
+
+    def get_stats(self, project_id: str, bucket: str = 'day', since: Optional[str] = None) -> Dict:
+        """
+        Retrieve a project's aggregates with a time-bucketed series
+
+        Args:
+            project_id: Project unique identifier
+            bucket: Series granularity (day/week/month)
+            since: Optional ISO date; earlier buckets are omitted
+
+        Returns:
+            Project statistics
+        """
+        if bucket not in BUCKETS:
+            raise ValueError(f"Unknown bucket {bucket!r}, expected one of {', '.join(BUCKETS)}")
+
+        stats = self._load(project_id)
+        since_day = _day(since) if since else None
+
+        series = {}
+        for day, counters in stats.pop('daily').items():
+            if since_day and day < since_day:
+                continue
+            key = _bucket_key(day, bucket)
+            entry = series.setdefault(key, {'bucket': key, 'sessions': 0, 'messages': 0, 'action_items': 0, 'ai_cost': 0.0})
+            for name, value in counters.items():
+                entry[name] += value
+
+        participants = stats.pop('participants')
+        stats['total_participants'] = len(participants)
+        stats['top_participants'] = sorted(participants.items(), key=lambda item: item[1], reverse=True)[:10]
+        stats['total_action_items'] = sum(stats['action_items'].values())
+        stats['series'] = [series[key] for key in sorted(series)]
+        return stats
+
+    def rebuild(self, project_data: Dict, sessions: List[Dict]):
+        """
+        Recompute a project's aggregates from scratch
+
+        Args:
+            project_data: Project data
+            sessions: Session data for every session linked to the project
+        """
+        project_id = project_data['id']
+        if os.path.exists(self._stats_file(project_id)):
+            os.unlink(self._stats_file(project_id))
+
+        for session_data in sessions:
+            self.record_session(project_id, session_data)
+        self.record_action_items(project_id, project_data.get('action_items', []))
+
+def main():
+    """
+    Rebuild the aggregates of every project from the archive
+    """
+    from cold_storage import ColdStore
+    from session_index import SessionIndex
+    from storage import PROJECTS_PATH
+
+    stats = ProjectStats()
+    # Sessions are loaded by id: stored paths go stale once a session is tiered
+    cold_store = ColdStore(SessionIndex())
+
+    for filename in os.listdir(PROJECTS_PATH):
+        if not filename.endswith('.json'):
+            continue
+
+        project_data = read_json(os.path.join(PROJECTS_PATH, filename), {})
+        if not project_data.get('id'):
+            continue
+
+        sessions = []
+        for entry in project_data.get('sessions', []):
+            session_data = cold_store.load(
+                entry.get('session_id') or session_id_from_path(entry.get('path') or ''), entry.get('path')
+            )
+            if session_data:
+                sessions.append(session_data)
+
+        stats.rebuild(project_data, sessions)
+        print(f"- {project_data.get('name')}: {len(sessions)} sessions")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Compress conversation transcripts before they are sent to a model
+
+Transcripts carry a lot that costs tokens without informing a summary:
+repeated lines (greetings, signatures, re-pasted errors), long pasted
+code and log blocks, runs of whitespace. Before an insight call the
+transcript is reduced in order of how little is lost:
+
+1. Whitespace: runs of spaces and blank lines collapse (code keeps its
+   indentation)
+2. Repeats: a line or code block seen earlier in the transcript is dropped
+3. Long blocks: code blocks and pasted runs of lines over
+   PROMPT_BLOCK_MAX_LINES keep their first and last lines, overlong
+   lines their start
+4. Token target (PROMPT_TOKEN_TARGET, off by default): while the prompt is
+   over the target, messages with the least content are dropped (never
+   the first or last message, or messages naming an action)
+
+Usage:
+    python prompt_compression.py SESSION.json [--target 2000]
+"""
+import os
+import re
+import argparse
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from model_providers import STOPWORDS, WORD_PATTERN, estimate_tokens
+
+# 0 disables compression entirely
+PROMPT_COMPRESSION = os.getenv('PROMPT_COMPRESSION', '1') != '0'
+# Drop low-information messages until the transcript fits (0: no target)
+PROMPT_TOKEN_TARGET = int(os.getenv('PROMPT_TOKEN_TARGET', '0'))
+PROMPT_BLOCK_MAX_LINES = int(os.getenv('PROMPT_BLOCK_MAX_LINES', '30'))
+PROMPT_LINE_MAX_CHARS = int(os.getenv('PROMPT_LINE_MAX_CHARS', '1000'))
+
+BLOCK_HEAD_LINES = 10
+BLOCK_TAIL_LINES = 5
+DEDUP_MIN_CHARS = 8  # shorter lines ("ok", "}") repeat legitimately
+FENCE = '```'
+
+# "author: content" at the start of a transcript line (see Session.conversation_text)
+MESSAGE_START = re.compile(r'^([^\s:][^:\n]{0,63}): (.*)$')
+SPACES = re.compile(r'[ \t]+')
+
+@dataclass(slots=True)
+class CompressionResult:
+    text: str
+    original_tokens: int
+    tokens: int
+    lines_deduplicated: int = 0
+    blocks_truncated: int = 0
+    messages_dropped: int = 0
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.original_tokens - self.tokens
+
+    def to_dict(self) -> Dict:
+        return {
+            'original_tokens': self.original_tokens,
+            'tokens': self.tokens,
+            'tokens_saved': self.tokens_saved,
+            'lines_deduplicated': self.lines_deduplicated,
+            'blocks_truncated': self.blocks_truncated,
+            'messages_dropped': self.messages_dropped
+        }
+
+def parse_transcript(text: str) -> List[Tuple[str, str]]:
+    """
+    Split an "author: content" transcript back into (author, content) messages
+
+    Lines that do not start a message continue the previous one.
+    """
+    messages: List[Tuple[str, str]] = []
+    in_fence = False
+    for line in text.split('\n'):
+        match = None if in_fence else MESSAGE_START.match(line)
+        if match or not messages:
+            author, content = match.groups() if match else ('unknown', line)
+            messages.append((author, content))
+        else:
+            messages[-1] = (messages[-1][0], f"{messages[-1][1]}\n{line}")
+        if line.count(FENCE) % 2:
+            in_fence = not in_fence
+    return messages
+
+def render_transcript(messages: Iterable[Tuple[str, str]]) -> str:
+    return "\n".join(f"{author}: {content}" for author, content in messages)
+
+class PromptCompressor:
+    """
+    Reduces the tokens of a transcript ahead of a model call (see module docstring)
+    """
+    def __init__(
+        self,
+        token_target: int = PROMPT_TOKEN_TARGET,
+        block_max_lines: int = PROMPT_BLOCK_MAX_LINES,
+        line_max_chars: int = PROMPT_LINE_MAX_CHARS,
+        keep_markers: Optional[Iterable[str]] = None,
+        count_tokens: Callable[[str], int] = estimate_tokens
+    ):
+        """
+        Initialize PromptCompressor
+
+        Args:
+            token_target: Drop low-information messages until the transcript fits (0: never drop)
+            block_max_lines: Longer code blocks and pasted line runs are truncated
+            line_max_chars: Longer single lines are truncated
+            keep_markers: Messages containing any of these are never dropped (default: ACTION_MARKERS)
+            count_tokens: Token counter used for the target and the report
+        """
+        self.token_target = token_target
+        self.block_max_lines = block_max_lines
+        self.line_max_chars = line_max_chars
+        self.keep_markers = None if keep_markers is None else tuple(keep_markers)
+        self.count_tokens = count_tokens
+
+    def _truncate_block(self, lines: List[str], result: CompressionResult) -> List[str]:
+        if len(lines) <= self.block_max_lines:
+            return lines
+        result.blocks_truncated += 1
+        omitted = len(lines) - BLOCK_HEAD_LINES - BLOCK_TAIL_LINES
+        return lines[:BLOCK_HEAD_LINES] + [f"[... {omitted} lines omitted ...]"] + lines[-BLOCK_TAIL_LINES:]
+
+    def _truncate_line(self, line: str) -> str:
+        if len(line) <= self.line_max_chars:
+            return line
+        return f"{line[:self.line_max_chars]} [... {len(line) - self.line_max_chars} characters omitted]"
+
+    def _compress_content(self, content: str, seen_lines: set, seen_blocks: set, result: CompressionResult) -> str:
+        """
+        Whitespace, repeats and long blocks of one message
+        """
+        output: List[str] = []
+        run: List[str] = []  # consecutive prose lines (a pasted log is one long run)
+
+        def flush_run():
+            output.extend(self._truncate_block(run, result))
+            run.clear()
+
+        lines = content.split('\n')
+        i = 0
+        while i < len(lines):
+            line = lines[i]
+            if line.strip().startswith(FENCE):
+                # Fenced block: kept verbatim (indentation matters), deduplicated as a whole
+                end = next((j for j in range(i + 1, len(lines)) if lines[j].strip().startswith(FENCE)), len(lines) - 1)
+                block = [self._truncate_line(l.rstrip()) for l in lines[i:end + 1]]
+                i = end + 1
+                flush_run()
+                key = '\n'.join(block)
+                if key in seen_blocks:
+                    result.lines_deduplicated += len(block)
+                    output.append('[repeated code block omitted]')
+                    continue
+                seen_blocks.add(key)
+                output.extend(self._truncate_block(block, result))
+                continue
+
+            i += 1
+            line = SPACES.sub(' ', line).strip()
+            if not line:
+                flush_run()
+                if output and output[-1] != '':
+                    output.append('')
+                continue
+
+            key = line.lower()
+            if len(key) >= DEDUP_MIN_CHARS:
+                if key in seen_lines:
+                    result.lines_deduplicated += 1
+                    continue
+                seen_lines.add(key)
+            run.append(self._truncate_line(line))
+
+        flush_run()
+        while output and output[-1] == '':
+            output.pop()
+        return '\n'.join(output)
+
+    def _information(self, content: str) -> int:
+        return len({word for word in WORD_PATTERN.findall(content.lower()) if word not in STOPWORDS})
+
+    def compress(self, conversation: Union[str, List]) -> CompressionResult:
+        """
+        Compress a transcript
+
+        Args:
+            conversation: "author: content" transcript, or messages (dicts or Message objects)
+
+        Returns:
+            CompressionResult with the compressed transcript and what was removed
+        """
+        if isinstance(conversation, str):
+            original = conversation
+            messages = parse_transcript(conversation)
+        else:
+            messages = [
+                (msg.get('author', 'unknown'), msg.get('content', '')) if isinstance(msg, dict) else (msg.author, msg.content)
+                for msg in conversation
+            ]
+            original = render_transcript(messages)
+
+        result = CompressionResult(text='', original_tokens=self.count_tokens(original), tokens=0)
+        seen_lines, seen_blocks = set(), set()
+        compressed = []
+        for author, content in messages:
+            content = self._compress_content(content or '', seen_lines, seen_blocks, result)
+            if content:
+                compressed.append((author, content))
+            else:
+                # Nothing new left (e.g. a re-sent message)
+                result.messages_dropped += 1
+
+        text = render_transcript(compressed)
+        tokens = self.count_tokens(text)
+
+        if self.token_target and tokens > self.token_target and len(compressed) > 2:
+            if self.keep_markers is None:
+                from session_capture import ACTION_MARKERS
+                self.keep_markers = tuple(ACTION_MARKERS)
+
+            # Least informative first; the first and last messages and actions stay
+            candidates = sorted(
+                (
+                    (self._information(content), i) for i, (_, content) in enumerate(compressed[1:-1], 1)
+                    if not any(marker in content.lower() for marker in self.keep_markers)
+                )
+            )
+            sizes = [self.count_tokens(f"{author}: {content}") for author, content in compressed]
+            dropped = set()
+            for _, i in candidates:
+                if tokens <= self.token_target:
+                    break
+                dropped.add(i)
+                tokens -= sizes[i]
+            if dropped:
+                compressed = [message for i, message in enumerate(compressed) if i not in dropped]
+                result.messages_dropped += len(dropped)
+                text = render_transcript(compressed)
+                tokens = self.count_tokens(text)
+
+        result.text = text
+        result.tokens = tokens
+        return result
+
+def main():
+    """
+    Report what compression saves on a stored session
+    """
+    import json
+    from serialization import load_file
+
+    parser = argparse.ArgumentParser(description='SessionTrack prompt compression check')
+    parser.add_argument('session', help='Session JSON file')
+    parser.add_argument('--target', type=int, default=PROMPT_TOKEN_TARGET, help='Token target (0: none)')
+    parser.add_argument('--show', action='store_true', help='Print the compressed transcript')
+    args = parser.parse_args()
+
+    result = PromptCompressor(token_target=args.target).compress(load_file(args.session).get('messages', []))
+    if args.show:
+        print(result.text)
+    print(json.dumps(result.to_dict(), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+import os
+import time
+import asyncio
+import argparse
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Tuple
+
+from cold_storage import ColdStore, read_cold
+from model_providers import MODEL_PROVIDER, PROVIDERS, create_provider
+from serialization import dump_file, load_file, loads
+from session_capture import AIInsightGenerator, TokenManager, extract_action_items, extract_topics
+from session_index import SessionIndex
+from storage import INDEX_PATH, SESSIONS_ARCHIVE, atomic_write_json, read_json
+
+REPROCESS_STATE_PATH = os.path.join(INDEX_PATH, 'reprocess_state.json')
+
+def _conversation_text(session_data: Dict) -> str:
+    return "\n".join(f"{msg.get('author', 'unknown')}: {msg.get('content', '')}" for msg in session_data.get('messages', []))
+
+def _apply_insights(session_data: Dict, insights: Dict) -> Dict:
+    """
+    Merge recomputed insights into a session, deriving its primary topic
+    """
+    ai_insights = {**(session_data.get('ai_insights') or {}), **insights}
+    session_data['ai_insights'] = ai_insights
+
+    topics = ai_insights.get('topics') or []
+    session_data['primary_topic'] = Counter(topics).most_common(1)[0][0] if topics else None
+    return session_data
+
+class BudgetExhausted(Exception):
+    """
+    Raised when the token budget cannot cover the next model call
+    """
+
+def _load_session(source: str, cold_location: Optional[Dict]) -> Dict:
+    if cold_location:
+        return loads(read_cold(source, cold_location))
+    return load_file(source)
+
+def reprocess_local(job: Tuple[str, Optional[Dict], str]) -> Optional[Dict]:
+    """
+    Re-run local extraction on one session and write it back atomically
+
+    Runs in worker processes: only paths and the small result cross the
+    process boundary.
+
+    Args:
+        job: (hot file path or cold segment directory, cold location or None, path to write to)
+
+    Returns:
+        Updated index fields ({'topics', 'primary_topic'}), or None if unreadable
+    """
+    source, cold_location, target = job
+    try:
+        session_data = _load_session(source, cold_location)
+    except (OSError, ValueError):
+        return None
+
+    text = _conversation_text(session_data)
+    session_data = _apply_insights(session_data, {
+        'topics': extract_topics(text),
+        'action_items': extract_action_items(text)
+    })
+    dump_file(target, session_data, atomic=True)
+
+    return {'topics': session_data['ai_insights']['topics'], 'primary_topic': session_data['primary_topic']}
+
+class Reprocessor:
+    """
+    Recompute insights for archived sessions
+
+    Walks the session index in pages (oldest first) and checkpoints the
+    position after every page, so an interrupted run resumes where it
+    stopped. Local extraction (topic vocabulary, action item markers) runs
+    in a process pool; model-based insights run through a bounded async
+    pool and stop once the TokenManager budget is exhausted. Every session
+    is written back atomically and its index record is updated. Cold
+    sessions are rewritten into the hot archive (retention tiers them
+    again).
+    """
+    def __init__(
+        self,
+        session_index: SessionIndex,
+        cold_store: ColdStore,
+        sessions_path: str = SESSIONS_ARCHIVE,
+        state_path: str = REPROCESS_STATE_PATH
+    ):
+        """
+        Initialize Reprocessor
+
+        Args:
+            session_index: Session index to walk and update
+            cold_store: Cold tier used to read archived sessions
+            sessions_path: Hot session archive directory
+            state_path: Checkpoint file
+        """
+        self.session_index = session_index
+        self.cold_store = cold_store
+        self.sessions_path = sessions_path
+        self.state_path = state_path
+
+    def _job(self, record: Dict) -> Tuple[str, Optional[Dict], str]:
+        target = os.path.join(self.sessions_path, record['filename'])
+        if record.get('cold'):
+            return self.cold_store.cold_path, record['cold'], target
+        return target, None, target
+
+    def _updated(self, record: Dict, fields: Dict) -> Dict:
+        updated = {**record, **fields}
+        if updated.pop('cold', None):
+            self.cold_store.discard(record)
+        return updated
+
+    def _load_state(self, restart: bool) -> Dict:
+        state = None if restart else read_json(self.state_path)
+        if state and state.get('completed_at'):
+            state = None
+        return state or {'cursor': None, 'processed': 0, 'failed': 0, 'started_at': time.time()}
+
+    def _report(self, state: Dict, started: float, done_this_run: int):
+        elapsed = max(time.monotonic() - started, 1e-9)
+        rate = done_this_run / elapsed
+        remaining = max(len(self.session_index) - state['processed'] - state['failed'], 0)
+        eta = f"{remaining / rate:.0f}s" if rate else '?'
+        print(f"{state['processed']} sessions reprocessed ({state['failed']} failed), {rate:.1f} sessions/s, ETA {eta}")
+
+    def run_local(self, workers: Optional[int] = None, batch_size: int = 500, restart: bool = False) -> Dict:
+        """
+        Recompute topics, action items and primary topics with the local extractors
+
+        Args:
+            workers: Worker processes (defaults to the CPU count)
+            batch_size: Sessions per checkpointed page
+            restart: Ignore the checkpoint and start from the oldest session
+
+        Returns:
+            Final checkpoint state
+        """
+        state = self._load_state(restart)
+        started, done_this_run = time.monotonic(), 0
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            while True:
+                records = self.session_index.scan(state['cursor'], batch_size)
+                if not records:
+                    break
+
+                results = pool.map(reprocess_local, [self._job(record) for record in records], chunksize=16)
+                updates = []
+                for record, fields in zip(records, results):
+                    if fields is None:
+                        state['failed'] += 1
+                    else:
+                        updates.append(self._updated(record, fields))
+
+                self.session_index.put_many(updates)
+                state['processed'] += len(updates)
+                state['cursor'] = [records[-1].get('timestamp') or '', records[-1]['id']]
+                atomic_write_json(self.state_path, state, indent=None)
+
+                done_this_run += len(records)
+                self._report(state, started, done_this_run)
+
+        state['cursor'] = None
+        state['completed_at'] = time.time()
+        atomic_write_json(self.state_path, state, indent=None)
+        return state
+
+    async def run_model(
+        self,
+        generator: AIInsightGenerator,
+        insight_level: str = 'standard',
+        concurrency: Optional[int] = None,
+        batch_size: int = 100,
+        restart: bool = False
+    ) -> Dict:
+        """
+        Regenerate model insights, stopping when the token budget runs out
+
+        Sessions whose call fails keep their stored insights and count as
+        failed.
+
+        Args:
+            generator: Insight generator (with a model provider and a TokenManager)
+            insight_level: Depth of AI insights
+            concurrency: Maximum concurrent model calls (the provider's max_concurrency if omitted)
+            batch_size: Sessions per checkpointed page
+            restart: Ignore the checkpoint and start from the oldest session
+
+        Returns:
+            Final checkpoint state ('budget_exhausted' set if stopped early)
+        """
+        if generator.provider is None:
+            raise ValueError("No AI model configured")
+
+        loop = asyncio.get_running_loop()
+        limit = asyncio.Semaphore(concurrency or generator.provider.max_concurrency)
+        state = self._load_state(restart)
+        started, done_this_run = time.monotonic(), 0
+
+        # Sessions past the checkpoint finished by a run the budget stopped
+        ahead = set(state.get('ahead', []))
+
+        async def reprocess(record: Dict) -> Optional[Dict]:
+            if record['id'] in ahead:
+                return record
+            async with limit:
+                source, cold_location, target = self._job(record)
+                try:
+                    session_data = await loop.run_in_executor(None, _load_session, source, cold_location)
+                except (OSError, ValueError):
+                    return None
+
+                messages = session_data.get('messages', [])
+                if not generator.can_process(messages, insight_level):
+                    raise BudgetExhausted()
+
+                insights = await generator.generate_insights(messages, insight_level)
+                if 'usage' not in insights:
+                    # Error or budget placeholder: keep the stored insights
+                    if not generator.can_process(messages, insight_level):
+                        raise BudgetExhausted()
+                    return None
+
+                session_data = _apply_insights(session_data, insights)
+                await loop.run_in_executor(None, lambda: dump_file(target, session_data, atomic=True))
+                return self._updated(record, {
+                    'topics': insights.get('topics', []),
+                    'primary_topic': session_data['primary_topic']
+                })
+
+        while True:
+            records = self.session_index.scan(state['cursor'], batch_size)
+            if not records:
+                state['cursor'] = None
+                state['completed_at'] = time.time()
+                break
+
+            results = await asyncio.gather(*(reprocess(record) for record in records), return_exceptions=True)
+
+            # Checkpoint up to the first session the budget did not cover;
+            # sessions finished after it are indexed and remembered in `ahead`
+            updates, exhausted = [], False
+            for record, result in zip(records, results):
+                if isinstance(result, BudgetExhausted):
+                    exhausted = True
+                elif exhausted:
+                    if isinstance(result, dict) and record['id'] not in ahead:
+                        updates.append(result)
+                        ahead.add(record['id'])
+                    continue
+                elif record['id'] in ahead:
+                    ahead.discard(record['id'])
+                elif result is None or isinstance(result, Exception):
+                    state['failed'] += 1
+                else:
+                    updates.append(result)
+                if not exhausted:
+                    state['cursor'] = [record.get('timestamp') or '', record['id']]
+                    done_this_run += 1
+
+            self.session_index.put_many(updates)
+            state['processed'] += len(updates)
+            state['ahead'] = sorted(ahead)
+            atomic_write_json(self.state_path, state, indent=None)
+            self._report(state, started, done_this_run)
+
+            if exhausted:
+                state['budget_exhausted'] = True
+                break
+
+        atomic_write_json(self.state_path, state, indent=None)
+        return state
+
+def main():
+    """
+    Recompute insights over the session archive
+    """
+    parser = argparse.ArgumentParser(description='SessionTrack insight reprocessing')
+    parser.add_argument('--model', action='store_true', help='Regenerate model insights (default: local extraction only)')
+    parser.add_argument('--workers', type=int, help='Worker processes for local extraction')
+    parser.add_argument('--provider', choices=PROVIDERS, default=MODEL_PROVIDER, help='Model provider for --model')
+    parser.add_argument('--concurrency', type=int, help='Concurrent model calls (default: MODEL_CONCURRENCY)')
+    parser.add_argument('--budget', type=float, default=50.0, help='Token budget (USD) for model calls')
+    parser.add_argument('--insight-level', default='standard', help='Insight level for model calls')
+    parser.add_argument('--batch-size', type=int, default=500, help='Sessions per checkpoint')
+    parser.add_argument('--restart', action='store_true', help='Ignore the checkpoint and start over')
+    args = parser.parse_args()
+
+    session_index = SessionIndex()
+    reprocessor = Reprocessor(session_index, ColdStore(session_index))
+
+    if args.model:
+        generator = AIInsightGenerator(TokenManager(args.budget), provider=create_provider(args.provider))
+        try:
+            state = asyncio.run(reprocessor.run_model(
+                generator, args.insight_level, args.concurrency, args.batch_size, args.restart
+            ))
+        except ValueError as e:
+            parser.error(str(e))
+    else:
+        state = reprocessor.run_local(args.workers, args.batch_size, args.restart)
+
+    print(f"Reprocessing {'stopped (budget exhausted)' if state.get('budget_exhausted') else 'complete'}: "
+          f"{state['processed']} sessions, {state['failed']} failed")
+
+if __name__ == "__main__":
+    main()
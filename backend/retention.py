@@ -0,0 +1,419 @@
+#!/usr/bin/env python3
+import os
+import fcntl
+import bisect
+import asyncio
+import argparse
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional
+
+from cold_storage import ColdStore, parse_timestamp
+from project_manager import ProjectManager
+from serialization import load_file, loads
+from session_index import SessionIndex
+from storage import INDEX_PATH, atomic_write_json, gzip_variant_path, read_json, session_id_from_path
+
+RETENTION_POLICY_PATH = os.getenv('RETENTION_POLICY_PATH', os.path.join(INDEX_PATH, 'retention_policy.json'))
+RETENTION_BATCH_SIZE = int(os.getenv('RETENTION_BATCH_SIZE', '200'))
+RETENTION_INTERVAL = float(os.getenv('RETENTION_INTERVAL', '30'))
+
+RETENTION_ACTIONS = ('delete', 'tier')
+RULE_MATCH_FIELDS = ('project_id', 'project', 'source')
+
+def _empty_totals() -> Dict:
+    return {
+        'scanned': 0,
+        'deleted': 0,
+        'tiered': 0,
+        'missing': 0,
+        'links_pruned': 0,
+        'bytes_reclaimed': 0
+    }
+
+@dataclass(slots=True)
+class RetentionRule:
+    max_age_days: float
+    action: str = 'delete'
+    project_id: Optional[str] = None
+    project: Optional[str] = None
+    source: Optional[str] = None
+
+    def __post_init__(self):
+        if self.action not in RETENTION_ACTIONS:
+            raise ValueError(f"Invalid action {self.action!r}, expected one of {', '.join(RETENTION_ACTIONS)}")
+        if not isinstance(self.max_age_days, (int, float)) or self.max_age_days < 0:
+            raise ValueError("RetentionRule.max_age_days must be a non-negative number")
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'RetentionRule':
+        """
+        Validate and build a rule
+
+        Args:
+            data: Raw rule ({'max_age_days', 'action'?, 'project_id'?, 'project'?, 'source'?})
+
+        Returns:
+            RetentionRule instance
+        """
+        if not isinstance(data, dict):
+            raise ValueError(f"RetentionRule must be an object, got {type(data).__name__}")
+        unknown = set(data) - {'max_age_days', 'action', *RULE_MATCH_FIELDS}
+        if unknown:
+            raise ValueError(f"Unknown RetentionRule fields: {', '.join(sorted(unknown))}")
+        if 'max_age_days' not in data:
+            raise ValueError("RetentionRule.max_age_days is required")
+        return cls(**data)
+
+    def matches(self, record: Dict) -> bool:
+        """
+        Whether the rule applies to an indexed session (unset fields match anything)
+        """
+        return all(
+            getattr(self, field) is None or record.get(field) == getattr(self, field)
+            for field in RULE_MATCH_FIELDS
+        )
+
+def load_policy(path: str = RETENTION_POLICY_PATH) -> List[RetentionRule]:
+    """
+    Load retention rules ({"rules": [...]}); the first matching rule applies
+
+    Args:
+        path: Policy file path
+
+    Returns:
+        List of rules (empty if the file does not exist: keep everything)
+    """
+    policy = read_json(path, {'rules': []})
+    return [RetentionRule.from_dict(rule) for rule in policy.get('rules', [])]
+
+class RetentionEngine:
+    """
+    Incremental retention and garbage collection
+
+    Each `run_batch` call does a bounded amount of work, resuming from a
+    checkpoint (<index>/retention_state.json):
+
+    - the next page of the session index (oldest first): sessions past the
+      age of their first matching rule are deleted or moved to the cold
+      tier, and index entries whose file has disappeared are dropped;
+    - the next page of projects (from a listing taken once per pass over
+      the projects): `sessions` entries and links pointing at sessions that
+      are no longer indexed are pruned; deleted sessions are subtracted
+      from their projects' stats.
+
+    When a pass over the index completes, cold segments with no live
+    sessions are removed. Work only ever touches the in-memory index and
+    the files of the current page, so the API is never blocked on a full
+    archive scan. Running totals, including bytes reclaimed, are kept in
+    the checkpoint. A file lock ensures only one worker runs a batch at a
+    time (cold storage tiering runs wait for it as well).
+    """
+    def __init__(
+        self,
+        session_index: SessionIndex,
+        cold_store: ColdStore,
+        project_manager: ProjectManager,
+        rules: Optional[List[RetentionRule]] = None,
+        batch_size: int = RETENTION_BATCH_SIZE,
+        state_path: Optional[str] = None
+    ):
+        """
+        Initialize RetentionEngine
+
+        Args:
+            session_index: Session index to walk
+            cold_store: Cold tier (reads, tiering and segment collection)
+            project_manager: ProjectManager whose project files and links are pruned
+            rules: Retention rules (loaded from RETENTION_POLICY_PATH if omitted)
+            batch_size: Sessions (and projects) handled per batch
+            state_path: Checkpoint file (defaults to <index>/retention_state.json)
+        """
+        self.session_index = session_index
+        self.cold_store = cold_store
+        self.project_manager = project_manager
+        self.rules = load_policy() if rules is None else rules
+        self.batch_size = max(batch_size, 1)
+        self.state_path = state_path or os.path.join(os.path.dirname(session_index.log_path), 'retention_state.json')
+        self._task: Optional[asyncio.Task] = None
+        self._projects: Optional[List[str]] = None
+
+    def _load_state(self) -> Dict:
+        state = read_json(self.state_path) or {}
+        state.setdefault('session_cursor', None)
+        state.setdefault('project_cursor', None)
+        state.setdefault('passes', 0)
+        state.setdefault('last_pass_completed', None)
+        state['totals'] = {**_empty_totals(), **state.get('totals', {})}
+        return state
+
+    def report(self) -> Dict:
+        """
+        Progress and running totals of the retention engine
+        """
+        state = self._load_state()
+        return {
+            'rules': len(self.rules),
+            'passes': state['passes'],
+            'last_pass_completed': state['last_pass_completed'],
+            'totals': state['totals']
+        }
+
+    def rule_for(self, record: Dict) -> Optional[RetentionRule]:
+        """
+        First rule matching an indexed session
+        """
+        for rule in self.rules:
+            if rule.matches(record):
+                return rule
+        return None
+
+    # Sessions
+
+    def _session_data(self, record: Dict) -> Dict:
+        # Full data (with AI usage) for the project stats, else the index record
+        try:
+            if record.get('cold'):
+                return loads(self.cold_store.read(record['cold'])) or record
+            return load_file(os.path.join(self.cold_store.sessions_path, record['filename'])) or record
+        except (OSError, ValueError):
+            return record
+
+    def _delete_session(self, record: Dict) -> int:
+        links = self.project_manager.link_index.projects_for_session(record['id'])
+        session_data = self._session_data(record) if links else record
+        reclaimed = 0
+        if not record.get('cold'):
+            path = os.path.join(self.cold_store.sessions_path, record['filename'])
+            for stale in (path, gzip_variant_path(path)):
+                try:
+                    reclaimed += os.stat(stale).st_size
+                    os.unlink(stale)
+                except FileNotFoundError:
+                    pass
+        else:
+            # Segment space is reclaimed once the whole segment is dead
+            self.cold_store.discard(record)
+
+        self.session_index.remove(record['id'])
+        for link in links:
+            self.project_manager.remove_sessions_from_project(link['project_id'], [record['id']], [session_data])
+        self.project_manager.link_index.remove_session(record['id'])
+        return reclaimed
+
+    def _sessions_batch(self, state: Dict, totals: Dict, now: datetime) -> bool:
+        records = self.session_index.scan(state['session_cursor'], self.batch_size)
+        to_tier = []
+
+        for record in records:
+            totals['scanned'] += 1
+
+            if not record.get('cold') and not os.path.exists(os.path.join(self.cold_store.sessions_path, record['filename'])):
+                # Re-read the record: the file may have moved since the scan
+                # (tiered or deleted through the API)
+                record = self.session_index.get(record['id'])
+                if record is None:
+                    continue
+                if not record.get('cold') and not os.path.exists(os.path.join(self.cold_store.sessions_path, record['filename'])):
+                    # Index entry for a file removed outside the API
+                    self._delete_session(record)
+                    totals['missing'] += 1
+                    continue
+
+            rule = self.rule_for(record)
+            timestamp = parse_timestamp(record.get('timestamp'))
+            if rule is None or timestamp is None or now - timestamp < timedelta(days=rule.max_age_days):
+                continue
+
+            if rule.action == 'delete':
+                totals['bytes_reclaimed'] += self._delete_session(record)
+                totals['deleted'] += 1
+            elif not record.get('cold'):
+                to_tier.append(record)
+
+        if to_tier:
+            # Tier only sessions still hot by their current index record
+            to_tier = [
+                record for record in map(self.session_index.get, (r['id'] for r in to_tier))
+                if record and not record.get('cold')
+            ]
+            hot_bytes = 0
+            for record in to_tier:
+                try:
+                    hot_bytes += os.stat(os.path.join(self.cold_store.sessions_path, record['filename'])).st_size
+                except FileNotFoundError:
+                    pass
+            tiered = self.cold_store.move(to_tier)
+            cold_bytes = sum(
+                record['cold']['length'] for record in map(self.session_index.get, (r['id'] for r in to_tier))
+                if record and record.get('cold')
+            )
+            totals['tiered'] += tiered
+            totals['bytes_reclaimed'] += max(hot_bytes - cold_bytes, 0)
+
+        if len(records) < self.batch_size:
+            state['session_cursor'] = None
+            return True
+
+        last = records[-1]
+        state['session_cursor'] = [last.get('timestamp') or '', last['id']]
+        return False
+
+    # Projects and links
+
+    def _project_ids(self, cursor: Optional[str]) -> List[str]:
+        # Listed once per pass over the projects (and after a restart), not per batch
+        if cursor is None or self._projects is None:
+            link_index = self.project_manager.link_index
+            self._projects = sorted(
+                {name[:-len('.json')] for name in os.listdir(self.project_manager.base_path) if name.endswith('.json')} |
+                {name[:-len('.json')] for name in os.listdir(link_index.projects_dir) if name.endswith('.json')}
+            )
+        return self._projects
+
+    def _projects_batch(self, state: Dict, totals: Dict):
+        link_index = self.project_manager.link_index
+        cursor = state['project_cursor']
+        project_ids = self._project_ids(cursor)
+        start = bisect.bisect_right(project_ids, cursor) if cursor is not None else 0
+        page = project_ids[start:start + self.batch_size]
+
+        for project_id in page:
+            project_data = self.project_manager.get_project(project_id)
+            entries = [
+                entry.get('session_id') or session_id_from_path(entry.get('path') or '')
+                for entry in (project_data or {}).get('sessions', [])
+            ]
+            # Entries without a session id (not pointing at a session file) are left alone
+            linked = [
+                session_id
+                for session_id in entries + [link['session_id'] for link in link_index.sessions_for_project(project_id, 0, 2 ** 31)[1]]
+                if session_id
+            ]
+
+            dangling = {session_id for session_id in linked if self.session_index.get(session_id) is None}
+            if project_data is None:
+                # Project deleted: every link of it is dangling
+                dangling |= set(linked)
+
+            if dangling:
+                # Gone without passing through retention; stats counted the project's entries when linked
+                self.project_manager.remove_sessions_from_project(
+                    project_id, list(dangling), [{'id': session_id} for session_id in dangling & set(entries)]
+                )
+                totals['links_pruned'] += len(dangling)
+
+        state['project_cursor'] = page[-1] if len(page) == self.batch_size else None
+
+    # Driving
+
+    def run_batch(self, now: Optional[datetime] = None) -> Optional[Dict]:
+        """
+        Run one bounded batch of retention work
+
+        Args:
+            now: Reference time (defaults to now)
+
+        Returns:
+            Totals of this batch, or None if another process is running one
+        """
+        os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+        with open(f"{self.state_path}.lock", 'w') as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return None
+
+            state = self._load_state()
+            totals = _empty_totals()
+            now = now or datetime.now(timezone.utc)
+
+            if self._sessions_batch(state, totals, now):
+                totals['bytes_reclaimed'] += self.cold_store.collect_segments()
+                state['passes'] += 1
+                state['last_pass_completed'] = now.isoformat()
+            self._projects_batch(state, totals)
+
+            for key, value in totals.items():
+                state['totals'][key] += value
+            atomic_write_json(self.state_path, state, indent=None)
+
+            return totals
+
+    def run_pass(self, now: Optional[datetime] = None) -> Dict:
+        """
+        Run batches until a full pass over the index has completed
+
+        Args:
+            now: Reference time (defaults to now)
+
+        Returns:
+            Totals of the pass
+        """
+        totals = _empty_totals()
+        passes = self._load_state()['passes']
+        while True:
+            batch = self.run_batch(now)
+            if batch is None:
+                break
+            for key, value in batch.items():
+                totals[key] += value
+            if self._load_state()['passes'] > passes:
+                break
+        return totals
+
+    async def _loop(self, interval: float, ready: Callable[[], bool]):
+        loop = asyncio.get_running_loop()
+        while not ready():
+            await asyncio.sleep(1.0)
+        while True:
+            try:
+                batch = await loop.run_in_executor(None, self.run_batch)
+            except Exception as e:
+                print(f"Retention batch failed: {e}")
+                batch = None
+            # Keep going while there is work; idle between passes
+            finished_pass = batch is None or self._load_state()['session_cursor'] is None
+            await asyncio.sleep(interval if finished_pass else min(interval, 1.0))
+
+    async def start(self, interval: float = RETENTION_INTERVAL, ready: Callable[[], bool] = lambda: True):
+        """
+        Run retention batches in the background
+
+        Args:
+            interval: Seconds between passes
+            ready: Batches start once this returns True (a partially loaded
+                index would make every link look dangling)
+        """
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop(interval, ready))
+
+    async def stop(self):
+        """
+        Stop the background loop
+        """
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+def main():
+    """
+    Run a full retention pass (or report progress)
+    """
+    parser = argparse.ArgumentParser(description='SessionTrack retention and garbage collection')
+    parser.add_argument('--report', action='store_true', help='Only print progress and totals')
+    args = parser.parse_args()
+
+    session_index = SessionIndex()
+    engine = RetentionEngine(session_index, ColdStore(session_index), ProjectManager())
+
+    if args.report:
+        print(engine.report())
+        return
+
+    totals = engine.run_pass()
+    print(f"Retention pass: {totals}")
+
+if __name__ == "__main__":
+    main()
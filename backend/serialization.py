@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+JSON encoding/decoding for storage and the API
+
+Uses the fastest installed backend: orjson, then msgspec, then the
+standard library. All backends produce interchangeable JSON, so files
+written by one can be read by any other.
+"""
+import os
+import json
+import tempfile
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+if orjson is not None:
+    BACKEND = 'orjson'
+elif msgspec is not None:
+    BACKEND = 'msgspec'
+else:
+    BACKEND = 'json'
+
+def _default(obj: Any) -> Any:
+    """
+    Fallback encoder for objects the backends do not handle natively
+    """
+    to_dict = getattr(obj, 'to_dict', None)
+    if callable(to_dict):
+        return to_dict()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+if msgspec is not None:
+    _msgspec_encoder = msgspec.json.Encoder(enc_hook=_default)
+    _msgspec_decoder = msgspec.json.Decoder()
+
+def dumps(obj: Any, indent: bool = False) -> bytes:
+    """
+    Serialize an object to JSON bytes
+
+    Args:
+        obj: Object to serialize
+        indent: Pretty-print with 2-space indentation (as stored on disk)
+
+    Returns:
+        UTF-8 encoded JSON
+    """
+    if orjson is not None:
+        option = orjson.OPT_INDENT_2 if indent else 0
+        return orjson.dumps(obj, default=_default, option=option)
+
+    if msgspec is not None:
+        data = _msgspec_encoder.encode(obj)
+        return msgspec.json.format(data, indent=2) if indent else data
+
+    return json.dumps(
+        obj,
+        default=_default,
+        indent=2 if indent else None,
+        separators=None if indent else (',', ':'),
+        ensure_ascii=False
+    ).encode('utf-8')
+
+def loads(data: Union[bytes, str]) -> Any:
+    """
+    Deserialize JSON bytes or text
+
+    Args:
+        data: JSON document
+
+    Returns:
+        Decoded object
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+
+    if msgspec is not None:
+        return _msgspec_decoder.decode(data)
+
+    return json.loads(data)
+
+def load_file(path: str) -> Any:
+    """
+    Read and decode a JSON file
+
+    Args:
+        path: File path
+
+    Returns:
+        Decoded object
+    """
+    with open(path, 'rb') as f:
+        return loads(f.read())
+
+def dump_file(path: str, obj: Any, indent: bool = True, atomic: bool = False, fsync: bool = False):
+    """
+    Encode an object and write it to a JSON file
+
+    Args:
+        path: Destination file path
+        obj: Object to serialize
+        indent: Pretty-print the file (the archive format)
+        atomic: Write to a temp file and rename, so readers never see a partial file
+        fsync: Flush the file to stable storage before returning
+    """
+    data = dumps(obj, indent=indent)
+
+    if not atomic:
+        with open(path, 'wb') as f:
+            f.write(data)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        return
+
+    directory = os.path.dirname(path) or '.'
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
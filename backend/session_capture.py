@@ -1,9 +1,61 @@
 #!/usr/bin/env python3
 import os
 import json
-import uuid
-from datetime import datetime, timezone
-from typing import Dict, List, Optional, Union
+import time
+import asyncio
+from typing import Dict, List, Optional, Tuple, Union
+
+import events
+from capture_writer import CaptureWriter
+from cold_storage import ColdStore
+from metrics import AI_COST, AI_INSIGHT_SECONDS, AI_PROMPT_TOKENS_SAVED, AI_TOKENS, CAPTURE_SECONDS
+from model_providers import CONVERSATION_MARKER, ModelProvider, as_provider
+from models import Message, Session
+from profiling import profiled
+from prompt_compression import PROMPT_COMPRESSION, CompressionResult, PromptCompressor
+from project_manager import ProjectManager
+from serialization import load_file
+from session_index import SessionIndex
+from storage import SESSIONS_ARCHIVE, session_filename
+from token_ledger import TokenLedger
+
+# Skip capturing conversations whose messages match an already stored session
+CAPTURE_DEDUP = os.getenv('CAPTURE_DEDUP', '1') != '0'
+
+# Vocabularies of the local extractors (changing them? see reprocess.py)
+TOPIC_VOCABULARY = [
+    'project management', 'ai', 'technology', 
+    'development', 'strategy', 'automation'
+]
+ACTION_MARKERS = ['should', 'need to', 'to do', 'next step', 'action item']
+
+def extract_topics(text: str) -> List[str]:
+    """
+    Extract key topics from text
+    
+    Args:
+        text: Text to scan
+    
+    Returns:
+        List of extracted topics
+    """
+    text = text.lower()
+    return [topic for topic in TOPIC_VOCABULARY if topic.lower() in text]
+
+def extract_action_items(text: str) -> List[str]:
+    """
+    Extract action items from text
+    
+    Args:
+        text: Text to scan
+    
+    Returns:
+        List of extracted action items
+    """
+    return [
+        line.strip() for line in text.split('\n') 
+        if any(marker in line.lower() for marker in ACTION_MARKERS)
+    ]
 
 class TokenManager:
     """
@@ -20,133 +72,301 @@ class TokenManager:
         'comprehensive': 1.0  # Full detailed analysis
     }
     
-    def __init__(self, monthly_budget: float = 50.00):
+    def __init__(self, monthly_budget: float = 50.00, ledger: Optional[TokenLedger] = None):
         """
         Initialize token manager with monthly budget
         
         Args:
             monthly_budget: Maximum monthly spend on AI processing
+            ledger: Spend ledger shared with other processes (spend is tracked in memory if omitted)
         """
         self.monthly_budget = monthly_budget
-        self.current_month_spend = 0.0
+        self.ledger = ledger
+        self._spend = 0.0
         self.token_cache = {}
     
-    def calculate_token_cost(self, input_tokens: int, output_tokens: int) -> float:
+    @property
+    def current_month_spend(self) -> float:
+        return self.ledger.spend() if self.ledger else self._spend
+    
+    def calculate_token_cost(
+        self,
+        input_tokens: int,
+        output_tokens: int,
+        token_costs: Optional[Dict[str, float]] = None
+    ) -> float:
         """
         Calculate cost of token processing
         
         Args:
             input_tokens: Number of input tokens
             output_tokens: Number of output tokens
+            token_costs: Per-token prices of the provider (TOKEN_COSTS if omitted)
         
         Returns:
             Total processing cost
         """
-        input_cost = input_tokens * self.TOKEN_COSTS['input']
-        output_cost = output_tokens * self.TOKEN_COSTS['output']
+        token_costs = token_costs or self.TOKEN_COSTS
+        input_cost = input_tokens * token_costs['input']
+        output_cost = output_tokens * token_costs['output']
         return input_cost + output_cost
     
-    def can_process(self, input_tokens: int, output_tokens: int) -> bool:
+    def can_process(
+        self,
+        input_tokens: int,
+        output_tokens: int,
+        token_costs: Optional[Dict[str, float]] = None
+    ) -> bool:
         """
         Determine if processing is allowed based on budget
         
         Args:
             input_tokens: Number of input tokens
             output_tokens: Number of output tokens
+            token_costs: Per-token prices of the provider (TOKEN_COSTS if omitted)
         
         Returns:
             Boolean indicating if processing is allowed
         """
-        potential_cost = self.calculate_token_cost(input_tokens, output_tokens)
+        potential_cost = self.calculate_token_cost(input_tokens, output_tokens, token_costs)
         return (self.current_month_spend + potential_cost) <= self.monthly_budget
     
-    def record_token_usage(self, input_tokens: int, output_tokens: int):
+    def record_token_usage(
+        self,
+        input_tokens: int,
+        output_tokens: int,
+        token_costs: Optional[Dict[str, float]] = None
+    ) -> float:
         """
         Record token usage and update monthly spend
         
         Args:
             input_tokens: Number of input tokens
             output_tokens: Number of output tokens
+            token_costs: Per-token prices of the provider (TOKEN_COSTS if omitted)
+        
+        Returns:
+            Cost of the usage
         """
-        self.current_month_spend += self.calculate_token_cost(input_tokens, output_tokens)
+        cost = self.calculate_token_cost(input_tokens, output_tokens, token_costs)
+        if self.ledger:
+            self.ledger.record(cost, input_tokens, output_tokens)
+        else:
+            self._spend += cost
+        
+        AI_TOKENS.inc(input_tokens, direction='input')
+        AI_TOKENS.inc(output_tokens, direction='output')
+        AI_COST.inc(cost)
+        return cost
 
 class AIInsightGenerator:
     """
     Generates AI-powered insights with intelligent token management
     """
-    def __init__(self, token_manager: TokenManager, ai_model=None):
+    # Instruction and response length limit per insight level
+    INSIGHT_PROMPTS = {
+        'minimal': "Provide a very brief, high-level summary.",
+        'standard': "Provide a balanced summary with key points.",
+        'comprehensive': "Provide a detailed, in-depth analysis."
+    }
+    OUTPUT_TOKENS = {
+        'minimal': 128,
+        'standard': 500,
+        'comprehensive': 1000
+    }
+    
+    def __init__(
+        self, 
+        token_manager: TokenManager, 
+        ai_model=None, 
+        provider: Optional[ModelProvider] = None,
+        compressor: Optional[PromptCompressor] = None
+    ):
         """
         Initialize AI Insight Generator
         
         Args:
             token_manager: TokenManager instance
-            ai_model: AI model for generating insights (optional)
+            ai_model: Gemini-style model object (optional, wrapped as a provider)
+            provider: Model provider (see model_providers.py; takes precedence over ai_model)
+            compressor: Transcript compression before model calls (default per PROMPT_COMPRESSION)
         """
         self.token_manager = token_manager
-        self.ai_model = ai_model
+        self.provider = as_provider(provider or ai_model)
+        if compressor is None and PROMPT_COMPRESSION:
+            compressor = PromptCompressor(keep_markers=ACTION_MARKERS)
+        self.compressor = compressor
+    
+    @property
+    def ai_model(self) -> Optional[ModelProvider]:
+        return self.provider
+    
+    @ai_model.setter
+    def ai_model(self, model):
+        self.provider = as_provider(model)
+    
+    def build_prompt(self, conversation: str, insight_level: str = 'standard') -> str:
+        """
+        Build the insight prompt for a conversation
+        
+        Args:
+            conversation: Full conversation text
+            insight_level: Depth of insight generation
+        
+        Returns:
+            Prompt text
+        """
+        instruction = self.INSIGHT_PROMPTS.get(insight_level, self.INSIGHT_PROMPTS['standard'])
+        return f"{instruction}\n\n{CONVERSATION_MARKER}{conversation}"
+    
+    def compress(self, conversation: Union[str, List]) -> Tuple[str, Optional[CompressionResult]]:
+        """
+        Prepare a conversation for the model (see prompt_compression.py)
+        
+        Args:
+            conversation: Conversation text, or its messages
+        
+        Returns:
+            Tuple of (text to send, compression stats or None if compression is off)
+        """
+        if self.compressor is None:
+            if not isinstance(conversation, str):
+                conversation = "\n".join(
+                    f"{msg.get('author', 'unknown')}: {msg.get('content', '')}" if isinstance(msg, dict) 
+                    else f"{msg.author}: {msg.content}" 
+                    for msg in conversation
+                )
+            return conversation, None
+        result = self.compressor.compress(conversation)
+        return result.text, result
+    
+    def output_tokens(self, insight_level: str = 'standard') -> int:
+        """
+        Response length limit (and budget reservation) of an insight level
+        """
+        return self.OUTPUT_TOKENS.get(insight_level, self.OUTPUT_TOKENS['standard'])
+    
+    def can_process(self, conversation: Union[str, List], insight_level: str = 'standard') -> bool:
+        """
+        Check the budget for one insight call, before making it
+        
+        Args:
+            conversation: Full conversation text, or its messages (compressed first)
+            insight_level: Depth of insight generation
+        
+        Returns:
+            Boolean indicating if the call fits the budget
+        """
+        if self.provider is None:
+            return False
+        return self._can_process(self.compress(conversation)[0], insight_level)
+    
+    def _can_process(self, text: str, insight_level: str) -> bool:
+        input_tokens = self.provider.estimate_tokens(self.build_prompt(text, insight_level))
+        return self.token_manager.can_process(input_tokens, self.output_tokens(insight_level), self.provider.token_costs)
     
     async def generate_insights(
         self, 
-        conversation: str, 
+        conversation: Union[str, List], 
         insight_level: str = 'standard'
     ) -> Dict[str, Union[str, List[str]]]:
         """
         Generate AI insights with token-aware processing
         
+        The conversation is compressed before the budget check and the
+        call; `prompt_compression` in the result reports the tokens saved.
+        
         Args:
-            conversation: Full conversation text
+            conversation: Full conversation text, or its messages
             insight_level: Depth of insight generation
         
         Returns:
             Dictionary of AI-generated insights
         """
-        # Estimate tokens (rough approximation)
-        input_tokens = len(conversation.split()) * 1.3  # Average token estimation
+        with AI_INSIGHT_SECONDS.time(level=insight_level):
+            return await self._generate_insights(conversation, insight_level)
+    
+    async def generate_insights_many(
+        self,
+        conversations: List[Union[str, List]],
+        insight_level: str = 'standard'
+    ) -> List[Dict[str, Union[str, List[str]]]]:
+        """
+        Generate insights for several conversations concurrently
+        
+        Calls are bounded by the provider's `max_concurrency`.
+        
+        Args:
+            conversations: Conversation texts (or messages)
+            insight_level: Depth of insight generation
+        
+        Returns:
+            One insights dictionary per conversation, in order
+        """
+        if self.provider is None:
+            return [await self.generate_insights(conversation, insight_level) for conversation in conversations]
+        
+        limit = asyncio.Semaphore(self.provider.max_concurrency)
+        
+        async def generate(conversation: Union[str, List]) -> Dict:
+            async with limit:
+                return await self.generate_insights(conversation, insight_level)
+        
+        return list(await asyncio.gather(*(generate(conversation) for conversation in conversations)))
+    
+    async def _generate_insights(self, conversation: Union[str, List], insight_level: str) -> Dict[str, Union[str, List[str]]]:
+        if not self.provider:
+            return {
+                'summary': 'No AI model configured',
+                'topics': [],
+                'action_items': []
+            }
+        
+        text, compression = self.compress(conversation)
         
         # Check budget and processing capability
-        if not self.token_manager.can_process(input_tokens, 500):
+        if not self._can_process(text, insight_level):
             return {
                 'summary': 'AI processing skipped due to token budget constraints',
                 'topics': [],
                 'action_items': []
             }
         
-        # If AI model is available, generate insights
-        if self.ai_model:
-            try:
-                # Adjust prompt based on insight level
-                insight_config = {
-                    'minimal': "Provide a very brief, high-level summary.",
-                    'standard': "Provide a balanced summary with key points.",
-                    'comprehensive': "Provide a detailed, in-depth analysis."
-                }
-                
-                prompt = f"{insight_config.get(insight_level, insight_config['standard'])}\n\nConversation:\n{conversation}"
-                
-                # Generate AI response
-                response = await self.ai_model.generate_content_async(prompt)
-                
-                # Record token usage
-                self.token_manager.record_token_usage(input_tokens, len(response.text.split()) * 1.3)
-                
-                return {
-                    'summary': response.text,
-                    'topics': self._extract_topics(response.text),
-                    'action_items': self._extract_action_items(response.text)
-                }
+        try:
+            completion = await self.provider.generate(
+                self.build_prompt(text, insight_level),
+                max_output_tokens=self.output_tokens(insight_level)
+            )
             
-            except Exception as e:
-                return {
-                    'summary': f'AI processing error: {str(e)}',
-                    'topics': [],
-                    'action_items': []
+            # Record the tokens the provider reports
+            usage = completion.usage
+            cost = self.token_manager.record_token_usage(
+                usage.input_tokens, usage.output_tokens, self.provider.token_costs
+            )
+            
+            insights = {
+                'summary': completion.text,
+                'topics': self._extract_topics(completion.text),
+                'action_items': self._extract_action_items(completion.text),
+                'usage': {
+                    'provider': self.provider.name,
+                    'input_tokens': usage.input_tokens,
+                    'output_tokens': usage.output_tokens,
+                    'estimated': usage.estimated,
+                    'cost': cost
                 }
+            }
+            if compression is not None:
+                AI_PROMPT_TOKENS_SAVED.inc(compression.tokens_saved)
+                insights['prompt_compression'] = compression.to_dict()
+            return insights
         
-        return {
-            'summary': 'No AI model configured',
-            'topics': [],
-            'action_items': []
-        }
+        except Exception as e:
+            return {
+                'summary': f'AI processing error: {str(e)}',
+                'topics': [],
+                'action_items': []
+            }
     
     def _extract_topics(self, text: str) -> List[str]:
         """
@@ -158,14 +378,7 @@ class AIInsightGenerator:
         Returns:
             List of extracted topics
         """
-        common_topics = [
-            'project management', 'ai', 'technology', 
-            'development', 'strategy', 'automation'
-        ]
-        return [
-            topic for topic in common_topics 
-            if topic.lower() in text.lower()
-        ]
+        return extract_topics(text)
     
     def _extract_action_items(self, text: str) -> List[str]:
         """
@@ -177,13 +390,7 @@ class AIInsightGenerator:
         Returns:
             List of extracted action items
         """
-        action_markers = ['should', 'need to', 'to do', 'next step', 'action item']
-        
-        lines = text.split('\n')
-        return [
-            line.strip() for line in lines 
-            if any(marker in line.lower() for marker in action_markers)
-        ]
+        return extract_action_items(text)
 
 class SessionCapture:
     """
@@ -191,8 +398,15 @@ class SessionCapture:
     """
     def __init__(
         self, 
-        base_path: str = '/root/clawd/sessions_archive',
-        monthly_ai_budget: float = 50.00
+        base_path: str = SESSIONS_ARCHIVE,
+        monthly_ai_budget: float = 50.00,
+        project_manager: Optional[ProjectManager] = None,
+        session_index: Optional[SessionIndex] = None,
+        writer: Optional[CaptureWriter] = None,
+        dedup: bool = CAPTURE_DEDUP,
+        cold_store: Optional[ColdStore] = None,
+        token_ledger: Optional[TokenLedger] = None,
+        model_provider: Optional[ModelProvider] = None
     ):
         """
         Initialize SessionCapture
@@ -200,16 +414,30 @@ class SessionCapture:
         Args:
             base_path: Directory to store session files
             monthly_ai_budget: Monthly budget for AI processing
+            project_manager: ProjectManager used to link captured sessions to projects
+            session_index: Session metadata index (created on demand if omitted)
+            writer: Group-commit writer for captured sessions (created on demand if omitted)
+            dedup: Return the stored session instead of re-capturing identical content
+            cold_store: Cold tier used to read back archived sessions (created on demand if omitted)
+            token_ledger: Shared monthly AI spend ledger (spend is tracked per process if omitted)
+            model_provider: Model provider for AI insights (insights are disabled if omitted)
         """
         self.base_path = base_path
         os.makedirs(base_path, exist_ok=True)
+        self.project_manager = project_manager
+        # An empty index is falsy (it has a length): compare with None
+        self.session_index = session_index if session_index is not None else SessionIndex()
+        self.writer = writer or CaptureWriter(self)
+        self.cold_store = cold_store or ColdStore(self.session_index, base_path)
+        self.dedup = dedup
+        self._inflight: Dict[str, asyncio.Future] = {}
         
         # Initialize token manager
-        self.token_manager = TokenManager(monthly_ai_budget)
+        self.token_manager = TokenManager(monthly_ai_budget, token_ledger)
         
-        # Initialize AI model (placeholder)
         self.ai_insight_generator = AIInsightGenerator(
-            token_manager=self.token_manager
+            token_manager=self.token_manager,
+            provider=model_provider
         )
     
     async def capture_session(
@@ -217,54 +445,174 @@ class SessionCapture:
         messages: List[Dict], 
         session_key: Optional[str] = None,
         project: Optional[str] = None,
-        insight_level: str = 'standard'
+        insight_level: str = 'standard',
+        project_id: Optional[str] = None,
+        idempotency_key: Optional[str] = None
     ) -> Dict:
         """
         Capture a conversation session with optional AI insights
         
         Args:
-            messages: List of conversation messages
+            messages: List of conversation messages ({'author', 'content', 'timestamp'?})
             session_key: Unique session identifier
             project: Associated project
             insight_level: Depth of AI insights
+            project_id: Project to link the captured session to
+            idempotency_key: Client key making retries of this capture no-ops
+        
+        Returns:
+            Captured session data (the stored session's, if this is a duplicate)
+        """
+        # Validate messages at the boundary (raises ValueError on malformed input)
+        session = Session(
+            session_key=session_key or 'unnamed',
+            project=project,
+            project_id=project_id,
+            messages=[Message.from_dict(msg) for msg in messages],
+            extra={'idempotency_key': idempotency_key} if idempotency_key else {}
+        )
+        
+        return await self.store_session(session, insight_level)
+    
+    def projects(self) -> ProjectManager:
+        """
+        ProjectManager used to link captured sessions (created on first use)
+        """
+        if self.project_manager is None:
+            self.project_manager = ProjectManager()
+        return self.project_manager
+    
+    def find_duplicate(self, session: Session, dedup: bool = True) -> Optional[Dict]:
+        """
+        Find a stored session that a new capture duplicates
+        
+        Matches on the session's idempotency key, then on its content hash.
+        
+        Args:
+            session: Session about to be stored
+            dedup: Match on the content hash too (when dedup is enabled)
+        
+        Returns:
+            Stored session data, or None
+        """
+        record = self.session_index.find_duplicate(
+            content_hash=session.content_hash() if self.dedup and dedup else None,
+            idempotency_key=session.extra.get('idempotency_key')
+        )
+        if record is None:
+            return None
+        
+        try:
+            return load_file(self.cold_store.resolve(record))
+        except FileNotFoundError:
+            return None
+    
+    @profiled('capture', lambda self, session, insight_level='standard': {
+        'session_id': session.id,
+        'total_messages': session.total_messages,
+        'project_id': session.project_id,
+        'insight_level': insight_level
+    })
+    async def store_session(self, session: Session, insight_level: str = 'standard', dedup: bool = True) -> Dict:
+        """
+        Enrich an already built session with AI insights and persist it
+        
+        Repeated captures (same idempotency key or, with dedup enabled, the
+        same normalized messages) are not stored or summarized again: the
+        already stored session is returned, and linked to the new capture's
+        project if it names another one.
+        
+        Args:
+            session: Session to store (its id and timestamp are kept)
+            insight_level: Depth of AI insights
+            dedup: Match on content as well as the idempotency key (pass False
+                for sessions whose id the client already holds)
         
         Returns:
             Captured session data
         """
-        # Generate unique session ID
-        session_id = str(uuid.uuid4())
-        timestamp = datetime.now(timezone.utc).isoformat()
+        keys = [
+            key for key in (
+                session.extra.get('idempotency_key') and f"key:{session.extra['idempotency_key']}",
+                self.dedup and dedup and session.messages and f"hash:{session.content_hash()}"
+            ) if key
+        ]
         
-        # Prepare conversation text for AI processing
-        conversation_text = "\n".join([
-            f"{msg.get('author', 'Unknown')}: {msg.get('content', '')}" 
-            for msg in messages
-        ])
+        start = time.perf_counter()
         
+        # An identical capture still being stored: share its result
+        for key in keys:
+            if key in self._inflight:
+                session_data = await self._linked(await asyncio.shield(self._inflight[key]), session.project_id)
+                CAPTURE_SECONDS.observe(time.perf_counter() - start, outcome='deduplicated')
+                return session_data
+        
+        duplicate = self.find_duplicate(session, dedup) if keys else None
+        if duplicate is not None:
+            session_data = await self._linked(duplicate, session.project_id)
+            CAPTURE_SECONDS.observe(time.perf_counter() - start, outcome='deduplicated')
+            return session_data
+        
+        stored = asyncio.get_running_loop().create_future()
+        for key in keys:
+            self._inflight[key] = stored
+        try:
+            session_data = await self._store(session, insight_level)
+        except BaseException as e:
+            stored.set_exception(e)
+            stored.exception()  # retrieved by waiters, if any
+            raise
+        else:
+            stored.set_result(session_data)
+        finally:
+            for key in keys:
+                self._inflight.pop(key, None)
+        
+        CAPTURE_SECONDS.observe(time.perf_counter() - start, outcome='stored')
+        return session_data
+    
+    async def _linked(self, session_data: Dict, project_id: Optional[str]) -> Dict:
+        """
+        Link a deduplicated session to the project of the repeated capture
+        """
+        if project_id and project_id != session_data.get('project_id'):
+            filepath = os.path.join(self.base_path, session_filename(session_data['timestamp'], session_data['id']))
+            await asyncio.get_running_loop().run_in_executor(
+                None, self.projects().add_session_to_project, project_id, filepath, session_data
+            )
+        return session_data
+    
+    async def _store(self, session: Session, insight_level: str) -> Dict:
         # Generate AI insights
-        ai_insights = await self.ai_insight_generator.generate_insights(
-            conversation_text, 
+        session.ai_insights = await self.ai_insight_generator.generate_insights(
+            session.messages, 
             insight_level
         )
         
         # Prepare session data
-        session_data = {
-            'id': session_id,
-            'session_key': session_key or 'unnamed',
-            'timestamp': timestamp,
-            'project': project,
-            'total_messages': len(messages),
-            'participants': list(set(msg.get('author', 'unknown') for msg in messages)),
-            'messages': messages,
-            'ai_insights': ai_insights
-        }
+        session_data = session.to_dict()
         
-        # Save session file
-        filename = f"{timestamp}_{session_id}.json"
-        filepath = os.path.join(self.base_path, filename)
+        # Save the session file, index it and link it to its project
+        # (batched with concurrent captures; returns once durable)
+        link_error = await self.writer.write(session_data, session_filename(session.timestamp, session.id))
         
-        with open(filepath, 'w') as f:
-            json.dump(session_data, f, indent=2)
+        captured = {
+            'id': session.id,
+            'timestamp': session.timestamp,
+            'project': session.project,
+            'project_id': session.project_id,
+            'total_messages': session.total_messages,
+            'participants': list(session.participants)
+        }
+        if link_error:
+            # Stored, but not linked to its project: reported rather than failing the capture
+            captured['link_error'] = link_error
+        events.publish('session.captured', captured)
+        events.publish('session.enriched', {
+            'id': session.id,
+            'topics': session.ai_insights.get('topics', []),
+            'action_items': session.ai_insights.get('action_items', [])
+        })
         
         return session_data
 
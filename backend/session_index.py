@@ -0,0 +1,441 @@
+#!/usr/bin/env python3
+import os
+import fcntl
+import bisect
+import threading
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from models import content_hash
+from serialization import dumps, loads
+from cold_storage import iter_cold_sessions
+from storage import COLD_ARCHIVE_PATH, INDEX_PATH, SESSIONS_ARCHIVE, read_json, session_id_from_path
+
+# Fields held by index records (answerable without opening session files)
+INDEX_FIELDS = {
+    'id', 'filename', 'timestamp', 'session_key', 'source', 'project', 'project_id',
+    'total_messages', 'participants', 'topics', 'primary_topic', 'duration_seconds',
+    'content_hash', 'idempotency_key'
+}
+
+def _duration_seconds(messages: List[Dict]) -> Optional[float]:
+    """
+    Time between the first and last timestamped message of a session
+    """
+    timestamps = [msg['timestamp'] for msg in messages if msg.get('timestamp')]
+    if len(timestamps) < 2:
+        return None
+    try:
+        start = datetime.fromisoformat(min(timestamps))
+        end = datetime.fromisoformat(max(timestamps))
+        return (end - start).total_seconds()
+    except (TypeError, ValueError):
+        return None
+
+def session_record(session_data: Dict, filename: str) -> Dict:
+    """
+    Build the index record (lightweight metadata) for a session
+
+    Args:
+        session_data: Full session data
+        filename: Session filename within the archive
+
+    Returns:
+        Index record
+    """
+    ai_insights = session_data.get('ai_insights') or {}
+    messages = session_data.get('messages', [])
+
+    return {
+        'id': session_data.get('id'),
+        'filename': filename,
+        'timestamp': session_data.get('timestamp'),
+        'session_key': session_data.get('session_key'),
+        'source': session_data.get('source'),
+        'project': session_data.get('project'),
+        'project_id': session_data.get('project_id'),
+        'total_messages': session_data.get('total_messages', len(messages)),
+        'participants': session_data.get('participants', []),
+        'topics': ai_insights.get('topics') or session_data.get('ai_topics', []),
+        'primary_topic': session_data.get('primary_topic'),
+        'duration_seconds': _duration_seconds(messages),
+        'content_hash': content_hash(
+            ((msg.get('author'), msg.get('content')) for msg in messages),
+            session_data.get('session_key'), session_data.get('project_id')
+        ),
+        'idempotency_key': session_data.get('idempotency_key')
+    }
+
+def read_log(log_path: str, offset: int = 0) -> Tuple[List[Dict], int]:
+    """
+    Read complete records appended to an index log since an offset
+
+    A trailing partial line (a concurrent append in progress) is left for
+    the next read.
+
+    Args:
+        log_path: Path of the JSONL log
+        offset: Byte offset to start reading from
+
+    Returns:
+        Tuple of (records, offset after the last complete line)
+    """
+    records, offset, _ = read_log_file(log_path, offset, None)
+    return records, offset
+
+def read_log_file(log_path: str, offset: int, inode: Optional[int]) -> Tuple[List[Dict], int, Optional[int]]:
+    """
+    Like read_log, for readers that follow the log across rewrites
+
+    The inode is taken from the opened file, so a log replaced by a
+    rebuild or compaction is never read at an offset of its predecessor.
+
+    Args:
+        log_path: Path of the JSONL log
+        offset: Byte offset to start reading from (if the log is still `inode`)
+        inode: Inode the offset refers to
+
+    Returns:
+        Tuple of (records, offset after the last complete line, inode read);
+        records start from the beginning when the inode changed
+    """
+    try:
+        with open(log_path, 'rb') as f:
+            current = os.fstat(f.fileno()).st_ino
+            if current != inode:
+                offset = 0
+            f.seek(offset)
+            data = f.read()
+    except FileNotFoundError:
+        return [], 0, None
+
+    end = data.rfind(b'\n') + 1
+    records = [loads(line) for line in data[:end].splitlines() if line.strip()]
+    return records, offset + end, current
+
+class SessionIndex:
+    """
+    Append-only metadata index of archived sessions
+
+    Writers append one JSON line per change to <index>/sessions.jsonl
+    (last write wins, `deleted` records are tombstones), so capturing a
+    session never needs the index in memory. Readers load the log once and
+    afterwards only tail newly appended lines, which keeps listing and
+    lookups independent of the archive size.
+    """
+    def __init__(self, index_path: str = INDEX_PATH):
+        """
+        Initialize SessionIndex
+
+        Args:
+            index_path: Root directory of the on-disk indexes
+        """
+        os.makedirs(index_path, exist_ok=True)
+        self.log_path = os.path.join(index_path, 'sessions.jsonl')
+        self._lock = threading.Lock()
+        self._records: Dict[str, Dict] = {}
+        self._order: List[Tuple[str, str]] = []  # (timestamp, id), ascending
+        # Sessions sharing a content hash / idempotency key, first indexed first
+        self._by_hash: Dict[str, List[str]] = {}
+        self._by_key: Dict[str, List[str]] = {}
+        self._offset = 0
+        self._inode = None
+
+    def _append(self, records: List[Dict], fsync: bool = False):
+        payload = b''.join(dumps(record) + b'\n' for record in records)
+        while True:
+            with open(self.log_path, 'ab') as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    if not self._is_current(f):
+                        # Replaced by a rewrite (rebuild/compact) since we opened it
+                        continue
+                    f.write(payload)
+                    if fsync:
+                        f.flush()
+                        os.fsync(f.fileno())
+                    return
+                finally:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _is_current(self, f) -> bool:
+        try:
+            return os.fstat(f.fileno()).st_ino == os.stat(self.log_path).st_ino
+        except FileNotFoundError:
+            return False
+
+    def _apply(self, record: Dict):
+        session_id = record['id']
+        previous = self._records.pop(session_id, None)
+        if previous is not None:
+            key = (previous.get('timestamp') or '', session_id)
+            position = bisect.bisect_left(self._order, key)
+            if position < len(self._order) and self._order[position] == key:
+                del self._order[position]
+
+        for lookup, field in ((self._by_hash, 'content_hash'), (self._by_key, 'idempotency_key')):
+            value = None if record.get('deleted') else record.get(field)
+            old_value = previous.get(field) if previous is not None else None
+            if old_value == value:
+                continue
+            if old_value:
+                # The next session holding the value (if any) takes over
+                holders = lookup.get(old_value, [])
+                if session_id in holders:
+                    holders.remove(session_id)
+                if not holders:
+                    lookup.pop(old_value, None)
+            if value:
+                lookup.setdefault(value, []).append(session_id)
+
+        if record.get('deleted'):
+            return
+
+        self._records[session_id] = record
+        bisect.insort(self._order, (record.get('timestamp') or '', session_id))
+
+    def refresh(self) -> int:
+        """
+        Apply records appended to the log since the last refresh
+
+        Returns:
+            Number of records applied
+        """
+        with self._lock:
+            records, offset, inode = read_log_file(self.log_path, self._offset, self._inode)
+            if inode != self._inode:
+                # First load, or the log was rebuilt/compacted: reload it
+                self._records, self._order = {}, []
+                self._by_hash, self._by_key = {}, {}
+                self._inode = inode
+
+            self._offset = offset
+            for record in records:
+                self._apply(record)
+
+            return len(records)
+
+    def add(self, session_data: Dict, filename: str) -> Dict:
+        """
+        Index a newly written (or rewritten) session
+
+        Args:
+            session_data: Full session data
+            filename: Session filename within the archive
+
+        Returns:
+            Index record
+        """
+        return self.add_many([(session_data, filename)])[0]
+
+    def add_many(self, sessions: List[Tuple[Dict, str]], fsync: bool = False) -> List[Dict]:
+        """
+        Index several sessions with a single log append
+
+        Args:
+            sessions: (session data, filename) pairs
+            fsync: Flush the log to stable storage before returning
+
+        Returns:
+            Index records
+        """
+        records = [session_record(session_data, filename) for session_data, filename in sessions]
+        if records:
+            self._append(records, fsync=fsync)
+        return records
+
+    def put_many(self, records: List[Dict]):
+        """
+        Write complete index records (replacing the current ones)
+
+        Args:
+            records: Index records, each with an `id`
+        """
+        if records:
+            self._append(records)
+
+    def update(self, session_id: str, **fields) -> Optional[Dict]:
+        """
+        Update fields of an indexed session
+
+        Args:
+            session_id: Session unique identifier
+            fields: Fields to overwrite
+
+        Returns:
+            Updated record, or None if the session is not indexed
+        """
+        record = self.get(session_id)
+        if record is None:
+            return None
+
+        record = {**record, **fields}
+        self._append([record])
+        return record
+
+    def remove(self, session_id: str):
+        """
+        Remove a session from the index
+
+        Args:
+            session_id: Session unique identifier
+        """
+        self._append([{'id': session_id, 'deleted': True}])
+
+    def get(self, session_id: str) -> Optional[Dict]:
+        """
+        Look up a session's index record
+
+        Args:
+            session_id: Session unique identifier
+
+        Returns:
+            Index record or None
+        """
+        self.refresh()
+        return self._records.get(session_id)
+
+    def find_duplicate(
+        self,
+        content_hash: Optional[str] = None,
+        idempotency_key: Optional[str] = None
+    ) -> Optional[Dict]:
+        """
+        Look up an indexed session by idempotency key or content hash
+
+        Args:
+            content_hash: Normalized message hash (see models.content_hash)
+            idempotency_key: Client-supplied idempotency key
+
+        Returns:
+            Index record of the first matching session, or None
+        """
+        self.refresh()
+        holders = (idempotency_key and self._by_key.get(idempotency_key)) or \
+            (content_hash and self._by_hash.get(content_hash))
+        return self._records.get(holders[0]) if holders else None
+
+    def scan(self, after: Optional[Tuple[str, str]] = None, limit: int = 500) -> List[Dict]:
+        """
+        Page through index records, oldest first
+
+        Args:
+            after: (timestamp, id) of the last record of the previous page
+            limit: Maximum number of records to return
+
+        Returns:
+            List of index records
+        """
+        self.refresh()
+        start = bisect.bisect_right(self._order, tuple(after)) if after else 0
+        return [self._records[session_id] for _, session_id in self._order[start:start + limit]]
+
+    def recent(self, offset: int = 0, limit: int = 50) -> List[Dict]:
+        """
+        List index records, newest first
+
+        Args:
+            offset: Number of records to skip
+            limit: Maximum number of records to return
+
+        Returns:
+            List of index records
+        """
+        self.refresh()
+        end = len(self._order) - offset
+        start = max(end - limit, 0)
+        return [self._records[session_id] for _, session_id in reversed(self._order[start:max(end, 0)])]
+
+    def __len__(self) -> int:
+        self.refresh()
+        return len(self._records)
+
+    def __iter__(self) -> Iterator[Dict]:
+        self.refresh()
+        return iter(list(self._records.values()))
+
+    def _log_size(self) -> int:
+        with open(self.log_path, 'ab') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                return f.tell()
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _write_log(self, records: List[Dict], carry_from: int):
+        """
+        Replace the log with records, keeping lines appended past carry_from
+
+        Captures may append while the new log is prepared; their lines are
+        newer than the rewritten records, so they are copied over under the
+        append lock before the new log takes its place.
+        """
+        tmp_path = f"{self.log_path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            for record in records:
+                f.write(dumps(record) + b'\n')
+
+            with open(self.log_path, 'ab+') as current:
+                fcntl.flock(current, fcntl.LOCK_EX)
+                try:
+                    current.seek(carry_from)
+                    f.write(current.read())
+                    f.flush()
+                    os.replace(tmp_path, self.log_path)
+                finally:
+                    fcntl.flock(current, fcntl.LOCK_UN)
+
+    def compact(self) -> int:
+        """
+        Rewrite the log keeping only the live record of each session
+
+        Returns:
+            Number of live records
+        """
+        self.refresh()
+        with self._lock:
+            records = [self._records[session_id] for _, session_id in self._order]
+            carry_from = self._offset
+        self._write_log(records, carry_from)
+        return len(records)
+
+    def rebuild(self, sessions_path: str = SESSIONS_ARCHIVE, cold_path: str = COLD_ARCHIVE_PATH) -> int:
+        """
+        Rebuild the index from scratch by scanning the session archive
+
+        Args:
+            sessions_path: Directory containing session files
+            cold_path: Directory containing cold segments
+
+        Returns:
+            Number of sessions indexed
+        """
+        # Sessions captured while scanning are kept (appended past this point)
+        carry_from = self._log_size()
+        records = []
+        for filename in sorted(os.listdir(sessions_path)):
+            if not session_id_from_path(filename):
+                continue
+            session_data = read_json(os.path.join(sessions_path, filename))
+            if session_data and session_data.get('id'):
+                records.append(session_record(session_data, filename))
+
+        # Cold sessions (a hot copy wins, e.g. after an interrupted tiering run)
+        hot = {record['id'] for record in records}
+        for data, filename, location in iter_cold_sessions(cold_path):
+            session_data = loads(data)
+            if session_data.get('id') and session_data['id'] not in hot:
+                records.append({**session_record(session_data, filename), 'cold': location})
+
+        self._write_log(records, carry_from)
+        return len(records)
+
+def main():
+    """
+    Rebuild the session index from the archive
+    """
+    total = SessionIndex().rebuild()
+    print(f"Session index rebuilt: {total} sessions")
+
+if __name__ == "__main__":
+    main()
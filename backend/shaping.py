@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+from typing import Dict, Iterable, List, Optional
+
+def parse_fields(value: Optional[str]) -> Optional[List[str]]:
+    """
+    Parse a comma-separated `fields`/`include` query parameter
+
+    Args:
+        value: Raw query parameter value
+
+    Returns:
+        Ordered list of unique names, or None if the parameter was not given
+    """
+    if value is None:
+        return None
+
+    names = []
+    for name in value.split(','):
+        name = name.strip()
+        if name and name not in names:
+            names.append(name)
+    return names
+
+def project_fields(data: Dict, fields: Iterable[str]) -> Dict:
+    """
+    Keep only the requested top-level fields of a record
+
+    Args:
+        data: Source record
+        fields: Field names to keep
+
+    Returns:
+        Projected record (missing fields are returned as None)
+    """
+    return {name: data.get(name) for name in fields}
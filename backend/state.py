@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Shared storage state for the API process
+
+Routers import the index objects from here so that every router works
+against the same in-memory views. Constructing them is cheap: indexes
+load on first use, and `warmup` loads them in the background once the
+server is up.
+"""
+import os
+
+from action_item_index import ActionItemIndex
+from analytics import SessionAnalytics
+from cold_storage import ColdStore
+from ingest import OpenSessionStore
+from link_index import LinkIndex
+from model_providers import create_provider
+from project_index import ProjectIndex
+from project_manager import ProjectManager
+from project_stats import ProjectStats
+from retention import RetentionEngine
+from session_capture import SessionCapture
+from session_index import SessionIndex
+from storage import PROJECTS_PATH, file_lock
+from token_ledger import TokenLedger
+from warmup import Warmup
+from watcher import ArchiveWatcher
+
+link_index = LinkIndex()
+project_index = ProjectIndex()
+project_stats = ProjectStats()
+session_index = SessionIndex()
+action_item_index = ActionItemIndex()
+session_analytics = SessionAnalytics(session_index)
+cold_store = ColdStore(session_index)
+project_manager = ProjectManager(
+    link_index=link_index, stats=project_stats, action_items=action_item_index, cold_store=cold_store
+)
+session_capture = SessionCapture(
+    project_manager=project_manager,
+    session_index=session_index,
+    cold_store=cold_store,
+    token_ledger=TokenLedger(),
+    model_provider=create_provider()
+)
+open_sessions = OpenSessionStore(session_capture)
+retention = RetentionEngine(session_index, cold_store, project_manager)
+archive_watcher = ArchiveWatcher(session_index, project_manager)
+
+def _load_session_index():
+    # First start against an existing archive: build the session index from it
+    # (once, even when several workers start together)
+    if not os.path.exists(session_index.log_path):
+        with file_lock('session-index-rebuild'):
+            if not os.path.exists(session_index.log_path):
+                session_index.rebuild()
+    session_index.refresh()
+
+def _load_action_item_index():
+    # Existing project files predate the index: build it from them (once)
+    if not os.path.exists(action_item_index.log_path):
+        with file_lock('action-item-index-rebuild'):
+            if not os.path.exists(action_item_index.log_path):
+                action_item_index.rebuild(PROJECTS_PATH)
+    action_item_index.refresh()
+
+warmup = Warmup([
+    ('session_index', _load_session_index),
+    ('session_analytics', session_analytics.warm),
+    ('action_item_index', _load_action_item_index),
+    ('project_index', project_index.summaries),
+    # Session files added or removed while the API was down
+    ('archive_catch_up', archive_watcher.catch_up if archive_watcher.mode != 'off' else lambda: 0)
+])
+# Retention prunes links to sessions missing from the index: it waits for these
+RETENTION_WARMUP_STEPS = ('session_index', 'archive_catch_up')
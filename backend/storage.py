@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+import os
+import gzip
+import fcntl
+import shutil
+import tempfile
+import zlib
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+from serialization import dump_file, load_file
+
+# Storage locations, overridable through the environment (see docker-compose.yml)
+SESSIONS_ARCHIVE = os.getenv('SESSIONS_PATH', '/root/clawd/sessions_archive')
+PROJECTS_PATH = os.getenv('PROJECTS_PATH', '/root/clawd/projects/sessiontrack/project_data')
+INDEX_PATH = os.getenv('INDEX_PATH', os.path.join(SESSIONS_ARCHIVE, '.index'))
+OPEN_SESSIONS_PATH = os.getenv('OPEN_SESSIONS_PATH', os.path.join(SESSIONS_ARCHIVE, '.open'))
+COLD_ARCHIVE_PATH = os.getenv('COLD_ARCHIVE_PATH', os.path.join(SESSIONS_ARCHIVE, '.cold'))
+PROFILES_PATH = os.getenv('PROFILES_PATH', os.path.join(SESSIONS_ARCHIVE, '.profiles'))
+LOCKS_PATH = os.path.join(INDEX_PATH, 'locks')
+# Pre-compressed variants of session files (kept out of the archive directory)
+GZIP_CACHE_PATH = os.getenv('GZIP_CACHE_PATH', os.path.join(INDEX_PATH, 'gzip'))
+
+# Named locks hash onto this many lock files
+LOCK_STRIPES = 256
+
+def session_filename(timestamp: str, session_id: str) -> str:
+    """
+    Build the archive filename for a session
+
+    Args:
+        timestamp: Session capture timestamp (ISO format)
+        session_id: Session unique identifier
+
+    Returns:
+        Filename of the session within the archive
+    """
+    return f"{timestamp}_{session_id}.json"
+
+def session_id_from_path(path: str) -> Optional[str]:
+    """
+    Extract the session identifier from a session file path
+
+    Args:
+        path: Path (or bare filename) of a session file
+
+    Returns:
+        Session identifier, or None if the path is not a session file
+    """
+    filename = os.path.basename(path)
+    if not filename.endswith('.json'):
+        return None
+
+    _, sep, session_id = filename[:-len('.json')].rpartition('_')
+    return session_id if sep and session_id else None
+
+def read_json(path: str, default: Optional[Dict] = None) -> Optional[Dict]:
+    """
+    Read a JSON file, returning a default if it does not exist
+
+    Args:
+        path: File path
+        default: Value returned when the file is missing
+
+    Returns:
+        Parsed file content or the default
+    """
+    try:
+        return load_file(path)
+    except FileNotFoundError:
+        return default
+
+@contextmanager
+def file_lock(name: str, locks_path: str = LOCKS_PATH) -> Iterator[None]:
+    """
+    Hold an exclusive lock on a named resource (across processes and threads)
+
+    Guards read-modify-write cycles of shared JSON files when several API
+    workers run against one archive. Names hash onto a fixed set of lock
+    files, so there is nothing to clean up; unrelated names may share a
+    lock, which is why these blocks must never nest.
+
+    Args:
+        name: Resource name, e.g. 'project:<id>'
+        locks_path: Directory of the lock files
+    """
+    os.makedirs(locks_path, exist_ok=True)
+    stripe = zlib.crc32(name.encode()) % LOCK_STRIPES
+    with open(os.path.join(locks_path, f"{stripe:03d}.lock"), 'a') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+def atomic_write_json(path: str, data: Dict, indent: Optional[int] = 2):
+    """
+    Write JSON to a file atomically (write to a temp file, then rename)
+
+    Readers never observe a partially written file.
+
+    Args:
+        path: Destination file path
+        data: JSON-serializable data
+        indent: Indentation (2 for the archive format, None for compact)
+    """
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    dump_file(path, data, indent=bool(indent), atomic=True)
+
+def gzip_variant_path(path: str) -> str:
+    """
+    Path of the pre-compressed variant of a file (under GZIP_CACHE_PATH)
+    """
+    return os.path.join(GZIP_CACHE_PATH, f"{os.path.basename(path)}.gz")
+
+def remove_gzip_variant(path: str):
+    """
+    Delete the pre-compressed variant of a file, if any
+    """
+    try:
+        os.unlink(gzip_variant_path(path))
+    except FileNotFoundError:
+        pass
+
+def gzip_variant(path: str) -> str:
+    """
+    Get the pre-compressed (.gz) variant of a file, creating it if missing or stale
+
+    Variants live under GZIP_CACHE_PATH, so creating one never touches the
+    directory of the original (whose modification time watchers and
+    listing validators rely on).
+
+    Args:
+        path: Path of the original file
+
+    Returns:
+        Path of the gzip-compressed copy
+    """
+    gz_path = gzip_variant_path(path)
+    try:
+        if os.stat(gz_path).st_mtime_ns >= os.stat(path).st_mtime_ns:
+            return gz_path
+    except FileNotFoundError:
+        pass
+
+    os.makedirs(GZIP_CACHE_PATH, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=GZIP_CACHE_PATH, prefix='.', suffix='.tmp')
+    try:
+        with open(path, 'rb') as src, os.fdopen(fd, 'wb') as raw, gzip.GzipFile(fileobj=raw, mode='wb', mtime=0) as dst:
+            shutil.copyfileobj(src, dst)
+        os.replace(tmp_path, gz_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+    return gz_path
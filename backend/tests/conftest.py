@@ -0,0 +1,13 @@
+import os
+import sys
+import tempfile
+
+# Storage paths are read at import time: point them at a scratch archive
+# before any backend module is imported
+_ARCHIVE = tempfile.mkdtemp(prefix='sessions-archive-')
+os.environ.setdefault('SESSIONS_PATH', os.path.join(_ARCHIVE, 'sessions'))
+os.environ.setdefault('PROJECTS_PATH', os.path.join(_ARCHIVE, 'projects'))
+os.environ.setdefault('ARCHIVE_WATCH', 'off')
+os.environ.setdefault('MODEL_PROVIDER', 'none')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
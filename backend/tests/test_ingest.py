@@ -0,0 +1,29 @@
+from fastapi.testclient import TestClient
+
+import main
+from state import project_manager
+
+MESSAGES = b'{"author": "user", "content": "hi"}\n{"author": "assistant", "content": "Hello! How can I help?"}\n'
+
+def _ingest(client: TestClient, project_id: str) -> str:
+    opened = client.post('/ingest/sessions', json={'project_id': project_id})
+    assert opened.status_code == 200
+    session_id = opened.json()['session_id']
+
+    assert client.post(f'/ingest/sessions/{session_id}/messages', content=MESSAGES).status_code == 200
+    closed = client.post(f'/ingest/sessions/{session_id}/close')
+    assert closed.status_code == 200
+    return closed.json()['id']
+
+def test_closed_session_keeps_its_id():
+    # Identical short transcripts streamed into different projects are
+    # separate sessions: each close returns an id that can be fetched
+    with TestClient(main.app) as client:
+        project_ids = [project_manager.create_project(name) for name in ('A', 'B')]
+        session_ids = [_ingest(client, project_id) for project_id in project_ids]
+
+        assert session_ids[0] != session_ids[1]
+        for session_id, project_id in zip(session_ids, project_ids):
+            session = client.get(f'/sessions/{session_id}')
+            assert session.status_code == 200
+            assert session.json()['project_id'] == project_id
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+import os
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+from storage import INDEX_PATH, atomic_write_json, file_lock, read_json
+
+TOKEN_LEDGER_PATH = os.path.join(INDEX_PATH, 'token_ledger.json')
+
+def _current_month() -> str:
+    return datetime.now(timezone.utc).strftime('%Y-%m')
+
+def _empty_ledger(month: str) -> Dict:
+    return {'month': month, 'spend': 0.0, 'input_tokens': 0, 'output_tokens': 0, 'calls': 0}
+
+class TokenLedger:
+    """
+    AI spend of the current month, shared by every process on the archive
+
+    The ledger is a small JSON file updated under a file lock, so the
+    monthly budget holds across API workers and restarts. Reads are served
+    from memory until the file changes; a new month starts from zero.
+    """
+    def __init__(self, path: str = TOKEN_LEDGER_PATH):
+        """
+        Initialize TokenLedger
+
+        Args:
+            path: Ledger file
+        """
+        self.path = path
+        self._cached: Optional[Dict] = None
+        self._generation: Optional[Tuple[int, int]] = None
+
+    def _generation_of_file(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        # Every write replaces the file, so inode and mtime identify a version
+        return st.st_ino, st.st_mtime_ns
+
+    def _read(self) -> Dict:
+        month = _current_month()
+        ledger = read_json(self.path)
+        if not ledger or ledger.get('month') != month:
+            return _empty_ledger(month)
+        return ledger
+
+    def usage(self) -> Dict:
+        """
+        Spend and token totals of the current month
+
+        Returns:
+            Ledger ({'month', 'spend', 'input_tokens', 'output_tokens', 'calls'})
+        """
+        generation = self._generation_of_file()
+        if self._cached is None or generation is None or generation != self._generation:
+            self._cached = self._read()
+            self._generation = generation
+        if self._cached['month'] != _current_month():
+            self._cached = _empty_ledger(_current_month())
+        return dict(self._cached)
+
+    def spend(self) -> float:
+        """
+        Dollars spent in the current month
+        """
+        return self.usage()['spend']
+
+    def record(self, cost: float, input_tokens: int, output_tokens: int) -> Dict:
+        """
+        Add one AI call to the ledger
+
+        Args:
+            cost: Cost of the call in dollars
+            input_tokens: Input tokens of the call
+            output_tokens: Output tokens of the call
+
+        Returns:
+            Updated ledger
+        """
+        with file_lock('token-ledger'):
+            ledger = self._read()
+            ledger['spend'] += cost
+            ledger['input_tokens'] += input_tokens
+            ledger['output_tokens'] += output_tokens
+            ledger['calls'] += 1
+            atomic_write_json(self.path, ledger, indent=None)
+            self._cached = ledger
+            self._generation = self._generation_of_file()
+        return dict(ledger)
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+import os
+import time
+import asyncio
+from typing import Callable, Dict, List, Optional, Tuple
+
+WARMUP_RETRY_DELAY = float(os.getenv('WARMUP_RETRY_DELAY', '5'))
+WARMUP_MAX_RETRY_DELAY = float(os.getenv('WARMUP_MAX_RETRY_DELAY', '300'))
+
+class Warmup:
+    """
+    Background warmup of indexes and other lazily loaded state
+
+    Steps run in order in a worker thread once the server is accepting
+    traffic. Requests arriving earlier still work (every index loads on
+    first use), they are just slower; `status()` backs the readiness
+    endpoint. Failed steps are retried in the background with exponential
+    backoff until they succeed.
+    """
+    def __init__(
+        self,
+        steps: List[Tuple[str, Callable[[], object]]],
+        retry_delay: float = WARMUP_RETRY_DELAY,
+        max_retry_delay: float = WARMUP_MAX_RETRY_DELAY
+    ):
+        """
+        Initialize Warmup
+
+        Args:
+            steps: (name, function) pairs run in order
+            retry_delay: Seconds before the first retry of failed steps
+            max_retry_delay: Upper bound of the doubling retry delay
+        """
+        self.steps = steps
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self._status: Dict[str, Dict] = {name: {'state': 'pending'} for name, _ in steps}
+        self._task: Optional[asyncio.Task] = None
+        self._future: Optional[asyncio.Future] = None
+
+    @property
+    def ready(self) -> bool:
+        return all(step['state'] == 'done' for step in self._status.values())
+
+    def done(self, *names: str) -> bool:
+        """
+        Whether specific steps have completed (other steps may still be failing)
+        """
+        return all(self._status[name]['state'] == 'done' for name in names)
+
+    def status(self) -> Dict:
+        """
+        Readiness and per-step progress
+        """
+        return {'ready': self.ready, 'steps': {name: dict(step) for name, step in self._status.items()}}
+
+    def run(self):
+        """
+        Run every pending or failed step synchronously
+        """
+        for name, step in self.steps:
+            if self._status[name]['state'] == 'done':
+                continue
+            attempts = self._status[name].get('attempts', 0) + 1
+            self._status[name] = {'state': 'running', 'attempts': attempts}
+            start = time.perf_counter()
+            try:
+                step()
+            except Exception as e:
+                self._status[name] = {'state': 'failed', 'error': str(e), 'attempts': attempts}
+                print(f"Warmup step {name} failed (attempt {attempts}): {e}")
+            else:
+                self._status[name] = {'state': 'done', 'seconds': round(time.perf_counter() - start, 3)}
+
+    async def _loop(self):
+        delay = self.retry_delay
+        while True:
+            self._future = asyncio.get_running_loop().run_in_executor(None, self.run)
+            await self._future
+            self._future = None
+            if self.ready:
+                return
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_retry_delay)
+
+    async def start(self):
+        """
+        Run the steps in the background, retrying failed ones
+        """
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        """
+        Stop retrying and wait for a running step to finish (worker threads cannot be cancelled)
+        """
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._future is not None:
+            await asyncio.gather(self._future, return_exceptions=True)
+            self._future = None
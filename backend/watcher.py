@@ -0,0 +1,484 @@
+#!/usr/bin/env python3
+"""
+Keep the indexes in sync with files written outside the API
+
+Session files dropped into the archive by other tools (the capture CLIs,
+a mounted volume) and project files edited by hand are picked up as they
+change: inotify on Linux, directory polling elsewhere. Events are
+debounced per file, then applied incrementally to the session index, the
+link index, project stats and the action item index. Writes made by the
+API itself are recognised (the index already matches) and cost one file
+read. Polling sees new, replaced and deleted session files, but not
+session files rewritten in place (inotify does).
+
+Usage:
+    python watcher.py [--catch-up]
+"""
+import os
+import time
+import ctypes
+import ctypes.util
+import struct
+import asyncio
+import argparse
+from typing import Dict, List, Optional, Tuple
+
+from session_index import session_record
+from storage import PROJECTS_PATH, SESSIONS_ARCHIVE, read_json, remove_gzip_variant, session_id_from_path
+
+# auto (inotify, polling if unavailable) / inotify / poll / off
+ARCHIVE_WATCH = os.getenv('ARCHIVE_WATCH', 'auto')
+ARCHIVE_WATCH_DEBOUNCE = float(os.getenv('ARCHIVE_WATCH_DEBOUNCE', '0.5'))
+ARCHIVE_WATCH_POLL_INTERVAL = float(os.getenv('ARCHIVE_WATCH_POLL_INTERVAL', '2'))
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE
+
+_EVENT_HEADER = struct.Struct('iIII')
+
+class Inotify:
+    """
+    Minimal inotify binding (Linux) reporting changed file names per directory
+    """
+    def __init__(self, directories: Dict[str, str]):
+        """
+        Initialize Inotify
+
+        Args:
+            directories: kind -> directory to watch
+
+        Raises:
+            OSError: inotify is not available
+        """
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or None, use_errno=True)
+        if not hasattr(libc, 'inotify_init1'):
+            raise OSError("inotify is not available on this platform")
+
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        self._kinds: Dict[int, str] = {}
+        for kind, directory in directories.items():
+            wd = libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+            if wd < 0:
+                errno = ctypes.get_errno()
+                os.close(self.fd)
+                raise OSError(errno, f"Cannot watch {directory}")
+            self._kinds[wd] = kind
+
+    def read(self) -> Tuple[List[Tuple[str, str]], bool]:
+        """
+        Drain pending events
+
+        Returns:
+            ((kind, filename) pairs, whether the kernel queue overflowed)
+        """
+        changes, overflow = [], False
+        while True:
+            try:
+                data = os.read(self.fd, 1024 * 1024)
+            except BlockingIOError:
+                return changes, overflow
+
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b'\0').decode(errors='surrogateescape')
+                offset += length
+
+                if mask & IN_Q_OVERFLOW:
+                    overflow = True
+                elif name and not mask & IN_ISDIR and wd in self._kinds:
+                    changes.append((self._kinds[wd], name))
+
+    def close(self):
+        os.close(self.fd)
+
+class ArchiveWatcher:
+    """
+    Applies out-of-band changes of session and project files to the indexes
+
+    Sessions: a new or rewritten file is (re)indexed and linked to its
+    project_id; a deleted file is dropped from the index and its project
+    links. Projects: the link index, stats and action item index follow
+    the project file's sessions and action items. Each change is applied
+    once its file has been quiet for `debounce` seconds, so a burst of
+    writes costs one update.
+    """
+    def __init__(
+        self,
+        session_index,
+        project_manager,
+        sessions_path: str = SESSIONS_ARCHIVE,
+        projects_path: str = PROJECTS_PATH,
+        mode: str = ARCHIVE_WATCH,
+        debounce: float = ARCHIVE_WATCH_DEBOUNCE,
+        poll_interval: float = ARCHIVE_WATCH_POLL_INTERVAL
+    ):
+        """
+        Initialize ArchiveWatcher
+
+        Args:
+            session_index: SessionIndex to keep current
+            project_manager: ProjectManager (with its link index and stats)
+            sessions_path: Session archive directory
+            projects_path: Project files directory
+            mode: auto, inotify, poll or off
+            debounce: Seconds a file must be quiet before it is synced
+            poll_interval: Seconds between directory checks when polling
+        """
+        self.session_index = session_index
+        self.project_manager = project_manager
+        self.directories = {'session': sessions_path, 'project': projects_path}
+        self.mode = mode
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+
+        self._pending: Dict[Tuple[str, str], float] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._inotify: Optional[Inotify] = None
+        self._snapshots: Dict[str, Tuple[int, Dict[str, Tuple[int, int]]]] = {}
+        self._tasks: List[asyncio.Task] = []
+        self.backend: Optional[str] = None
+
+    # Syncing
+
+    def sync_session(self, filename: str) -> Optional[str]:
+        """
+        Bring the index in line with one session file
+
+        Args:
+            filename: Session filename within the archive
+
+        Returns:
+            'indexed', 'removed' or None if nothing changed
+        """
+        session_id = session_id_from_path(filename)
+        if not session_id:
+            return None
+        path = os.path.join(self.directories['session'], filename)
+
+        try:
+            session_data = read_json(path)
+        except ValueError:
+            # Still being written; the final write brings another event
+            return None
+
+        if session_data is None:
+            record = self.session_index.get(session_id)
+            if record is None or record.get('cold') or record['filename'] != filename:
+                return None
+            self.session_index.remove(session_id)
+            link_index = self.project_manager.link_index
+            for link in link_index.projects_for_session(session_id):
+                # The file is gone: stats drop what the index record still knows
+                self.project_manager.remove_sessions_from_project(link['project_id'], [session_id], [record])
+            link_index.remove_session(session_id)
+            remove_gzip_variant(path)
+            return 'removed'
+
+        if not session_data.get('id'):
+            return None
+        record = session_record(session_data, filename)
+        current = self.session_index.get(record['id'])
+        if current is not None and all(current.get(key) == value for key, value in record.items()):
+            return None
+
+        self.session_index.put_many([record])
+        project_id = session_data.get('project_id')
+        if project_id:
+            self.project_manager.add_sessions_to_project(project_id, [(path, session_data)])
+        return 'indexed'
+
+    def sync_project(self, filename: str) -> Optional[str]:
+        """
+        Bring the link index and stats in line with one project file
+
+        Args:
+            filename: Project filename (<project_id>.json)
+
+        Returns:
+            'updated', 'removed' or None if nothing changed
+        """
+        if not filename.endswith('.json') or filename.startswith('.'):
+            return None
+        project_id = filename[:-len('.json')]
+        link_index = self.project_manager.link_index
+        stats = self.project_manager.stats
+        action_items = self.project_manager.action_items
+
+        try:
+            project_data = read_json(os.path.join(self.directories['project'], filename))
+        except ValueError:
+            return None
+
+        _, links = link_index.sessions_for_project(project_id, 0, 2 ** 31)
+        linked = {link['session_id']: link for link in links}
+
+        if project_data is None:
+            for session_id in linked:
+                link_index.unlink(project_id, session_id)
+            stats_file = os.path.join(stats.stats_dir, filename)
+            if os.path.exists(stats_file):
+                os.unlink(stats_file)
+            removed_items = action_items.remove_project(project_id)
+            return 'removed' if linked or removed_items else None
+
+        entries = {}
+        for entry in project_data.get('sessions', []):
+            session_id = entry.get('session_id') or session_id_from_path(entry.get('path', ''))
+            if session_id:
+                entries[session_id] = entry
+
+        changed = False
+        missing = [
+            {'session_id': session_id, 'path': entry.get('path'), 'added_at': entry.get('added_at')}
+            for session_id, entry in entries.items() if session_id not in linked
+        ]
+        created = link_index.link_many(project_id, missing) if missing else []
+        removed = [session_id for session_id in linked if session_id not in entries]
+        for session_id in removed:
+            link_index.unlink(project_id, session_id)
+
+        if removed:
+            # Recompute from the remaining links
+            sessions = [self.project_manager.load_session(entry) for entry in entries.values()]
+            stats.rebuild(project_data, [data for data in sessions if data])
+            changed = True
+        else:
+            if created:
+                sessions = [self.project_manager.load_session(link) for link in created]
+                stats.record_sessions(project_id, [data for data in sessions if data])
+                changed = True
+            counts = {}
+            for item in project_data.get('action_items', []):
+                status = item.get('status', 'pending')
+                counts[status] = counts.get(status, 0) + 1
+            if stats.get_stats(project_id)['action_items'] != counts:
+                stats.set_action_items(project_id, project_data.get('action_items', []))
+                changed = True
+
+        if action_items.set_project(project_id, project_data.get('action_items', [])):
+            changed = True
+
+        return 'updated' if changed else None
+
+    def catch_up(self) -> int:
+        """
+        Sync session files added or removed while the API was not running
+
+        Compares file names only (no file is read unless it differs from the
+        index), so it is cheap enough to run on every start.
+
+        Returns:
+            Number of sessions indexed or removed
+        """
+        sessions_path = self.directories['session']
+        if not os.path.isdir(sessions_path):
+            return 0
+        on_disk = {name for name in os.listdir(sessions_path) if session_id_from_path(name)}
+        indexed = {record['filename'] for record in self.session_index if not record.get('cold')}
+
+        synced = 0
+        for filename in sorted(on_disk ^ indexed):
+            try:
+                synced += self.sync_session(filename) is not None
+            except Exception as e:
+                print(f"Failed to sync {filename}: {e}")
+        return synced
+
+    def apply(self, changes: List[Tuple[str, str]]) -> int:
+        """
+        Sync a batch of changed files
+
+        Args:
+            changes: (kind, filename) pairs, kind being 'session' or 'project'
+
+        Returns:
+            Number of files that changed an index
+        """
+        applied = 0
+        for kind, filename in changes:
+            sync = self.sync_session if kind == 'session' else self.sync_project
+            try:
+                applied += sync(filename) is not None
+            except Exception as e:
+                print(f"Failed to sync {kind} file {filename}: {e}")
+        return applied
+
+    # Watching
+
+    def _queue(self, kind: str, filename: str):
+        if filename.startswith('.') or not filename.endswith('.json'):
+            return
+        self._pending[(kind, filename)] = time.monotonic() + self.debounce
+        self._wakeup.set()
+
+    def _snapshot(self, directory: str) -> Dict[str, Tuple[int, int]]:
+        files = {}
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.name.endswith('.json') and not entry.name.startswith('.'):
+                    try:
+                        st = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    files[entry.name] = (st.st_mtime_ns, st.st_size)
+        return files
+
+    def _poll(self) -> List[Tuple[str, str]]:
+        changes = []
+        for kind, directory in self.directories.items():
+            try:
+                directory_mtime = os.stat(directory).st_mtime_ns
+            except FileNotFoundError:
+                continue
+            previous = self._snapshots.get(kind)
+            # Creating, replacing or deleting a file touches the directory, so
+            # the (large) archive is only listed when that changed; in-place
+            # edits are caught in the (small) projects directory only
+            if kind == 'session' and previous is not None and previous[0] == directory_mtime:
+                continue
+            files = self._snapshot(directory)
+            if previous is not None:
+                old = previous[1]
+                changes.extend((kind, name) for name in files.keys() | old.keys() if files.get(name) != old.get(name))
+            self._snapshots[kind] = (directory_mtime, files)
+        return changes
+
+    async def _poll_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                changes = await loop.run_in_executor(None, self._poll)
+            except OSError as e:
+                print(f"Archive poll failed: {e}")
+                continue
+            for kind, filename in changes:
+                self._queue(kind, filename)
+
+    def _on_inotify(self):
+        changes, overflow = self._inotify.read()
+        for kind, filename in changes:
+            self._queue(kind, filename)
+        if overflow:
+            self._tasks.append(asyncio.create_task(self._recover_overflow()))
+
+    async def _recover_overflow(self):
+        # Events were lost: sync sessions by name and every project file
+        print("inotify queue overflowed, catching up with the archive")
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.catch_up)
+        for filename in await loop.run_in_executor(None, os.listdir, self.directories['project']):
+            self._queue('project', filename)
+
+    async def _apply_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            if not self._pending:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            now = time.monotonic()
+            due = [key for key, deadline in self._pending.items() if deadline <= now]
+            if not due:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), min(self._pending.values()) - now)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            for key in due:
+                del self._pending[key]
+            await loop.run_in_executor(None, self.apply, due)
+
+    async def start(self):
+        """
+        Start watching the archive and project directories
+        """
+        if self.mode == 'off' or self._tasks:
+            return
+        for directory in self.directories.values():
+            os.makedirs(directory, exist_ok=True)
+
+        self._wakeup = asyncio.Event()
+        loop = asyncio.get_running_loop()
+
+        if self.mode in ('auto', 'inotify'):
+            try:
+                self._inotify = Inotify(self.directories)
+            except OSError as e:
+                if self.mode == 'inotify':
+                    raise
+                print(f"inotify unavailable ({e}), polling the archive instead")
+
+        if self._inotify is not None:
+            loop.add_reader(self._inotify.fd, self._on_inotify)
+            self.backend = 'inotify'
+        else:
+            await loop.run_in_executor(None, self._poll)
+            self._tasks.append(asyncio.create_task(self._poll_loop()))
+            self.backend = 'poll'
+
+        self._tasks.append(asyncio.create_task(self._apply_loop()))
+
+    async def stop(self):
+        """
+        Stop watching (pending changes are applied first)
+        """
+        if self._inotify is not None:
+            asyncio.get_running_loop().remove_reader(self._inotify.fd)
+            self._inotify.close()
+            self._inotify = None
+
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        if self._pending:
+            changes, self._pending = list(self._pending), {}
+            await asyncio.get_running_loop().run_in_executor(None, self.apply, changes)
+
+def main():
+    """
+    Sync the indexes with the archive once, or watch it until interrupted
+    """
+    parser = argparse.ArgumentParser(description='SessionTrack archive watcher')
+    parser.add_argument('--catch-up', action='store_true', help='Sync files added or removed since the last run, then exit')
+    args = parser.parse_args()
+
+    from project_manager import ProjectManager
+    from session_index import SessionIndex
+
+    watcher = ArchiveWatcher(SessionIndex(), ProjectManager())
+    synced = watcher.catch_up()
+    print(f"Caught up: {synced} session files synced")
+    if args.catch_up:
+        return
+
+    async def watch():
+        await watcher.start()
+        print(f"Watching {', '.join(watcher.directories.values())} ({watcher.backend})")
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await watcher.stop()
+
+    try:
+        asyncio.run(watch())
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()